@@ -0,0 +1,122 @@
+"""
+Caixa de entrada desnormalizada do chat.
+
+Cada participante tem uma EntradaCaixa por conversa com o outro
+participante, a prévia e a data da última mensagem e o total de não lidas.
+A lista de conversas vira uma única consulta pelo índice (usuario,
+data_atualizacao), sem tocar em Mensagem nem na tabela de participantes.
+
+As entradas são mantidas pelos sinais do chat, na mesma transação da
+mensagem: `registrar_mensagem` atualiza as linhas de todos os participantes
+num único UPDATE e `atualizar_nao_lidas` acompanha o cursor de leitura.
+Mensagens apagadas ou alteradas fora desses caminhos deixam a prévia
+defasada; o comando `reconstruir_caixas` recalcula tudo.
+"""
+from django.db import transaction
+from django.db.models import BooleanField, Case, F, Value, When
+
+from .models import Conversa, EntradaCaixa
+
+PREVIA_TAMANHO = 255
+
+
+def previa(conteudo):
+    """Texto da mensagem em uma linha, cortado no tamanho da coluna"""
+    texto = ' '.join((conteudo or '').split())
+    if len(texto) > PREVIA_TAMANHO:
+        texto = texto[:PREVIA_TAMANHO - 1] + '…'
+    return texto
+
+
+def criar_entradas(conversa):
+    """Cria (se faltarem) as entradas dos participantes da conversa"""
+    participantes = list(conversa.participantes.values_list('id', flat=True))
+    outro = {
+        usuario_id: next((pk for pk in participantes if pk != usuario_id), None)
+        for usuario_id in participantes
+    }
+    EntradaCaixa.objects.bulk_create([
+        EntradaCaixa(
+            usuario_id=usuario_id,
+            conversa=conversa,
+            outro_participante_id=outro.get(usuario_id),
+            data_atualizacao=conversa.data_criacao,
+        )
+        for usuario_id in participantes
+    ], ignore_conflicts=True)
+
+    # Quem entrou sozinho na conversa ganha o outro participante quando ele chega
+    for usuario_id in EntradaCaixa.objects.filter(
+        conversa=conversa, outro_participante__isnull=True
+    ).values_list('usuario_id', flat=True):
+        if outro.get(usuario_id):
+            EntradaCaixa.objects.filter(conversa=conversa, usuario_id=usuario_id).update(
+                outro_participante_id=outro[usuario_id]
+            )
+
+
+def _aplicar_mensagem(mensagem):
+    remetente = mensagem.remetente_id
+    return EntradaCaixa.objects.filter(conversa_id=mensagem.conversa_id).update(
+        previa=previa(mensagem.conteudo),
+        ultima_enviada_pelo_usuario=Case(
+            When(usuario_id=remetente, then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        ),
+        data_ultima_mensagem=mensagem.data_criacao,
+        data_atualizacao=mensagem.data_criacao,
+        nao_lidas=Case(
+            When(usuario_id=remetente, then=F('nao_lidas')),
+            default=F('nao_lidas') + 1,
+        ),
+    )
+
+
+def registrar_mensagem(mensagem):
+    """Leva a mensagem nova às entradas de todos os participantes"""
+    atualizadas = _aplicar_mensagem(mensagem)
+    if not atualizadas:
+        # Conversa criada sem passar pelo sinal de participantes (ex.: SQL direto)
+        criar_entradas(mensagem.conversa)
+        atualizadas = _aplicar_mensagem(mensagem)
+    return atualizadas
+
+
+def atualizar_nao_lidas(conversa, usuario, total):
+    """Grava o total de não lidas calculado a partir do cursor de leitura"""
+    EntradaCaixa.objects.filter(conversa=conversa, usuario=usuario).update(nao_lidas=total)
+
+
+def reconstruir(conversas=None):
+    """
+    Recalcula as entradas a partir das mensagens e dos cursores de leitura.
+    Retorna quantas conversas foram processadas.
+    """
+    conversas = Conversa.objects.all() if conversas is None else conversas
+    total = 0
+    for conversa in conversas.prefetch_related('participantes').iterator(chunk_size=200):
+        participantes = [participante.id for participante in conversa.participantes.all()]
+        cursores = dict(conversa.leituras.values_list('usuario_id', 'ultima_lida_id'))
+        ultima = conversa.mensagens.filter(is_ativo=True).order_by('-data_criacao', '-id').first()
+
+        with transaction.atomic():
+            EntradaCaixa.objects.filter(conversa=conversa).exclude(usuario_id__in=participantes).delete()
+            for usuario_id in participantes:
+                nao_lidas = conversa.mensagens.filter(
+                    is_ativo=True, id__gt=cursores.get(usuario_id, 0)
+                ).exclude(remetente_id=usuario_id).count()
+                EntradaCaixa.objects.update_or_create(
+                    usuario_id=usuario_id,
+                    conversa=conversa,
+                    defaults={
+                        'outro_participante_id': next((pk for pk in participantes if pk != usuario_id), None),
+                        'previa': previa(ultima.conteudo) if ultima else '',
+                        'ultima_enviada_pelo_usuario': bool(ultima) and ultima.remetente_id == usuario_id,
+                        'data_ultima_mensagem': ultima.data_criacao if ultima else None,
+                        'data_atualizacao': ultima.data_criacao if ultima else conversa.data_criacao,
+                        'nao_lidas': nao_lidas,
+                    },
+                )
+        total += 1
+    return total
@@ -0,0 +1,102 @@
+"""
+Confirmações de leitura por cursor.
+
+Cada participante tem, por conversa, uma linha em LeituraConversa com o id
+da última mensagem lida. Marcar como lida é um UPDATE dessa única linha
+(qualquer que seja o atraso), e "não lidas" é a faixa `id > cursor` das
+mensagens dos outros, servida pelo índice (conversa, id).
+
+`is_lida` e `data_leitura` das mensagens continuam disponíveis para os
+templates: `aplicar_leitura` os preenche nas instâncias a partir dos
+cursores, sem gravar nada nas linhas de Mensagem.
+"""
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .caixa import atualizar_nao_lidas
+from .models import LeituraConversa
+from .tempo_real import obter_canal
+
+
+def cursor_de_leitura(conversa, usuario):
+    """Id da última mensagem lida pelo usuário na conversa (0 se nenhuma)"""
+    cursor = LeituraConversa.objects.filter(
+        conversa=conversa, usuario=usuario
+    ).values_list('ultima_lida_id', flat=True).first()
+    return cursor or 0
+
+
+def nao_lidas(conversa, usuario, cursor=None):
+    """Total de mensagens dos outros participantes depois do cursor do usuário"""
+    if cursor is None:
+        cursor = cursor_de_leitura(conversa, usuario)
+    return conversa.mensagens.filter(
+        is_ativo=True, id__gt=cursor
+    ).exclude(remetente=usuario).count()
+
+
+def marcar_lidas(conversa, usuario, ate_id=None):
+    """
+    Avança o cursor do usuário até `ate_id` (ou até a última mensagem).
+    O cursor nunca volta e nunca passa da última mensagem existente.
+    Retorna True se o cursor avançou.
+    """
+    mensagens = conversa.mensagens.filter(is_ativo=True)
+    if ate_id is not None:
+        mensagens = mensagens.filter(id__lte=ate_id)
+    ate_id = mensagens.order_by('-id').values_list('id', flat=True).first()
+    if not ate_id:
+        return False
+
+    agora = timezone.now()
+    avancou = LeituraConversa.objects.filter(
+        conversa=conversa, usuario=usuario, ultima_lida_id__lt=ate_id
+    ).update(ultima_lida_id=ate_id, data_leitura=agora)
+
+    if not avancou:
+        # Primeira leitura da conversa (ou o cursor já estava à frente)
+        try:
+            with transaction.atomic():
+                _, avancou = LeituraConversa.objects.get_or_create(
+                    conversa=conversa, usuario=usuario,
+                    defaults={'ultima_lida_id': ate_id, 'data_leitura': agora},
+                )
+        except IntegrityError:
+            avancou = False
+
+    if avancou:
+        atualizar_nao_lidas(conversa, usuario, nao_lidas(conversa, usuario, ate_id))
+        evento = {
+            'tipo': 'leitura',
+            'usuario_id': usuario.id,
+            'ultima_lida_id': ate_id,
+            'data_leitura': agora.isoformat(),
+        }
+        transaction.on_commit(lambda: obter_canal().publicar(conversa.id, evento))
+    return bool(avancou)
+
+
+def aplicar_leitura(mensagens, conversa, usuario):
+    """
+    Preenche `is_lida`/`data_leitura` de cada mensagem a partir dos cursores:
+    as enviadas pelo usuário contam como lidas quando outro participante já
+    leu até elas; as recebidas, quando o próprio cursor já passou delas.
+    """
+    if not mensagens:
+        return mensagens
+
+    proprio = (0, None)
+    outros = (0, None)
+    for usuario_id, ultima_lida_id, data_leitura in conversa.leituras.values_list(
+        'usuario_id', 'ultima_lida_id', 'data_leitura'
+    ):
+        if usuario_id == usuario.id:
+            proprio = (ultima_lida_id, data_leitura)
+        elif ultima_lida_id > outros[0]:
+            outros = (ultima_lida_id, data_leitura)
+
+    for mensagem in mensagens:
+        ultima_lida_id, data_leitura = outros if mensagem.remetente_id == usuario.id else proprio
+        mensagem.is_lida = mensagem.id <= ultima_lida_id
+        mensagem.data_leitura = data_leitura if mensagem.is_lida else None
+    return mensagens
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from chat.caixa import reconstruir
+from chat.models import Conversa
+
+
+class Command(BaseCommand):
+    help = 'Recalcula as caixas de entrada do chat (prévia, data e não lidas de cada conversa)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--usuario',
+            type=str,
+            help='Reconstruir apenas as conversas deste username',
+            default=''
+        )
+
+    def handle(self, *args, **options):
+        conversas = Conversa.objects.all()
+        if options['usuario']:
+            conversas = conversas.filter(participantes__username=options['usuario'])
+        
+        self.stdout.write('Reconstruindo caixas de entrada...')
+        total = reconstruir(conversas)
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Reconstrução concluída! {total} conversas processadas.')
+        )
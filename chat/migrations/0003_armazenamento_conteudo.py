@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:15
+
+from django.db import migrations, models
+import midia.armazenamento
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mensagem',
+            name='arquivo',
+            field=models.FileField(blank=True, null=True, storage=midia.armazenamento.obter_armazenamento, upload_to='chat/arquivos/', verbose_name='Arquivo'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_armazenamento_conteudo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mensagem',
+            index=models.Index(fields=['conversa', 'is_ativo', '-data_criacao', '-id'], name='mensagem_conversa_cursor_idx'),
+        ),
+    ]
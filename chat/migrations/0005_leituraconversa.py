@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('chat', '0004_mensagem_conversa_cursor_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mensagem',
+            index=models.Index(fields=['conversa', 'id'], name='mensagem_conversa_id_idx'),
+        ),
+        migrations.CreateModel(
+            name='LeituraConversa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ultima_lida_id', models.PositiveBigIntegerField(default=0, verbose_name='Última Mensagem Lida')),
+                ('data_leitura', models.DateTimeField(blank=True, null=True, verbose_name='Data de Leitura')),
+                ('conversa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leituras', to='chat.conversa', verbose_name='Conversa')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leituras_conversas', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Leitura de Conversa',
+                'verbose_name_plural': 'Leituras de Conversas',
+                'unique_together': {('conversa', 'usuario')},
+            },
+        ),
+    ]
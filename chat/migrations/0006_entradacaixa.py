@@ -0,0 +1,66 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def preencher_caixas(apps, schema_editor):
+    Conversa = apps.get_model('chat', 'Conversa')
+    EntradaCaixa = apps.get_model('chat', 'EntradaCaixa')
+    LeituraConversa = apps.get_model('chat', 'LeituraConversa')
+    Mensagem = apps.get_model('chat', 'Mensagem')
+    
+    entradas = []
+    for conversa in Conversa.objects.prefetch_related('participantes').iterator(chunk_size=200):
+        participantes = [participante.id for participante in conversa.participantes.all()]
+        cursores = dict(LeituraConversa.objects.filter(conversa=conversa).values_list('usuario_id', 'ultima_lida_id'))
+        mensagens = Mensagem.objects.filter(conversa=conversa, is_ativo=True)
+        ultima = mensagens.order_by('-data_criacao', '-id').first()
+        for usuario_id in participantes:
+            entradas.append(EntradaCaixa(
+                usuario_id=usuario_id,
+                conversa=conversa,
+                outro_participante_id=next((pk for pk in participantes if pk != usuario_id), None),
+                previa=' '.join(ultima.conteudo.split())[:255] if ultima else '',
+                ultima_enviada_pelo_usuario=bool(ultima) and ultima.remetente_id == usuario_id,
+                data_ultima_mensagem=ultima.data_criacao if ultima else None,
+                data_atualizacao=ultima.data_criacao if ultima else conversa.data_criacao,
+                nao_lidas=mensagens.filter(id__gt=cursores.get(usuario_id, 0)).exclude(remetente_id=usuario_id).count(),
+            ))
+        if len(entradas) >= 1000:
+            EntradaCaixa.objects.bulk_create(entradas)
+            entradas = []
+    EntradaCaixa.objects.bulk_create(entradas)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('chat', '0005_leituraconversa'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EntradaCaixa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('previa', models.CharField(blank=True, max_length=255, verbose_name='Prévia')),
+                ('ultima_enviada_pelo_usuario', models.BooleanField(default=False, verbose_name='Última Enviada pelo Usuário')),
+                ('data_ultima_mensagem', models.DateTimeField(blank=True, null=True, verbose_name='Data da Última Mensagem')),
+                ('nao_lidas', models.PositiveIntegerField(default=0, verbose_name='Não Lidas')),
+                ('data_atualizacao', models.DateTimeField(verbose_name='Data de Atualização')),
+                ('conversa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entradas_caixa', to='chat.conversa', verbose_name='Conversa')),
+                ('outro_participante', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Outro Participante')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='caixa_entrada', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Entrada da Caixa',
+                'verbose_name_plural': 'Entradas da Caixa',
+                'indexes': [models.Index(fields=['usuario', '-data_atualizacao'], name='caixa_usuario_data_idx')],
+                'unique_together': {('usuario', 'conversa')},
+            },
+        ),
+        migrations.RunPython(preencher_caixas, migrations.RunPython.noop),
+    ]
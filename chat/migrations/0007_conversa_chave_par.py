@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:40
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def preencher_chaves(apps, schema_editor):
+    """
+    Dá a chave do par às conversas com exatamente dois participantes. Se o
+    par tem conversas duplicadas, a chave fica com a mais recente; as outras
+    continuam acessíveis, mas deixam de ser escolhidas por iniciar_conversa.
+    """
+    Conversa = apps.get_model('chat', 'Conversa')
+    
+    vistas = set()
+    alteradas = []
+    diretas = Conversa.objects.annotate(
+        total_participantes=Count('participantes')
+    ).filter(total_participantes=2).order_by('-data_atualizacao', '-id')
+    for conversa in diretas.iterator(chunk_size=500):
+        menor, maior = sorted(conversa.participantes.values_list('id', flat=True))
+        chave = f'{menor}:{maior}'
+        if chave in vistas:
+            continue
+        vistas.add(chave)
+        conversa.chave_par = chave
+        alteradas.append(conversa)
+    Conversa.objects.bulk_update(alteradas, ['chave_par'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0006_entradacaixa'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversa',
+            name='chave_par',
+            field=models.CharField(blank=True, editable=False, max_length=41, null=True, unique=True, verbose_name='Chave do Par'),
+        ),
+        migrations.RunPython(preencher_chaves, migrations.RunPython.noop),
+    ]
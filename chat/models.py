@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth import get_user_model
 
+from midia.armazenamento import obter_armazenamento
+
 Usuario = get_user_model()
 
 
@@ -12,14 +14,44 @@ class Conversa(models.Model):
     data_atualizacao = models.DateTimeField(auto_now=True, verbose_name="Data de Atualização")
     is_ativo = models.BooleanField(default=True, verbose_name="Ativo")
     
+    # Conversas diretas (1:1): "menor_id:maior_id" dos participantes; única no banco
+    chave_par = models.CharField(max_length=41, null=True, blank=True, unique=True, editable=False, verbose_name="Chave do Par")
+    
     class Meta:
         verbose_name = "Conversa"
         verbose_name_plural = "Conversas"
         ordering = ['-data_atualizacao']
     
     def __str__(self):
-        participantes = ", ".join([p.username for p in self.participantes.all()])
-        return f"Conversa: {participantes}"
+        # Sem consultar participantes: o admin e os logs listam muitas conversas
+        return f"Conversa #{self.pk}"
+    
+    @staticmethod
+    def chave_do_par(usuario_id, outro_id):
+        """Chave canônica do par, independente de quem iniciou"""
+        menor, maior = sorted((usuario_id, outro_id))
+        return f"{menor}:{maior}"
+    
+    @classmethod
+    def obter_direta(cls, usuario, outro):
+        """
+        Conversa direta entre os dois usuários, criando-a se não existir.
+        Uma busca pela chave única; se duas requisições criarem ao mesmo
+        tempo, a constraint barra a segunda, que passa a usar a da primeira.
+        Retorna (conversa, criada).
+        """
+        chave = cls.chave_do_par(usuario.id, outro.id)
+        conversa = cls.objects.filter(chave_par=chave).first()
+        if conversa is not None:
+            return conversa, False
+        
+        try:
+            with transaction.atomic():
+                conversa = cls.objects.create(chave_par=chave)
+                conversa.participantes.add(usuario, outro)
+            return conversa, True
+        except IntegrityError:
+            return cls.objects.get(chave_par=chave), False
     
     @property
     def ultima_mensagem(self):
@@ -41,14 +73,15 @@ class Mensagem(models.Model):
     remetente = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='mensagens_enviadas', verbose_name="Remetente")
     conteudo = models.TextField(verbose_name="Conteúdo")
     tipo = models.CharField(max_length=20, choices=TIPO_CHOICES, default='texto', verbose_name="Tipo")
-    arquivo = models.FileField(upload_to='chat/arquivos/', null=True, blank=True, verbose_name="Arquivo")
+    arquivo = models.FileField(upload_to='chat/arquivos/', storage=obter_armazenamento, null=True, blank=True, verbose_name="Arquivo")
     
     # Metadados
     data_criacao = models.DateTimeField(auto_now_add=True, verbose_name="Data de Criação")
     data_atualizacao = models.DateTimeField(auto_now=True, verbose_name="Data de Atualização")
     is_ativo = models.BooleanField(default=True, verbose_name="Ativo")
     
-    # Status da mensagem
+    # Status da mensagem: não são mais gravados por mensagem; o estado de leitura
+    # vem de LeituraConversa e é aplicado nas instâncias por chat.leitura.aplicar_leitura
     is_lida = models.BooleanField(default=False, verbose_name="Lida")
     data_leitura = models.DateTimeField(null=True, blank=True, verbose_name="Data de Leitura")
     
@@ -56,11 +89,65 @@ class Mensagem(models.Model):
         verbose_name = "Mensagem"
         verbose_name_plural = "Mensagens"
         ordering = ['data_criacao']
+        indexes = [
+            # Histórico paginado por cursor (data_criacao, id) dentro da conversa
+            models.Index(fields=['conversa', 'is_ativo', '-data_criacao', '-id'], name='mensagem_conversa_cursor_idx'),
+            # Não lidas = faixa de ids acima do cursor de leitura
+            models.Index(fields=['conversa', 'id'], name='mensagem_conversa_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.remetente.username}: {self.conteudo[:50]}..."
 
 
+class LeituraConversa(models.Model):
+    """Cursor de leitura de um participante: última mensagem lida na conversa"""
+    
+    conversa = models.ForeignKey(Conversa, on_delete=models.CASCADE, related_name='leituras', verbose_name="Conversa")
+    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='leituras_conversas', verbose_name="Usuário")
+    ultima_lida_id = models.PositiveBigIntegerField(default=0, verbose_name="Última Mensagem Lida")
+    data_leitura = models.DateTimeField(null=True, blank=True, verbose_name="Data de Leitura")
+    
+    class Meta:
+        verbose_name = "Leitura de Conversa"
+        verbose_name_plural = "Leituras de Conversas"
+        unique_together = ['conversa', 'usuario']
+    
+    def __str__(self):
+        return f"{self.usuario.username} leu até {self.ultima_lida_id} (conversa {self.conversa_id})"
+
+
+class EntradaCaixa(models.Model):
+    """
+    Linha da caixa de entrada de um usuário (uma por conversa): resumo
+    desnormalizado mantido por chat.caixa a cada mensagem enviada e lida
+    """
+    
+    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='caixa_entrada', verbose_name="Usuário")
+    conversa = models.ForeignKey(Conversa, on_delete=models.CASCADE, related_name='entradas_caixa', verbose_name="Conversa")
+    outro_participante = models.ForeignKey(Usuario, on_delete=models.CASCADE, null=True, blank=True, related_name='+', verbose_name="Outro Participante")
+    
+    # Última mensagem
+    previa = models.CharField(max_length=255, blank=True, verbose_name="Prévia")
+    ultima_enviada_pelo_usuario = models.BooleanField(default=False, verbose_name="Última Enviada pelo Usuário")
+    data_ultima_mensagem = models.DateTimeField(null=True, blank=True, verbose_name="Data da Última Mensagem")
+    nao_lidas = models.PositiveIntegerField(default=0, verbose_name="Não Lidas")
+    
+    # Ordem da caixa: última mensagem (ou criação da conversa, se não houver)
+    data_atualizacao = models.DateTimeField(verbose_name="Data de Atualização")
+    
+    class Meta:
+        verbose_name = "Entrada da Caixa"
+        verbose_name_plural = "Entradas da Caixa"
+        unique_together = ['usuario', 'conversa']
+        indexes = [
+            models.Index(fields=['usuario', '-data_atualizacao'], name='caixa_usuario_data_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.usuario.username} - conversa {self.conversa_id} ({self.nao_lidas} não lidas)"
+
+
 class Notificacao(models.Model):
     """Modelo para notificações do sistema"""
     
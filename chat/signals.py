@@ -0,0 +1,31 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_save
+from django.dispatch import receiver
+
+from .caixa import criar_entradas, registrar_mensagem
+from .models import Conversa, EntradaCaixa, Mensagem
+from .tempo_real import publicar_mensagem
+
+
+@receiver(post_save, sender=Mensagem)
+def mensagem_criada(sender, instance, created, **kwargs):
+    """Atualiza as caixas de entrada na mesma transação e entrega após o commit"""
+    if created:
+        registrar_mensagem(instance)
+        transaction.on_commit(lambda: publicar_mensagem(instance))
+
+
+@receiver(m2m_changed, sender=Conversa.participantes.through)
+def participantes_alterados(sender, instance, action, reverse, pk_set, **kwargs):
+    """Mantém uma entrada na caixa para cada participante da conversa"""
+    if action == 'post_add':
+        conversas = Conversa.objects.filter(pk__in=pk_set) if reverse else [instance]
+        for conversa in conversas:
+            criar_entradas(conversa)
+    elif action == 'post_remove':
+        if reverse:
+            EntradaCaixa.objects.filter(usuario=instance, conversa_id__in=pk_set).delete()
+        else:
+            EntradaCaixa.objects.filter(conversa=instance, usuario_id__in=pk_set).delete()
+    elif action == 'post_clear' and not reverse:
+        EntradaCaixa.objects.filter(conversa=instance).delete()
@@ -0,0 +1,230 @@
+"""
+Entrega das mensagens do chat em tempo real via WebSocket.
+
+O endpoint `/ws/chat/<conversa_id>/` é servido direto pelo meache/asgi.py
+(sem Channels): o navegador abre o socket ao entrar na conversa e recebe
+cada mensagem nova assim que a transação que a gravou é confirmada. O
+envio continua pelo POST de `enviar_mensagem`, com as mesmas validações.
+
+A distribuição passa por um canal de publicação plugável (`CHAT_CANAL`
+nas settings). O padrão, `CanalLocal`, mantém os inscritos em memória e
+só alcança clientes conectados ao mesmo processo; com vários workers o
+canal deve ser trocado por um que use um broker (Redis, PostgreSQL
+LISTEN/NOTIFY...) implementando `publicar`, `inscrever` e `cancelar`.
+
+Cada conexão tem uma fila limitada (CHAT_FILA_MAXIMA). Um cliente lento
+demais para esvaziá-la é desconectado com o código 4008 em vez de acumular
+memória no servidor; ao reconectar, o navegador recarrega o histórico.
+"""
+import asyncio
+import json
+import re
+import threading
+from http.cookies import SimpleCookie
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+ROTA = re.compile(r'^/ws/chat/(?P<conversa_id>\d+)/$')
+
+# Códigos de fechamento (faixa 4000-4999 é livre para a aplicação)
+FECHAR_NAO_ENCONTRADO = 4404
+FECHAR_PROIBIDO = 4403
+FECHAR_CLIENTE_LENTO = 4008
+
+
+def serializar_mensagem(mensagem):
+    """Representação JSON de uma mensagem (evento do socket e respostas AJAX)"""
+    return {
+        'id': mensagem.id,
+        'conteudo': mensagem.conteudo,
+        'remetente': mensagem.remetente.username,
+        'remetente_id': mensagem.remetente_id,
+        'data_criacao': mensagem.data_criacao.strftime('%d/%m/%Y %H:%M'),
+        'hora': mensagem.data_criacao.strftime('%H:%M'),
+        'lida': mensagem.is_lida,
+        'data_leitura': mensagem.data_leitura.isoformat() if mensagem.data_leitura else None,
+    }
+
+
+# ----------------------------------------------
+# Canal de publicação
+# ----------------------------------------------
+
+class Inscricao:
+    """Uma conexão inscrita em uma conversa, com sua fila limitada"""
+
+    def __init__(self, conversa_id, tamanho):
+        self.conversa_id = conversa_id
+        self.loop = asyncio.get_running_loop()
+        self.fila = asyncio.Queue(maxsize=tamanho)
+        self.atrasada = False
+
+    def entregar(self, texto):
+        """Roda no loop da conexão; None na fila sinaliza o desligamento"""
+        if self.atrasada:
+            return
+        try:
+            self.fila.put_nowait(texto)
+        except asyncio.QueueFull:
+            self.atrasada = True
+            while not self.fila.empty():
+                self.fila.get_nowait()
+            self.fila.put_nowait(None)
+
+
+class CanalLocal:
+    """Pub/sub em memória: conversa_id -> conjunto de inscrições"""
+
+    def __init__(self):
+        self._inscritos = {}
+        self._lock = threading.Lock()
+
+    def inscrever(self, conversa_id):
+        """Chamado de dentro do loop da conexão"""
+        inscricao = Inscricao(conversa_id, getattr(settings, 'CHAT_FILA_MAXIMA', 100))
+        with self._lock:
+            self._inscritos.setdefault(conversa_id, set()).add(inscricao)
+        return inscricao
+
+    def cancelar(self, inscricao):
+        with self._lock:
+            inscritos = self._inscritos.get(inscricao.conversa_id)
+            if inscritos is not None:
+                inscritos.discard(inscricao)
+                if not inscritos:
+                    del self._inscritos[inscricao.conversa_id]
+
+    def publicar(self, conversa_id, evento):
+        """
+        Entrega o evento a todos os inscritos da conversa. Pode ser chamado de
+        qualquer thread (views síncronas, on_commit); o JSON é gerado uma vez.
+        """
+        with self._lock:
+            inscritos = list(self._inscritos.get(conversa_id, ()))
+        if not inscritos:
+            return 0
+        texto = json.dumps(evento)
+        for inscricao in inscritos:
+            try:
+                inscricao.loop.call_soon_threadsafe(inscricao.entregar, texto)
+            except RuntimeError:  # loop já encerrado
+                self.cancelar(inscricao)
+        return len(inscritos)
+
+    def total_inscritos(self, conversa_id=None):
+        with self._lock:
+            if conversa_id is not None:
+                return len(self._inscritos.get(conversa_id, ()))
+            return sum(len(inscritos) for inscritos in self._inscritos.values())
+
+
+_canal = None
+
+
+def obter_canal():
+    """Instância (única por processo) do canal configurado em CHAT_CANAL"""
+    global _canal
+    if _canal is None:
+        _canal = import_string(getattr(settings, 'CHAT_CANAL', 'chat.tempo_real.CanalLocal'))()
+    return _canal
+
+
+def publicar_mensagem(mensagem):
+    """Publica uma mensagem nova para quem está com a conversa aberta"""
+    obter_canal().publicar(mensagem.conversa_id, {
+        'tipo': 'mensagem',
+        'mensagem': serializar_mensagem(mensagem),
+    })
+
+
+# ----------------------------------------------
+# Aplicação ASGI (WebSocket)
+# ----------------------------------------------
+
+def _cabecalhos(scope):
+    return {nome.decode('latin-1').lower(): valor.decode('latin-1') for nome, valor in scope.get('headers', [])}
+
+
+def _mesma_origem(cabecalhos):
+    """Sem CSRF no handshake, exige que o Origin seja o próprio host"""
+    origem = cabecalhos.get('origin')
+    if not origem:
+        return True  # clientes que não são navegadores não enviam Origin
+    return origem.split('://', 1)[-1] == cabecalhos.get('host')
+
+
+@sync_to_async
+def _usuario_participante(cabecalhos, conversa_id):
+    """Id do usuário da sessão, se ele participa da conversa"""
+    from importlib import import_module
+
+    from django.contrib.auth import get_user
+
+    from .models import Conversa
+
+    cookies = SimpleCookie(cabecalhos.get('cookie', ''))
+    morsel = cookies.get(settings.SESSION_COOKIE_NAME)
+    if morsel is None:
+        return None
+
+    sessao = import_module(settings.SESSION_ENGINE).SessionStore(morsel.value)
+    usuario = get_user(SimpleNamespace(session=sessao))
+    if not usuario.is_authenticated:
+        return None
+    if not Conversa.objects.filter(id=conversa_id, participantes=usuario).exists():
+        return None
+    return usuario.id
+
+
+async def _repassar_eventos(inscricao, send):
+    while True:
+        texto = await inscricao.fila.get()
+        if texto is None:
+            await send({'type': 'websocket.close', 'code': FECHAR_CLIENTE_LENTO})
+            return
+        await send({'type': 'websocket.send', 'text': texto})
+
+
+async def _aguardar_desconexao(receive):
+    # O cliente não envia nada pelo socket (o envio é pelo POST); só esperamos o fim
+    while True:
+        evento = await receive()
+        if evento['type'] == 'websocket.disconnect':
+            return
+
+
+async def aplicacao_websocket(scope, receive, send):
+    """Aplicação ASGI para conexões WebSocket do chat"""
+    evento = await receive()
+    if evento['type'] != 'websocket.connect':
+        return
+
+    rota = ROTA.match(scope['path'])
+    if rota is None:
+        await send({'type': 'websocket.close', 'code': FECHAR_NAO_ENCONTRADO})
+        return
+
+    cabecalhos = _cabecalhos(scope)
+    conversa_id = int(rota.group('conversa_id'))
+    if not _mesma_origem(cabecalhos) or await _usuario_participante(cabecalhos, conversa_id) is None:
+        await send({'type': 'websocket.close', 'code': FECHAR_PROIBIDO})
+        return
+
+    canal = obter_canal()
+    inscricao = canal.inscrever(conversa_id)
+    try:
+        await send({'type': 'websocket.accept'})
+        tarefas = [
+            asyncio.ensure_future(_repassar_eventos(inscricao, send)),
+            asyncio.ensure_future(_aguardar_desconexao(receive)),
+        ]
+        concluidas, pendentes = await asyncio.wait(tarefas, return_when=asyncio.FIRST_COMPLETED)
+        for tarefa in pendentes:
+            tarefa.cancel()
+        for tarefa in concluidas:
+            tarefa.exception()  # conexão caída no meio de um send; nada a fazer
+    finally:
+        canal.cancelar(inscricao)
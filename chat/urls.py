@@ -6,6 +6,8 @@ app_name = 'chat'
 urlpatterns = [
     path('', views.lista_conversas, name='lista'),
     path('conversa/<int:conversa_id>/', views.detalhes_conversa, name='detalhes'),
+    path('conversa/<int:conversa_id>/mensagens/', views.historico_conversa, name='historico'),
+    path('conversa/<int:conversa_id>/lidas/', views.marcar_conversa_lida, name='marcar_lidas'),
     path('conversa/<int:conversa_id>/enviar/', views.enviar_mensagem, name='enviar'),
     path('iniciar/<int:user_id>/', views.iniciar_conversa, name='iniciar'),
 ]
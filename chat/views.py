@@ -1,16 +1,26 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import transaction
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 
-from .models import Conversa, Mensagem, Notificacao
+from feed.paginacao import CursorInvalido, pagina_por_cursor
+
+from .leitura import aplicar_leitura, marcar_lidas
+from .models import Conversa, EntradaCaixa, Mensagem, Notificacao
+from .tempo_real import serializar_mensagem
 
 
 @login_required
 def lista_conversas(request):
-    """Lista todas as conversas do usuário"""
-    conversas = Conversa.objects.filter(participantes=request.user).order_by('-data_atualizacao')
+    """Lista as conversas do usuário a partir da caixa de entrada desnormalizada"""
+    entradas = EntradaCaixa.objects.filter(
+        usuario=request.user
+    ).select_related('outro_participante').order_by('-data_atualizacao')
+    conversas = Paginator(entradas, getattr(settings, 'CHAT_CONVERSAS_POR_PAGINA', 30)).get_page(request.GET.get('page'))
     
     context = {
         'conversas': conversas,
@@ -23,19 +33,68 @@ def lista_conversas(request):
 def detalhes_conversa(request, conversa_id):
     """Detalhes de uma conversa específica"""
     conversa = get_object_or_404(Conversa, id=conversa_id, participantes=request.user)
-    mensagens = conversa.mensagens.filter(is_ativo=True).order_by('data_criacao')
+    mensagens, cursor_anteriores = _pagina_mensagens(conversa)
+    aplicar_leitura(mensagens, conversa, request.user)
     
-    # Marcar mensagens como lidas
-    mensagens.filter(remetente__ne=request.user).update(is_lida=True)
+    # Marcar mensagens como lidas: só o cursor do usuário avança
+    if mensagens:
+        marcar_lidas(conversa, request.user, mensagens[-1].id)
     
     context = {
         'conversa': conversa,
         'mensagens': mensagens,
+        'cursor_anteriores': cursor_anteriores,
     }
     
     return render(request, 'chat/detalhes.html', context)
 
 
+@login_required
+def historico_conversa(request, conversa_id):
+    """Mensagens anteriores ao cursor ("carregar anteriores") - retorna JSON"""
+    conversa = get_object_or_404(Conversa, id=conversa_id, participantes=request.user)
+    try:
+        mensagens, cursor_anteriores = _pagina_mensagens(conversa, request.GET.get('cursor'))
+    except CursorInvalido:
+        return JsonResponse({'success': False, 'error': 'Cursor inválido'}, status=400)
+    aplicar_leitura(mensagens, conversa, request.user)
+    
+    return JsonResponse({
+        'success': True,
+        'mensagens': [serializar_mensagem(mensagem) for mensagem in mensagens],
+        'cursor_anteriores': cursor_anteriores,
+    })
+
+
+@login_required
+@require_http_methods(["POST"])
+def marcar_conversa_lida(request, conversa_id):
+    """Avança o cursor de leitura (mensagens recebidas com a conversa aberta)"""
+    conversa = get_object_or_404(Conversa, id=conversa_id, participantes=request.user)
+    try:
+        ate_id = int(request.POST['ate']) if request.POST.get('ate') else None
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Mensagem inválida'}, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'atualizado': marcar_lidas(conversa, request.user, ate_id),
+    })
+
+
+def _pagina_mensagens(conversa, cursor=None):
+    """
+    Janela de mensagens mais recentes antes do cursor, em ordem cronológica.
+    A consulta anda de trás para frente pelo índice (conversa, is_ativo,
+    data_criacao, id), então o custo não depende do tamanho da conversa.
+    """
+    mensagens = conversa.mensagens.filter(is_ativo=True).select_related('remetente')
+    por_pagina = getattr(settings, 'CHAT_MENSAGENS_POR_PAGINA', 30)
+    mensagens, cursor_anteriores = pagina_por_cursor(mensagens, cursor, por_pagina)
+    mensagens.reverse()
+    return mensagens, cursor_anteriores
+
+
 @login_required
 @require_http_methods(["POST"])
 def enviar_mensagem(request, conversa_id):
@@ -50,23 +109,20 @@ def enviar_mensagem(request, conversa_id):
                 'error': 'Mensagem não pode estar vazia'
             })
         
-        mensagem = Mensagem.objects.create(
-            conversa=conversa,
-            remetente=request.user,
-            conteudo=conteudo
-        )
-        
-        # Atualizar data de atualização da conversa
-        conversa.save()
+        # Mensagem, caixas de entrada (sinal) e data da conversa numa só transação
+        with transaction.atomic():
+            mensagem = Mensagem.objects.create(
+                conversa=conversa,
+                remetente=request.user,
+                conteudo=conteudo
+            )
+            
+            # Atualizar data de atualização da conversa
+            conversa.save(update_fields=['data_atualizacao'])
         
         return JsonResponse({
             'success': True,
-            'mensagem': {
-                'id': mensagem.id,
-                'conteudo': mensagem.conteudo,
-                'remetente': mensagem.remetente.username,
-                'data_criacao': mensagem.data_criacao.strftime('%d/%m/%Y %H:%M')
-            }
+            'mensagem': serializar_mensagem(mensagem)
         })
     
     except Exception as e:
@@ -82,19 +138,11 @@ def iniciar_conversa(request, user_id):
     from usuarios.models import Usuario
     
     destinatario = get_object_or_404(Usuario, id=user_id)
+    if destinatario == request.user:
+        messages.error(request, 'Você não pode iniciar uma conversa consigo mesmo.')
+        return redirect('chat:lista')
     
-    # Verificar se já existe conversa
-    conversa_existente = Conversa.objects.filter(
-        participantes=request.user
-    ).filter(
-        participantes=destinatario
-    ).first()
-    
-    if conversa_existente:
-        return redirect('chat:detalhes', conversa_id=conversa_existente.id)
-    
-    # Criar nova conversa
-    conversa = Conversa.objects.create()
-    conversa.participantes.add(request.user, destinatario)
+    # Busca pela chave do par ou cria, sem duplicar em cliques simultâneos
+    conversa, _ = Conversa.obter_direta(request.user, destinatario)
     
     return redirect('chat:detalhes', conversa_id=conversa.id)
@@ -7,7 +7,7 @@ class PostagemAdmin(admin.ModelAdmin):
     list_display = ('autor', 'tipo', 'conteudo_preview', 'total_curtidas', 'total_comentarios', 'data_criacao', 'is_ativo')
     list_filter = ('tipo', 'is_ativo', 'data_criacao')
     search_fields = ('autor__username', 'conteudo', 'localizacao')
-    readonly_fields = ('data_criacao', 'data_atualizacao', 'visualizacoes')
+    readonly_fields = ('data_criacao', 'data_atualizacao', 'visualizacoes', 'total_curtidas', 'total_comentarios')
     
     def conteudo_preview(self, obj):
         return obj.conteudo[:50] + '...' if len(obj.conteudo) > 50 else obj.conteudo
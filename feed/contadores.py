@@ -0,0 +1,55 @@
+"""
+Contadores desnormalizados de curtidas e comentários da Postagem.
+
+Os sinais de Curtida/Comentario chamam `ajustar` com um UPDATE atômico
+(F() + delta), sem ler a linha antes. Operações que não disparam sinais
+(bulk_create, update, SQL direto) deixam os contadores defasados; o
+comando `reconciliar_contadores` recalcula tudo a partir das tabelas.
+"""
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Postagem, Curtida, Comentario
+
+
+def ajustar(postagem_id, campo, delta):
+    """Soma delta ao contador `campo` da postagem, sem ficar negativo"""
+    Postagem.objects.filter(pk=postagem_id).update(
+        **{campo: Greatest(F(campo) + delta, Value(0))}
+    )
+
+
+def total_por_postagem(modelo):
+    """Subquery com a contagem de linhas de `modelo` por postagem"""
+    contagem = (
+        modelo.objects.filter(postagem=OuterRef('pk'))
+        .order_by()
+        .values('postagem')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(contagem), Value(0))
+
+
+def reconciliar(postagens=None):
+    """
+    Recalcula os contadores a partir de Curtida e Comentario.
+    Retorna quantas postagens estavam divergentes.
+    """
+    postagens = Postagem.objects.all() if postagens is None else postagens
+    divergentes = postagens.annotate(
+        curtidas_reais=total_por_postagem(Curtida),
+        comentarios_reais=total_por_postagem(Comentario),
+    ).exclude(
+        total_curtidas=F('curtidas_reais'),
+        total_comentarios=F('comentarios_reais'),
+    ).values_list('pk', 'curtidas_reais', 'comentarios_reais')
+    
+    corrigidas = [
+        Postagem(pk=pk, total_curtidas=curtidas, total_comentarios=comentarios)
+        for pk, curtidas, comentarios in divergentes.iterator()
+    ]
+    Postagem.objects.bulk_update(
+        corrigidas, ['total_curtidas', 'total_comentarios'], batch_size=500
+    )
+    return len(corrigidas)
@@ -0,0 +1,149 @@
+"""
+Curtir e descurtir postagens de forma idempotente.
+
+Cada operação é um INSERT condicional (ON CONFLICT DO NOTHING) ou um
+DELETE, e o contador desnormalizado só muda se a linha mudou. Não há
+get_or_create nem recontagem, então toques duplos concorrentes não
+esbarram no unique_together. Por banco:
+
+- PostgreSQL: INSERT/DELETE e UPDATE do contador num só comando (CTE),
+  que já devolve o novo total;
+- SQLite: INSERT ... ON CONFLICT / DELETE e ajuste do contador na mesma
+  transação;
+- outros: ORM com savepoint.
+
+As operações aqui usam SQL direto e por isso não disparam os sinais de
+Curtida (que ajustariam o contador uma segunda vez).
+"""
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from . import contadores
+from .models import Curtida, Postagem
+
+
+# Máximo de operações aceitas por chamada do endpoint em lote
+MAXIMO_LOTE = 50
+
+
+def _tabelas():
+    return Curtida._meta.db_table, Postagem._meta.db_table
+
+
+def _agora():
+    campo = Curtida._meta.get_field('data_criacao')
+    return campo.get_db_prep_value(timezone.now(), connection)
+
+
+def _sql_inserir():
+    curtida, postagem = _tabelas()
+    return (
+        f"INSERT INTO {curtida} (usuario_id, postagem_id, data_criacao) "
+        f"SELECT %s, %s, %s WHERE EXISTS (SELECT 1 FROM {postagem} WHERE id = %s AND is_ativo) "
+        "ON CONFLICT (usuario_id, postagem_id) DO NOTHING"
+    )
+
+
+def _sql_remover():
+    curtida, _ = _tabelas()
+    return f"DELETE FROM {curtida} WHERE usuario_id = %s AND postagem_id = %s"
+
+
+def _aplicar_postgresql(usuario_id, postagem_id, curtir):
+    _, postagem = _tabelas()
+    if curtir:
+        mudanca = _sql_inserir() + " RETURNING 1"
+        params = [usuario_id, postagem_id, _agora(), postagem_id]
+        novo_total = "total_curtidas + (SELECT count(*) FROM mudanca)"
+    else:
+        mudanca = _sql_remover() + " RETURNING 1"
+        params = [usuario_id, postagem_id]
+        novo_total = "GREATEST(total_curtidas - (SELECT count(*) FROM mudanca), 0)"
+    with connection.cursor() as cursor:
+        # Ao curtir, postagem inativa não devolve linha (None), como no ORM
+        cursor.execute(
+            f"WITH mudanca AS ({mudanca}) "
+            f"UPDATE {postagem} SET total_curtidas = {novo_total} "
+            f"WHERE id = %s{' AND is_ativo' if curtir else ''} "
+            "RETURNING total_curtidas, (SELECT count(*) FROM mudanca)",
+            params + [postagem_id],
+        )
+        linha = cursor.fetchone()
+    if linha is None:
+        return None
+    return bool(linha[1]), linha[0]
+
+
+def _aplicar_sqlite(usuario_id, postagem_id, curtir):
+    with transaction.atomic(), connection.cursor() as cursor:
+        if curtir:
+            cursor.execute(_sql_inserir(), [usuario_id, postagem_id, _agora(), postagem_id])
+        else:
+            cursor.execute(_sql_remover(), [usuario_id, postagem_id])
+        mudou = cursor.rowcount > 0
+        if mudou:
+            contadores.ajustar(postagem_id, 'total_curtidas', 1 if curtir else -1)
+        postagens = Postagem.objects.filter(pk=postagem_id)
+        if curtir:
+            postagens = postagens.filter(is_ativo=True)
+        total = postagens.values_list('total_curtidas', flat=True).first()
+    if total is None:
+        return None
+    return mudou, total
+
+
+def _aplicar_orm(usuario_id, postagem_id, curtir):
+    # Aqui os sinais de Curtida mantêm o contador
+    with transaction.atomic():
+        if curtir:
+            if not Postagem.objects.filter(pk=postagem_id, is_ativo=True).exists():
+                return None
+            try:
+                with transaction.atomic():
+                    Curtida.objects.create(usuario_id=usuario_id, postagem_id=postagem_id)
+                mudou = True
+            except IntegrityError:
+                mudou = False
+        else:
+            mudou = Curtida.objects.filter(usuario_id=usuario_id, postagem_id=postagem_id).delete()[0] > 0
+        total = Postagem.objects.filter(pk=postagem_id).values_list('total_curtidas', flat=True).first()
+    if total is None:
+        return None
+    return mudou, total
+
+
+def aplicar(usuario_id, postagem_id, curtir):
+    """
+    Deixa a curtida do usuário no estado pedido (curtir=True/False).
+    Retorna (mudou, total_curtidas), ou None se a postagem não existe
+    (ou está inativa, ao curtir).
+    """
+    if connection.vendor == 'postgresql':
+        return _aplicar_postgresql(usuario_id, postagem_id, curtir)
+    if connection.vendor == 'sqlite':
+        return _aplicar_sqlite(usuario_id, postagem_id, curtir)
+    return _aplicar_orm(usuario_id, postagem_id, curtir)
+
+
+def curtir(usuario_id, postagem_id):
+    return aplicar(usuario_id, postagem_id, True)
+
+
+def descurtir(usuario_id, postagem_id):
+    return aplicar(usuario_id, postagem_id, False)
+
+
+def alternar(usuario_id, postagem_id):
+    """
+    Compatibilidade com o botão antigo (toggle): descurte se havia
+    curtida, senão curte. Retorna (curtida, total_curtidas) ou None.
+    """
+    resultado = descurtir(usuario_id, postagem_id)
+    if resultado is None:
+        return None
+    if resultado[0]:
+        return False, resultado[1]
+    resultado = curtir(usuario_id, postagem_id)
+    if resultado is None:
+        return None
+    return True, resultado[1]
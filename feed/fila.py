@@ -0,0 +1,147 @@
+"""
+Fila pré-calculada de candidatos do explorar (deck por usuário).
+
+A fila guarda os IDs ranqueados e é construída fora da requisição, só
+pelo comando `atualizar_filas` (em modo worker com `--continuo`). O
+primeiro acesso de quem ainda não tem fila, ou cuja fila está vazia, marca
+a fila como desatualizada e a página sai vazia até o worker construí-la.
+Cada entrada guarda também as tags em comum com o usuário, que alimentam
+a faixa de "similares" do explorar sem nova consulta de compatibilidade.
+Criar um Relacionamento tira o candidato da fila; mudar preferências ou
+localização marca a fila como desatualizada para a próxima atualização,
+que aplica só a diferença (remove quem saiu, atualiza pontuações e insere
+os novos).
+"""
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.utils import timezone
+
+from usuarios.indice_tags import indice_tags
+
+from .models import CandidatoFila, EstadoFila
+from .pontuacao import ranquear_candidatos
+
+
+# Campos do usuário que, ao mudar, invalidam a fila dele
+CAMPOS_PREFERENCIA = (
+    'idade_minima', 'idade_maxima', 'genero_interesse', 'distancia_maxima',
+    'cidade_ref_id', 'latitude', 'longitude',
+)
+
+
+def tamanho_fila():
+    return getattr(settings, 'FILA_CANDIDATOS_TAMANHO', 500)
+
+
+def minimo_fila():
+    return getattr(settings, 'FILA_CANDIDATOS_MINIMO', 50)
+
+
+def atualizar_fila(usuario):
+    """
+    Recalcula a fila do usuário aplicando só as diferenças.
+    Retorna (inseridos, atualizados, removidos).
+    """
+    ranking = ranquear_candidatos(usuario)[:tamanho_fila()]
+    tags = indice_tags.contar_em_comum(usuario.id, [pk for pk, _, _ in ranking])
+    novos = {pk: (pontuacao, distancia, tags.get(pk, 0)) for pk, pontuacao, distancia in ranking}
+
+    with transaction.atomic():
+        atuais = {
+            entrada.candidato_id: entrada
+            for entrada in CandidatoFila.objects.select_for_update().filter(usuario=usuario)
+        }
+
+        removidos = [pk for pk in atuais if pk not in novos]
+        if removidos:
+            CandidatoFila.objects.filter(usuario=usuario, candidato_id__in=removidos).delete()
+
+        alterados = []
+        for pk, entrada in atuais.items():
+            if pk in novos and (entrada.pontuacao, entrada.distancia, entrada.tags_em_comum) != novos[pk]:
+                entrada.pontuacao, entrada.distancia, entrada.tags_em_comum = novos[pk]
+                alterados.append(entrada)
+        CandidatoFila.objects.bulk_update(alterados, ['pontuacao', 'distancia', 'tags_em_comum'], batch_size=500)
+
+        inseridos = [
+            CandidatoFila(
+                usuario=usuario, candidato_id=pk,
+                pontuacao=pontuacao, distancia=distancia, tags_em_comum=em_comum,
+            )
+            for pk, (pontuacao, distancia, em_comum) in novos.items() if pk not in atuais
+        ]
+        CandidatoFila.objects.bulk_create(inseridos, batch_size=500, ignore_conflicts=True)
+
+        EstadoFila.objects.update_or_create(
+            usuario=usuario,
+            defaults={'desatualizada': False, 'data_construcao': timezone.now()}
+        )
+
+    return len(inseridos), len(alterados), len(removidos)
+
+
+def marcar_desatualizada(usuario_id):
+    """
+    Marca a fila do usuário para ser atualizada em segundo plano.
+    Quem ainda não tem fila não precisa: ela é criada no primeiro acesso.
+    """
+    EstadoFila.objects.filter(usuario_id=usuario_id).update(desatualizada=True)
+
+
+def remover_da_fila(usuario_id, candidato_id):
+    """Tira um candidato da fila (ex.: depois de um like/dislike)"""
+    CandidatoFila.objects.filter(usuario_id=usuario_id, candidato_id=candidato_id).delete()
+
+
+def pagina_fila(usuario, numero_pagina, por_pagina=20):
+    """
+    Lê uma página da fila do usuário, sempre em O(página): a fila (mesmo
+    desatualizada) é servida como está e nunca é ranqueada na requisição.
+    Fila vazia é marcada como desatualizada e a página sai com
+    `em_construcao=True` até o worker (`atualizar_filas`) reconstruí-la.
+    """
+    entradas = CandidatoFila.objects.filter(
+        usuario=usuario, candidato__is_active=True
+    ).select_related('candidato').order_by('-pontuacao', 'candidato_id')
+    pagina = Paginator(entradas, por_pagina).get_page(numero_pagina)
+    pagina.em_construcao = False
+
+    if not pagina.paginator.count:
+        # Sem fila ou fila esgotada: novos candidatos podem ter surgido desde a construção
+        _, criado = EstadoFila.objects.get_or_create(usuario=usuario)
+        if not criado:
+            marcar_desatualizada(usuario.id)
+        pagina.em_construcao = True
+    elif pagina.paginator.count < minimo_fila():
+        # Fila acabando: reabastecer na próxima rodada em segundo plano
+        marcar_desatualizada(usuario.id)
+
+    usuarios = []
+    for entrada in pagina.object_list:
+        candidato = entrada.candidato
+        candidato.pontuacao = entrada.pontuacao
+        candidato.distancia = entrada.distancia
+        usuarios.append(candidato)
+
+    pagina.object_list = usuarios
+    return pagina
+
+
+def similares_da_fila(usuario, limite=10):
+    """
+    Candidatos da fila com mais tags em comum (interesses, objetivos e
+    fetiches). Já são compatíveis e estão no raio; cada um recebe
+    `.tags_em_comum` e `.distancia`.
+    """
+    entradas = CandidatoFila.objects.filter(
+        usuario=usuario, tags_em_comum__gt=0, candidato__is_active=True
+    ).select_related('candidato').order_by('-tags_em_comum', 'candidato_id')[:limite]
+
+    similares = []
+    for entrada in entradas:
+        candidato = entrada.candidato
+        candidato.tags_em_comum = entrada.tags_em_comum
+        candidato.distancia = entrada.distancia
+        similares.append(candidato)
+    return similares
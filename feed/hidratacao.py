@@ -0,0 +1,60 @@
+"""
+Hidratação das páginas do feed.
+
+Busca só o que o template precisa para as postagens de uma página, em
+consultas de tamanho fixo: contagens vêm das colunas desnormalizadas da
+Postagem, "eu curti?" é um único conjunto de IDs para a página e os
+últimos comentários de cada postagem saem de uma consulta com janela
+(ROW_NUMBER por postagem), sem carregar curtidores nem comentários antigos.
+"""
+from collections import defaultdict
+
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .models import Comentario, Curtida
+
+
+COMENTARIOS_POR_POSTAGEM = 3
+
+
+def curtidas_do_usuario(usuario, ids):
+    """IDs, entre `ids`, das postagens que o usuário curtiu"""
+    return set(Curtida.objects.filter(
+        usuario=usuario, postagem_id__in=ids
+    ).values_list('postagem_id', flat=True))
+
+
+def comentarios_recentes(ids, limite=COMENTARIOS_POR_POSTAGEM):
+    """Últimos `limite` comentários ativos de cada postagem, do mais antigo ao mais novo"""
+    comentarios = Comentario.objects.filter(
+        postagem_id__in=ids, is_ativo=True
+    ).annotate(
+        ordem=Window(
+            RowNumber(),
+            partition_by=F('postagem_id'),
+            order_by=[F('data_criacao').desc(), F('id').desc()],
+        )
+    ).filter(ordem__lte=limite).select_related('usuario').order_by('postagem_id', 'data_criacao', 'id')
+    
+    por_postagem = defaultdict(list)
+    for comentario in comentarios:
+        por_postagem[comentario.postagem_id].append(comentario)
+    return por_postagem
+
+
+def hidratar_postagens(postagens, usuario, limite_comentarios=COMENTARIOS_POR_POSTAGEM):
+    """
+    Preenche `curtida_pelo_usuario` e `comentarios_recentes` em cada
+    postagem da página (duas consultas, qualquer que seja o tamanho dela).
+    """
+    ids = [postagem.id for postagem in postagens]
+    if not ids:
+        return postagens
+    
+    curtidas = curtidas_do_usuario(usuario, ids)
+    comentarios = comentarios_recentes(ids, limite_comentarios) if limite_comentarios else {}
+    for postagem in postagens:
+        postagem.curtida_pelo_usuario = postagem.id in curtidas
+        postagem.comentarios_recentes = comentarios.get(postagem.id, [])
+    return postagens
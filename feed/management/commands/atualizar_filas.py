@@ -0,0 +1,79 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from feed.fila import atualizar_fila
+from feed.models import EstadoFila
+
+Usuario = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Atualiza as filas de candidatos do explorar (apenas as desatualizadas, por padrão)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--todas',
+            action='store_true',
+            help='Atualizar as filas de todos os usuários que já têm fila'
+        )
+        parser.add_argument(
+            '--usuario',
+            type=str,
+            help='Atualizar apenas a fila deste username',
+            default=''
+        )
+        parser.add_argument(
+            '--limite',
+            type=int,
+            help='Número máximo de filas processadas nesta execução',
+            default=None
+        )
+        parser.add_argument(
+            '--continuo',
+            action='store_true',
+            help='Continuar rodando e atualizar as filas desatualizadas periodicamente (modo worker)'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            help='Segundos de espera quando não há filas desatualizadas (modo contínuo)',
+            default=2.0
+        )
+
+    def handle(self, *args, **options):
+        processadas = 0
+        while True:
+            processadas_rodada = self.atualizar(options)
+            processadas += processadas_rodada
+            if not options['continuo']:
+                break
+            if not processadas_rodada:
+                time.sleep(options['intervalo'])
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Atualização concluída! {processadas} filas processadas.')
+        )
+
+    def atualizar(self, options):
+        if options['usuario']:
+            usuarios = Usuario.objects.filter(username=options['usuario'])
+        else:
+            estados = EstadoFila.objects.all()
+            if not options['todas']:
+                estados = estados.filter(desatualizada=True)
+            usuarios = Usuario.objects.filter(
+                id__in=estados.values('usuario_id'), is_active=True
+            ).order_by('id')
+        
+        if options['limite']:
+            usuarios = usuarios[:options['limite']]
+        
+        processadas = 0
+        for usuario in usuarios.iterator():
+            inseridos, atualizados, removidos = atualizar_fila(usuario)
+            processadas += 1
+            self.stdout.write(
+                f'  ✓ {usuario.username}: +{inseridos} ~{atualizados} -{removidos}'
+            )
+        return processadas
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from feed.models import Postagem
+from feed.timeline import aparar_timelines, distribuir_postagem
+
+
+class Command(BaseCommand):
+    help = 'Corta as timelines personalizadas no tamanho máximo (e opcionalmente redistribui postagens)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--redistribuir',
+            type=int,
+            help='Redistribuir as N postagens ativas mais recentes antes de cortar',
+            default=0
+        )
+
+    def handle(self, *args, **options):
+        if options['redistribuir']:
+            self.stdout.write('Redistribuindo postagens...')
+            postagens = Postagem.objects.filter(is_ativo=True).order_by(
+                '-data_criacao', '-id'
+            )[:options['redistribuir']]
+            entregas = 0
+            for postagem in postagens.iterator():
+                entregas += distribuir_postagem(postagem)
+            self.stdout.write(f'  ✓ {entregas} entregas em timelines')
+        
+        cortadas = aparar_timelines()
+        self.stdout.write(
+            self.style.SUCCESS(f'Timelines atualizadas! {cortadas} timelines cortadas.')
+        )
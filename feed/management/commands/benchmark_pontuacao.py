@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from feed.pontuacao import obter_pontuador
+import time
+
+Usuario = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Mede a latência do pontuador de compatibilidade (ms por 1.000 candidatos)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--usuario',
+            type=str,
+            help='Username do usuário de referência (padrão: o primeiro ativo)',
+            default=''
+        )
+        parser.add_argument(
+            '--candidatos',
+            type=int,
+            help='Quantidade de candidatos pontuados por rodada',
+            default=5000
+        )
+        parser.add_argument(
+            '--repeticoes',
+            type=int,
+            help='Número de rodadas (vale o melhor tempo)',
+            default=3
+        )
+
+    def handle(self, *args, **options):
+        if options['usuario']:
+            usuario = Usuario.objects.filter(username=options['usuario']).first()
+        else:
+            usuario = Usuario.objects.filter(is_active=True).order_by('id').first()
+        
+        if not usuario:
+            raise CommandError('Nenhum usuário encontrado para o benchmark.')
+        
+        ids = list(Usuario.objects.exclude(id=usuario.id).values_list('id', flat=True)[:options['candidatos']])
+        if not ids:
+            raise CommandError('Nenhum candidato encontrado. Rode populate_data antes.')
+        
+        melhor = None
+        for _ in range(options['repeticoes']):
+            inicio = time.perf_counter()
+            pontuador = obter_pontuador(usuario)
+            pontuador.pontuar(ids)
+            duracao = time.perf_counter() - inicio
+            melhor = duracao if melhor is None else min(melhor, duracao)
+        
+        self.stdout.write(f'Pontuador: {pontuador.__class__.__module__}.{pontuador.__class__.__name__}')
+        self.stdout.write(f'Usuário de referência: {usuario.username}')
+        self.stdout.write(f'Candidatos: {len(ids)}')
+        self.stdout.write(f'Tempo total: {melhor * 1000:.2f} ms')
+        self.stdout.write(
+            self.style.SUCCESS(f'Latência: {melhor * 1000 / len(ids) * 1000:.2f} ms por 1.000 candidatos')
+        )
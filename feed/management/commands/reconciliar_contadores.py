@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from feed.contadores import reconciliar
+from feed.models import Postagem
+
+
+class Command(BaseCommand):
+    help = 'Recalcula os contadores de curtidas e comentários das postagens'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--autor',
+            type=str,
+            help='Reconciliar apenas as postagens deste username',
+            default=''
+        )
+
+    def handle(self, *args, **options):
+        postagens = Postagem.objects.all()
+        if options['autor']:
+            postagens = postagens.filter(autor__username=options['autor'])
+        
+        self.stdout.write('Conferindo contadores...')
+        corrigidas = reconciliar(postagens)
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Reconciliação concluída! {corrigidas} postagens corrigidas.')
+        )
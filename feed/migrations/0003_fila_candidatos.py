@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-17 16:18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('feed', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadoFila',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('desatualizada', models.BooleanField(default=True, verbose_name='Desatualizada')),
+                ('data_construcao', models.DateTimeField(blank=True, null=True, verbose_name='Data de Construção')),
+                ('usuario', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='estado_fila', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Estado da Fila',
+                'verbose_name_plural': 'Estados das Filas',
+                'indexes': [models.Index(fields=['desatualizada'], name='fila_desatualizada_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CandidatoFila',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pontuacao', models.FloatField(verbose_name='Pontuação')),
+                ('distancia', models.FloatField(blank=True, null=True, verbose_name='Distância (km)')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+                ('candidato', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Candidato')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fila_candidatos', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Candidato na Fila',
+                'verbose_name_plural': 'Candidatos na Fila',
+                'indexes': [models.Index(fields=['usuario', '-pontuacao'], name='fila_usuario_pontuacao_idx')],
+                'unique_together': {('usuario', 'candidato')},
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-17 16:40
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def preencher_contadores(apps, schema_editor):
+    Postagem = apps.get_model('feed', 'Postagem')
+    Curtida = apps.get_model('feed', 'Curtida')
+    Comentario = apps.get_model('feed', 'Comentario')
+    
+    def total(modelo):
+        contagem = (
+            modelo.objects.filter(postagem=OuterRef('pk'))
+            .order_by().values('postagem').annotate(total=Count('pk')).values('total')
+        )
+        return Coalesce(Subquery(contagem), Value(0))
+    
+    Postagem.objects.update(
+        total_curtidas=total(Curtida),
+        total_comentarios=total(Comentario),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0003_fila_candidatos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postagem',
+            name='total_comentarios',
+            field=models.PositiveIntegerField(default=0, verbose_name='Total de Comentários'),
+        ),
+        migrations.AddField(
+            model_name='postagem',
+            name='total_curtidas',
+            field=models.PositiveIntegerField(default=0, verbose_name='Total de Curtidas'),
+        ),
+        migrations.RunPython(preencher_contadores, migrations.RunPython.noop),
+    ]
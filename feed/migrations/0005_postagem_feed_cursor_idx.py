@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 16:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0004_contadores_postagem'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='postagem',
+            index=models.Index(fields=['is_ativo', '-data_criacao', '-id'], name='postagem_feed_cursor_idx'),
+        ),
+    ]
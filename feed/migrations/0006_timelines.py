@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-17 17:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('feed', '0005_postagem_feed_cursor_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postagem',
+            name='distribuida',
+            field=models.BooleanField(default=True, verbose_name='Distribuída nas Timelines'),
+        ),
+        migrations.CreateModel(
+            name='EntradaTimeline',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data_criacao', models.DateTimeField(verbose_name='Data da Postagem')),
+                ('postagem', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='feed.postagem', verbose_name='Postagem')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Entrada na Timeline',
+                'verbose_name_plural': 'Entradas nas Timelines',
+                'indexes': [models.Index(fields=['usuario', '-data_criacao', '-postagem'], name='timeline_usuario_data_idx')],
+                'unique_together': {('usuario', 'postagem')},
+            },
+        ),
+    ]
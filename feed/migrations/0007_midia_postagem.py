@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0006_timelines'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postagem',
+            name='status_midia',
+            field=models.CharField(choices=[('pronta', 'Pronta'), ('processando', 'Processando'), ('erro', 'Erro')], default='pronta', max_length=20, verbose_name='Status da Mídia'),
+        ),
+        migrations.AddField(
+            model_name='postagem',
+            name='video_poster',
+            field=models.ImageField(blank=True, null=True, upload_to='postagens/posters/', verbose_name='Capa do Vídeo'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:15
+
+import django.core.validators
+from django.db import migrations, models
+import midia.armazenamento
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0007_midia_postagem'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='postagem',
+            name='imagem',
+            field=models.ImageField(blank=True, null=True, storage=midia.armazenamento.obter_armazenamento, upload_to='postagens/imagens/', verbose_name='Imagem'),
+        ),
+        migrations.AlterField(
+            model_name='postagem',
+            name='video',
+            field=models.FileField(blank=True, null=True, storage=midia.armazenamento.obter_armazenamento, upload_to='postagens/videos/', validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['mp4', 'avi', 'mov', 'wmv'])], verbose_name='Vídeo'),
+        ),
+        migrations.AlterField(
+            model_name='postagem',
+            name='video_poster',
+            field=models.ImageField(blank=True, null=True, storage=midia.armazenamento.obter_armazenamento, upload_to='postagens/posters/', verbose_name='Capa do Vídeo'),
+        ),
+    ]
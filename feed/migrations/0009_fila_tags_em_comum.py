@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:40
+
+from django.db import migrations, models
+
+
+def marcar_filas_desatualizadas(apps, schema_editor):
+    # As filas existentes ganham as tags em comum na próxima atualização
+    apps.get_model('feed', 'EstadoFila').objects.update(desatualizada=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0008_armazenamento_conteudo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidatofila',
+            name='tags_em_comum',
+            field=models.PositiveIntegerField(default=0, verbose_name='Tags em Comum'),
+        ),
+        migrations.AddIndex(
+            model_name='candidatofila',
+            index=models.Index(fields=['usuario', '-tags_em_comum'], name='fila_usuario_tags_idx'),
+        ),
+        migrations.RunPython(marcar_filas_desatualizadas, migrations.RunPython.noop),
+    ]
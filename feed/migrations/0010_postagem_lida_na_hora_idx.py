@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0009_fila_tags_em_comum'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='postagem',
+            index=models.Index(condition=models.Q(('distribuida', False), ('is_ativo', True)), fields=['-data_criacao', '-id'], name='postagem_lida_na_hora_idx'),
+        ),
+    ]
@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.validators import FileExtensionValidator
 
+from midia.armazenamento import obter_armazenamento
+
 Usuario = get_user_model()
 
 
@@ -15,17 +17,31 @@ class Postagem(models.Model):
         ('localizacao', 'Localização'),
     ]
     
+    STATUS_MIDIA_CHOICES = [
+        ('pronta', 'Pronta'),
+        ('processando', 'Processando'),
+        ('erro', 'Erro'),
+    ]
+    
     autor = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='postagens', verbose_name="Autor")
     conteudo = models.TextField(verbose_name="Conteúdo")
     tipo = models.CharField(max_length=20, choices=TIPO_CHOICES, default='texto', verbose_name="Tipo")
-    imagem = models.ImageField(upload_to='postagens/imagens/', null=True, blank=True, verbose_name="Imagem")
+    imagem = models.ImageField(upload_to='postagens/imagens/', storage=obter_armazenamento, null=True, blank=True, verbose_name="Imagem")
     video = models.FileField(
         upload_to='postagens/videos/', 
+        storage=obter_armazenamento,
         null=True, 
         blank=True,
         validators=[FileExtensionValidator(allowed_extensions=['mp4', 'avi', 'mov', 'wmv'])],
         verbose_name="Vídeo"
     )
+    video_poster = models.ImageField(upload_to='postagens/posters/', storage=obter_armazenamento, null=True, blank=True, verbose_name="Capa do Vídeo")
+    status_midia = models.CharField(
+        max_length=20,
+        choices=STATUS_MIDIA_CHOICES,
+        default='pronta',
+        verbose_name="Status da Mídia"
+    )
     localizacao = models.CharField(max_length=200, blank=True, verbose_name="Localização")
     latitude = models.FloatField(null=True, blank=True, verbose_name="Latitude")
     longitude = models.FloatField(null=True, blank=True, verbose_name="Longitude")
@@ -39,21 +55,30 @@ class Postagem(models.Model):
     curtidas = models.ManyToManyField(Usuario, through='Curtida', related_name='postagens_curtidas', blank=True)
     visualizacoes = models.PositiveIntegerField(default=0, verbose_name="Visualizações")
     
+    # Contadores desnormalizados (mantidos por feed.contadores)
+    total_curtidas = models.PositiveIntegerField(default=0, verbose_name="Total de Curtidas")
+    total_comentarios = models.PositiveIntegerField(default=0, verbose_name="Total de Comentários")
+    
+    # False quando o autor tem seguidores demais e a postagem é lida na hora (ver feed.timeline)
+    distribuida = models.BooleanField(default=True, verbose_name="Distribuída nas Timelines")
+    
     class Meta:
         verbose_name = "Postagem"
         verbose_name_plural = "Postagens"
         ordering = ['-data_criacao']
+        indexes = [
+            # Paginação por cursor do feed (ver feed.paginacao)
+            models.Index(fields=['is_ativo', '-data_criacao', '-id'], name='postagem_feed_cursor_idx'),
+            # Postagens lidas na hora pela timeline (poucas, só de autores com muitos seguidores)
+            models.Index(
+                fields=['-data_criacao', '-id'],
+                condition=models.Q(is_ativo=True, distribuida=False),
+                name='postagem_lida_na_hora_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.autor.username} - {self.conteudo[:50]}..."
-    
-    @property
-    def total_curtidas(self):
-        return self.curtidas.count()
-    
-    @property
-    def total_comentarios(self):
-        return self.comentarios.count()
 
 
 class Curtida(models.Model):
@@ -115,3 +140,65 @@ class Relacionamento(models.Model):
     
     def __str__(self):
         return f"{self.remetente.username} {self.get_tipo_display()} {self.destinatario.username}"
+
+
+class CandidatoFila(models.Model):
+    """Fila pré-calculada de candidatos do explorar (deck por usuário)"""
+    
+    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='fila_candidatos', verbose_name="Usuário")
+    candidato = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='+', verbose_name="Candidato")
+    pontuacao = models.FloatField(verbose_name="Pontuação")
+    distancia = models.FloatField(null=True, blank=True, verbose_name="Distância (km)")
+    tags_em_comum = models.PositiveIntegerField(default=0, verbose_name="Tags em Comum")
+    data_criacao = models.DateTimeField(auto_now_add=True, verbose_name="Data de Criação")
+    
+    class Meta:
+        verbose_name = "Candidato na Fila"
+        verbose_name_plural = "Candidatos na Fila"
+        unique_together = ['usuario', 'candidato']
+        indexes = [
+            models.Index(fields=['usuario', '-pontuacao'], name='fila_usuario_pontuacao_idx'),
+            models.Index(fields=['usuario', '-tags_em_comum'], name='fila_usuario_tags_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.usuario_id} -> {self.candidato_id} ({self.pontuacao:.3f})"
+
+
+class EstadoFila(models.Model):
+    """Estado da fila de candidatos de um usuário"""
+    
+    usuario = models.OneToOneField(Usuario, on_delete=models.CASCADE, related_name='estado_fila', verbose_name="Usuário")
+    desatualizada = models.BooleanField(default=True, verbose_name="Desatualizada")
+    data_construcao = models.DateTimeField(null=True, blank=True, verbose_name="Data de Construção")
+    
+    class Meta:
+        verbose_name = "Estado da Fila"
+        verbose_name_plural = "Estados das Filas"
+        indexes = [
+            models.Index(fields=['desatualizada'], name='fila_desatualizada_idx'),
+        ]
+    
+    def __str__(self):
+        status = 'desatualizada' if self.desatualizada else 'em dia'
+        return f"Fila de {self.usuario_id} ({status})"
+
+
+class EntradaTimeline(models.Model):
+    """Postagem distribuída na timeline pré-calculada de um usuário"""
+    
+    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='timeline', verbose_name="Usuário")
+    postagem = models.ForeignKey(Postagem, on_delete=models.CASCADE, related_name='+', verbose_name="Postagem")
+    # Cópia de postagem.data_criacao, para paginar a timeline sem JOIN
+    data_criacao = models.DateTimeField(verbose_name="Data da Postagem")
+    
+    class Meta:
+        verbose_name = "Entrada na Timeline"
+        verbose_name_plural = "Entradas nas Timelines"
+        unique_together = ['usuario', 'postagem']
+        indexes = [
+            models.Index(fields=['usuario', '-data_criacao', '-postagem'], name='timeline_usuario_data_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.usuario_id} <- {self.postagem_id}"
@@ -0,0 +1,65 @@
+"""
+Paginação por cursor (keyset) da linha do tempo do feed.
+
+A ordem é (data_criacao, id) decrescente e o cursor guarda a chave da
+última postagem entregue. Cada página é um `WHERE (data, id) < cursor
+ORDER BY ... LIMIT n` sobre o índice (is_ativo, data_criacao, id): sem
+COUNT(*) e sem OFFSET, a página 100 custa o mesmo que a primeira.
+
+Serve a qualquer modelo com `data_criacao` e `id` indexados nessa ordem;
+o histórico de mensagens do chat usa as mesmas funções.
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+
+ORDEM = ('-data_criacao', '-id')
+
+
+class CursorInvalido(ValueError):
+    """Token de cursor malformado ou adulterado"""
+
+
+def codificar_cursor(postagem):
+    """Token opaco com a chave (data_criacao, id) da postagem"""
+    return codificar_chave(postagem.data_criacao, postagem.id)
+
+
+def codificar_chave(data_criacao, pk):
+    chave = f'{data_criacao.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(chave.encode()).decode().rstrip('=')
+
+
+def filtro_apos(data, pk, campo_id='id'):
+    """Q das linhas depois da chave (data, pk) na ordem decrescente"""
+    return Q(data_criacao__lt=data) | Q(data_criacao=data, **{campo_id + '__lt': pk})
+
+
+def decodificar_cursor(token):
+    """Inverso de `codificar_cursor`; levanta CursorInvalido"""
+    try:
+        preenchido = token + '=' * (-len(token) % 4)
+        data, pk = base64.urlsafe_b64decode(preenchido.encode()).decode().split('|')
+        return datetime.fromisoformat(data), int(pk)
+    except (ValueError, UnicodeDecodeError) as erro:
+        raise CursorInvalido(token) from erro
+
+
+def pagina_por_cursor(postagens, cursor=None, por_pagina=10):
+    """
+    Página de `postagens` depois do cursor (ou a primeira, sem cursor).
+    Retorna (lista, proximo_cursor); proximo_cursor é None no fim do feed.
+    """
+    postagens = postagens.order_by(*ORDEM)
+    if cursor:
+        data, pk = decodificar_cursor(cursor)
+        postagens = postagens.filter(filtro_apos(data, pk))
+    
+    # Um item a mais só para saber se existe próxima página
+    itens = list(postagens[:por_pagina + 1])
+    if len(itens) <= por_pagina:
+        return itens, None
+    itens = itens[:por_pagina]
+    return itens, codificar_cursor(itens[-1])
@@ -0,0 +1,234 @@
+"""
+Pontuação de compatibilidade e ranking de candidatos do explorar.
+
+O pontuador é plugável: a classe usada vem de `EXPLORAR_PONTUADOR` nas
+configurações e precisa expor `pontuar(candidatos, distancias)` que
+recebe IDs de usuários e devolve {id: pontuacao}. Os candidatos são
+pontuados em lotes, com poucas consultas por lote (sem propriedades
+calculadas objeto a objeto).
+"""
+import heapq
+from datetime import date
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from usuarios.indice_tags import indice_tags
+from usuarios.models import Usuario, PerfilInteresses
+
+from .models import Relacionamento
+
+
+class PontuadorCompatibilidade:
+    """Pontuador padrão: combina distância, idade, gênero, interesses, tags e atividade"""
+
+    PESOS = {
+        'distancia': 0.30,
+        'idade': 0.15,
+        'genero': 0.15,
+        'preferencias': 0.15,
+        'tags': 0.15,
+        'atividade': 0.10,
+    }
+
+    TAMANHO_LOTE = 1000
+
+    def __init__(self, usuario, pesos=None):
+        self.usuario = usuario
+        self.pesos = pesos or self.PESOS
+        self.hoje = date.today()
+        self.agora = timezone.now()
+        self.raio = usuario.distancia_maxima or 0
+        self.identidade = usuario.identidade_interesse
+
+        # Dados do usuário carregados uma única vez
+        self.flags = self._flags_usuario(usuario.id)
+        self.total_tags = len(indice_tags.tags_do_usuario(usuario.id))
+
+    def _flags_usuario(self, usuario_id):
+        mascara = PerfilInteresses.objects.filter(usuario_id=usuario_id).values_list(
+            'mascara_flags', flat=True
+        ).first()
+        return mascara or 0
+
+    def pontuar(self, candidatos, distancias=None):
+        """
+        Pontua os candidatos (IDs) em lotes.
+        `distancias` é um dict opcional {id: km} já calculado pela busca geográfica.
+        Retorna {id: pontuacao entre 0 e 1}.
+        """
+        distancias = distancias or {}
+        candidatos = list(candidatos)
+        pontuacoes = {}
+
+        for inicio in range(0, len(candidatos), self.TAMANHO_LOTE):
+            lote = candidatos[inicio:inicio + self.TAMANHO_LOTE]
+            pontuacoes.update(self._pontuar_lote(lote, distancias))
+
+        return pontuacoes
+
+    def _pontuar_lote(self, lote, distancias):
+        linhas = Usuario.objects.filter(id__in=lote).values_list(
+            'id', 'data_nascimento', 'genero_interesse', 'ultima_atividade',
+            'perfil_interesses__mascara_flags',
+        )
+        tags_em_comum = self._tags_em_comum(lote)
+
+        pontuacoes = {}
+        for candidato_id, nascimento, genero_interesse, ultima_atividade, flags in linhas:
+            componentes = {
+                'distancia': self._nota_distancia(distancias.get(candidato_id)),
+                'idade': self._nota_idade(nascimento),
+                'genero': self._nota_genero(genero_interesse),
+                'preferencias': self._nota_preferencias(flags or 0),
+                'tags': self._nota_tags(tags_em_comum.get(candidato_id, 0)),
+                'atividade': self._nota_atividade(ultima_atividade),
+            }
+            pontuacoes[candidato_id] = sum(
+                self.pesos.get(nome, 0) * nota for nome, nota in componentes.items()
+            )
+
+        return pontuacoes
+
+    def _tags_em_comum(self, lote):
+        """Conta tags em comum por candidato direto no índice invertido"""
+        if not self.total_tags:
+            return {}
+        return indice_tags.contar_em_comum(self.usuario.id, lote)
+
+    def _nota_distancia(self, distancia):
+        if distancia is None or not self.raio:
+            return 0.0
+        return max(0.0, 1 - distancia / self.raio)
+
+    def _nota_idade(self, nascimento):
+        if not nascimento:
+            return 0.0
+        idade = self.hoje.year - nascimento.year - (
+            (self.hoje.month, self.hoje.day) < (nascimento.month, nascimento.day)
+        )
+        minima, maxima = self.usuario.idade_minima, self.usuario.idade_maxima
+        if idade < minima or idade > maxima:
+            return 0.0
+        # Mais perto do centro da faixa desejada, maior a nota
+        centro = (minima + maxima) / 2
+        metade = max((maxima - minima) / 2, 1)
+        return 1 - 0.5 * abs(idade - centro) / metade
+
+    def _nota_genero(self, genero_interesse):
+        """Reciprocidade: o candidato também procura o perfil do usuário?"""
+        if not genero_interesse or genero_interesse == 'TODOS':
+            return 1.0
+        return 1.0 if genero_interesse == self.identidade else 0.0
+
+    def _nota_preferencias(self, flags):
+        """Interesses em comum / interesses de qualquer um dos dois (via bits)"""
+        uniao = self.flags | flags
+        if not uniao:
+            return 0.0
+        return PerfilInteresses.sobreposicao(self.flags, flags) / bin(uniao).count('1')
+
+    def _nota_tags(self, em_comum):
+        if not self.total_tags:
+            return 0.0
+        return min(1.0, em_comum / min(self.total_tags, 5))
+
+    def _nota_atividade(self, ultima_atividade):
+        if not ultima_atividade:
+            return 0.0
+        dias = max((self.agora - ultima_atividade).total_seconds(), 0) / 86400
+        return 1 / (1 + dias / 7)
+
+
+def obter_pontuador(usuario):
+    """Instancia o pontuador configurado em EXPLORAR_PONTUADOR"""
+    caminho = getattr(settings, 'EXPLORAR_PONTUADOR', 'feed.pontuacao.PontuadorCompatibilidade')
+    return import_string(caminho)(usuario)
+
+
+def candidatos_compativeis(usuario, flags_obrigatorias=()):
+    """
+    Queryset com os filtros obrigatórios de compatibilidade (sem distância).
+    `flags_obrigatorias` são campos de PerfilInteresses que o candidato
+    precisa ter marcados (ex.: 'objetivo_troca'), testados com AND de bits.
+    """
+    # Filtrar usuários ativos, diferentes do usuário atual
+    usuarios = Usuario.objects.filter(is_active=True).exclude(id=usuario.id)
+    
+    if flags_obrigatorias:
+        mascara = PerfilInteresses.mascara_de(*flags_obrigatorias)
+        usuarios = usuarios.annotate(
+            _flags_exigidas=F('perfil_interesses__mascara_flags').bitand(mascara)
+        ).filter(_flags_exigidas=mascara)
+
+    # Aplicar filtros de preferência
+    usuarios = usuarios.filter(Usuario.filtro_genero_interesse(usuario.genero_interesse))
+
+    # Filtro por idade (titular ou parceiro do casal)
+    if usuario.idade_minima and usuario.idade_maxima:
+        usuarios = usuarios.filter(Usuario.filtro_idade(usuario.idade_minima, usuario.idade_maxima))
+
+    # Excluir usuários que já foram curtidos ou rejeitados
+    relacionamentos_existentes = Relacionamento.objects.filter(
+        remetente=usuario
+    ).values_list('destinatario_id', flat=True)
+
+    return usuarios.exclude(id__in=relacionamentos_existentes)
+
+
+def ranquear_candidatos(usuario, limite=None, flags_obrigatorias=()):
+    """
+    Retorna lista de tuplas (id, pontuacao, distancia) dos candidatos
+    compatíveis, da maior para a menor pontuação.
+    """
+    from usuarios.geo import usuarios_no_raio
+
+    limite = limite or getattr(settings, 'EXPLORAR_MAX_CANDIDATOS', 5000)
+    usuarios = candidatos_compativeis(usuario, flags_obrigatorias)
+
+    # Filtro por distância: raio do usuário e do candidato (distancia_maxima)
+    no_raio = None
+    if usuario.distancia_maxima:
+        no_raio = usuarios_no_raio(usuarios, usuario, usuario.distancia_maxima)
+
+    # Pontua todos os compatíveis (no raio, se houver) em lotes e guarda só os
+    # `limite` melhores: cortar antes pegaria só as contas mais novas
+    pontuador = obter_pontuador(usuario)
+    if no_raio is None:
+        ids = usuarios.values_list('pk', flat=True).iterator(chunk_size=getattr(pontuador, 'TAMANHO_LOTE', 1000))
+        return _melhores_pontuados(pontuador, ids, limite)
+
+    distancias = dict(no_raio)
+    return _melhores_pontuados(pontuador, distancias.keys(), limite, distancias)
+
+
+def _melhores_pontuados(pontuador, ids, limite, distancias=None):
+    """
+    Pontua `ids` lote a lote mantendo um heap com os `limite` melhores.
+    `distancias` ({id: km}) é repassado ao pontuador e volta no ranking.
+    """
+    distancias = distancias or {}
+    tamanho_lote = getattr(pontuador, 'TAMANHO_LOTE', 1000)
+    melhores = []  # heap mínimo de (pontuacao, -id): o pior fica no topo
+
+    def pontuar_lote(lote):
+        for pk, pontuacao in pontuador.pontuar(lote, distancias).items():
+            item = (pontuacao, -pk)
+            if len(melhores) < limite:
+                heapq.heappush(melhores, item)
+            elif item > melhores[0]:
+                heapq.heapreplace(melhores, item)
+
+    lote = []
+    for pk in ids:
+        lote.append(pk)
+        if len(lote) == tamanho_lote:
+            pontuar_lote(lote)
+            lote = []
+    if lote:
+        pontuar_lote(lote)
+
+    ranking = sorted(melhores, key=lambda item: (-item[0], -item[1]))
+    return [(-pk_negativo, pontuacao, distancias.get(-pk_negativo)) for pontuacao, pk_negativo in ranking]
@@ -0,0 +1,82 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import contadores, timeline
+from .fila import CAMPOS_PREFERENCIA, marcar_desatualizada, remover_da_fila
+from .models import Comentario, Curtida, Postagem, Relacionamento
+
+Usuario = get_user_model()
+
+
+@receiver(post_save, sender=Relacionamento)
+def tirar_candidato_da_fila(sender, instance, created, **kwargs):
+    """Um candidato avaliado (like/dislike/match) sai da fila do remetente"""
+    if created:
+        remover_da_fila(instance.remetente_id, instance.destinatario_id)
+
+
+@receiver(pre_save, sender=Usuario)
+def detectar_mudanca_preferencias(sender, instance, update_fields=None, **kwargs):
+    """Mudou preferência ou localização: a fila do usuário fica desatualizada"""
+    if not instance.pk:
+        return
+    if update_fields is not None:
+        nomes = {sender._meta.get_field(nome).attname for nome in update_fields}
+        if not nomes & set(CAMPOS_PREFERENCIA):
+            return
+    
+    anteriores = sender.objects.filter(pk=instance.pk).values(*CAMPOS_PREFERENCIA).first()
+    if anteriores is None:
+        return
+    
+    if any(anteriores[campo] != getattr(instance, campo) for campo in CAMPOS_PREFERENCIA):
+        marcar_desatualizada(instance.pk)
+
+
+@receiver(post_save, sender=Curtida)
+def contar_curtida(sender, instance, created, **kwargs):
+    if created:
+        contadores.ajustar(instance.postagem_id, 'total_curtidas', 1)
+
+
+@receiver(post_delete, sender=Curtida)
+def descontar_curtida(sender, instance, **kwargs):
+    contadores.ajustar(instance.postagem_id, 'total_curtidas', -1)
+
+
+@receiver(post_save, sender=Comentario)
+def contar_comentario(sender, instance, created, **kwargs):
+    if created:
+        contadores.ajustar(instance.postagem_id, 'total_comentarios', 1)
+
+
+@receiver(post_delete, sender=Comentario)
+def descontar_comentario(sender, instance, **kwargs):
+    contadores.ajustar(instance.postagem_id, 'total_comentarios', -1)
+
+
+@receiver(post_save, sender=Postagem)
+def distribuir_nova_postagem(sender, instance, created, **kwargs):
+    """Fan-out da postagem nas timelines depois do commit"""
+    if created:
+        transaction.on_commit(lambda: timeline.distribuir_postagem(instance))
+
+
+@receiver(post_save, sender=Relacionamento)
+def atualizar_timeline_seguidor(sender, instance, created, **kwargs):
+    """Seguir (like/match) traz as postagens do autor; desfazer remove"""
+    if instance.is_ativo and instance.tipo in timeline.TIPOS_SEGUIR:
+        timeline.copiar_postagens_do_autor(instance.remetente_id, instance.destinatario_id)
+        if instance.tipo == 'match':
+            timeline.copiar_postagens_do_autor(instance.destinatario_id, instance.remetente_id)
+    elif not created:
+        remover_timeline_seguidor(sender, instance)
+
+
+@receiver(post_delete, sender=Relacionamento)
+def remover_timeline_seguidor(sender, instance, **kwargs):
+    timeline.remover_postagens_do_autor(instance.remetente_id, instance.destinatario_id)
+    if instance.tipo == 'match':
+        timeline.remover_postagens_do_autor(instance.destinatario_id, instance.remetente_id)
@@ -1,3 +1,303 @@
-from django.test import TestCase
+from datetime import date
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from usuarios.models import Usuario
+
+from . import curtidas
+from .fila import atualizar_fila, pagina_fila
+from .models import CandidatoFila, Curtida, EntradaTimeline, EstadoFila, Postagem, Relacionamento
+from .pontuacao import ranquear_candidatos
+from .timeline import pagina_timeline
+
+
+def criar_usuario(username, **campos):
+    campos.setdefault('data_nascimento', date(1995, 6, 1))
+    return Usuario.objects.create_user(username, password='senha-teste', **campos)
+
+
+class PontuadorPorAntiguidade:
+    """Pontuador de teste: contas mais antigas (IDs menores) valem mais"""
+
+    TAMANHO_LOTE = 2
+    chamadas = []
+
+    def __init__(self, usuario):
+        self.usuario = usuario
+
+    def pontuar(self, candidatos, distancias=None):
+        candidatos = list(candidatos)
+        PontuadorPorAntiguidade.chamadas.append((candidatos, dict(distancias or {})))
+        return {pk: 1 / pk for pk in candidatos}
+
+
+@override_settings(EXPLORAR_PONTUADOR='feed.tests.PontuadorPorAntiguidade')
+class RankingCandidatosTests(TestCase):
+    """ranquear_candidatos pontua todos os compatíveis antes de cortar no limite"""
+
+    def setUp(self):
+        PontuadorPorAntiguidade.chamadas = []
+
+    def test_sem_localizacao_pontua_todos_os_compativeis(self):
+        usuario = criar_usuario('usuario')
+        candidatos = [criar_usuario(f'candidato{i}') for i in range(5)]
+
+        ranking = ranquear_candidatos(usuario, limite=2)
+
+        # Os mais antigos ganham, mesmo sendo os últimos na ordem de criação
+        self.assertEqual([pk for pk, _, _ in ranking], [candidatos[0].pk, candidatos[1].pk])
+        pontuados = [pk for lote, _ in PontuadorPorAntiguidade.chamadas for pk in lote]
+        self.assertCountEqual(pontuados, [candidato.pk for candidato in candidatos])
+        self.assertTrue(all(len(lote) <= 2 for lote, _ in PontuadorPorAntiguidade.chamadas))
+
+    def test_com_raio_pontua_todos_os_candidatos_no_raio(self):
+        perto = {'latitude': -23.55, 'longitude': -46.63}
+        usuario = criar_usuario('usuario', distancia_maxima=50, **perto)
+        candidatos = [criar_usuario(f'candidato{i}', **perto) for i in range(5)]
+        criar_usuario('longe', latitude=-22.90, longitude=-43.20)
+
+        ranking = ranquear_candidatos(usuario, limite=2)
+
+        self.assertEqual([pk for pk, _, _ in ranking], [candidatos[0].pk, candidatos[1].pk])
+        self.assertTrue(all(distancia == 0 for _, _, distancia in ranking))
+        pontuados = [pk for lote, _ in PontuadorPorAntiguidade.chamadas for pk in lote]
+        self.assertCountEqual(pontuados, [candidato.pk for candidato in candidatos])
+        # As distâncias da busca geográfica chegam ao pontuador
+        for lote, distancias in PontuadorPorAntiguidade.chamadas:
+            self.assertTrue(set(lote) <= set(distancias))
+
+    def test_empates_ficam_com_o_menor_id(self):
+        usuario = criar_usuario('usuario')
+        candidatos = [criar_usuario(f'candidato{i}') for i in range(4)]
+
+        with override_settings(EXPLORAR_PONTUADOR='feed.tests.PontuadorEmpatado'):
+            ranking = ranquear_candidatos(usuario, limite=3)
+
+        self.assertEqual([pk for pk, _, _ in ranking], [candidato.pk for candidato in candidatos[:3]])
+
+    def test_ignora_inativos_e_ja_avaliados(self):
+        usuario = criar_usuario('usuario')
+        ativo = criar_usuario('ativo')
+        criar_usuario('inativo', is_active=False)
+        avaliado = criar_usuario('avaliado')
+        Relacionamento.objects.create(remetente=usuario, destinatario=avaliado, tipo='dislike')
+
+        ranking = ranquear_candidatos(usuario, limite=10)
+
+        self.assertEqual([pk for pk, _, _ in ranking], [ativo.pk])
+
+
+class PontuadorEmpatado(PontuadorPorAntiguidade):
+    def pontuar(self, candidatos, distancias=None):
+        return {pk: 0.5 for pk in candidatos}
+
+
+@override_settings(FILA_CANDIDATOS_MINIMO=1)
+class FilaCandidatosTests(TestCase):
+    """Fila pré-calculada do explorar: leitura, desatualização e reconstrução"""
+
+    def setUp(self):
+        self.usuario = criar_usuario('usuario')
+
+    def estado(self):
+        return EstadoFila.objects.get(usuario=self.usuario)
+
+    def test_sem_fila_nao_ranqueia_na_requisicao(self):
+        criar_usuario('candidato')
+
+        pagina = pagina_fila(self.usuario, 1)
+
+        self.assertTrue(pagina.em_construcao)
+        self.assertEqual(list(pagina.object_list), [])
+        self.assertTrue(self.estado().desatualizada)
+        self.assertFalse(CandidatoFila.objects.filter(usuario=self.usuario).exists())
+
+    def test_atualizar_fila_constroi_e_a_pagina_le_a_fila(self):
+        candidato = criar_usuario('candidato')
+
+        self.assertEqual(atualizar_fila(self.usuario), (1, 0, 0))
+        pagina = pagina_fila(self.usuario, 1)
+
+        self.assertFalse(pagina.em_construcao)
+        self.assertEqual([usuario.pk for usuario in pagina.object_list], [candidato.pk])
+        self.assertFalse(self.estado().desatualizada)
+
+    def test_fila_construida_vazia_volta_a_ser_desatualizada(self):
+        # Fila construída antes de haver alguém compatível
+        atualizar_fila(self.usuario)
+        self.assertFalse(self.estado().desatualizada)
+
+        pagina = pagina_fila(self.usuario, 1)
+
+        self.assertTrue(pagina.em_construcao)
+        self.assertTrue(self.estado().desatualizada)
+
+        # O worker reconstrói e a próxima página já traz o candidato novo
+        candidato = criar_usuario('candidato')
+        atualizar_fila(self.usuario)
+        self.assertEqual([usuario.pk for usuario in pagina_fila(self.usuario, 1).object_list], [candidato.pk])
+
+    def test_fila_curta_fica_desatualizada(self):
+        criar_usuario('candidato')
+        atualizar_fila(self.usuario)
+
+        with override_settings(FILA_CANDIDATOS_MINIMO=5):
+            pagina_fila(self.usuario, 1)
+
+        self.assertTrue(self.estado().desatualizada)
+
+    def test_mudar_preferencias_desatualiza_a_fila(self):
+        atualizar_fila(self.usuario)
+
+        self.usuario.idade_maxima = 40
+        self.usuario.save()
+
+        self.assertTrue(self.estado().desatualizada)
+
+    def test_atualizacao_aplica_so_a_diferenca(self):
+        fica = criar_usuario('fica')
+        sai = criar_usuario('sai')
+        atualizar_fila(self.usuario)
+
+        sai.is_active = False
+        sai.save()
+        entra = criar_usuario('entra')
+
+        inseridos, _, removidos = atualizar_fila(self.usuario)
+
+        self.assertEqual((inseridos, removidos), (1, 1))
+        self.assertCountEqual(
+            CandidatoFila.objects.filter(usuario=self.usuario).values_list('candidato_id', flat=True),
+            [fica.pk, entra.pk],
+        )
+
+    def test_avaliar_candidato_tira_da_fila(self):
+        candidato = criar_usuario('candidato')
+        atualizar_fila(self.usuario)
+
+        Relacionamento.objects.create(remetente=self.usuario, destinatario=candidato, tipo='like')
+
+        self.assertFalse(CandidatoFila.objects.filter(usuario=self.usuario, candidato=candidato).exists())
+
+    def test_candidato_desativado_nao_aparece(self):
+        candidato = criar_usuario('candidato')
+        atualizar_fila(self.usuario)
+
+        Usuario.objects.filter(pk=candidato.pk).update(is_active=False)
+
+        self.assertEqual(list(pagina_fila(self.usuario, 1).object_list), [])
+
+    def test_comando_atualiza_so_as_filas_desatualizadas(self):
+        outro = criar_usuario('outro')
+        atualizar_fila(outro)
+        construida_em = EstadoFila.objects.get(usuario=outro).data_construcao
+        pagina_fila(self.usuario, 1)
+
+        call_command('atualizar_filas', stdout=StringIO())
+
+        self.assertFalse(self.estado().desatualizada)
+        self.assertTrue(CandidatoFila.objects.filter(usuario=self.usuario, candidato=outro).exists())
+        # A fila em dia não foi refeita
+        self.assertEqual(EstadoFila.objects.get(usuario=outro).data_construcao, construida_em)
+
+
+class CurtidasTests(TestCase):
+    """Curtir/descurtir idempotentes e o contador desnormalizado"""
+
+    def setUp(self):
+        self.autor = criar_usuario('autor')
+        self.usuario = criar_usuario('usuario')
+        self.postagem = Postagem.objects.create(autor=self.autor, conteudo='Olá')
+
+    def total_curtidas(self):
+        return Postagem.objects.get(pk=self.postagem.pk).total_curtidas
+
+    def test_curtir_duas_vezes_conta_uma(self):
+        self.assertEqual(curtidas.curtir(self.usuario.id, self.postagem.id), (True, 1))
+        self.assertEqual(curtidas.curtir(self.usuario.id, self.postagem.id), (False, 1))
+        self.assertEqual(Curtida.objects.filter(postagem=self.postagem).count(), 1)
+        self.assertEqual(self.total_curtidas(), 1)
+
+    def test_descurtir_duas_vezes_desconta_uma(self):
+        outro = criar_usuario('outro')
+        curtidas.curtir(self.usuario.id, self.postagem.id)
+        curtidas.curtir(outro.id, self.postagem.id)
+
+        self.assertEqual(curtidas.descurtir(self.usuario.id, self.postagem.id), (True, 1))
+        self.assertEqual(curtidas.descurtir(self.usuario.id, self.postagem.id), (False, 1))
+        self.assertEqual(self.total_curtidas(), 1)
+
+    def test_descurtir_sem_curtida_nao_fica_negativo(self):
+        self.assertEqual(curtidas.descurtir(self.usuario.id, self.postagem.id), (False, 0))
+        self.assertEqual(self.total_curtidas(), 0)
+
+    def test_alternar(self):
+        self.assertEqual(curtidas.alternar(self.usuario.id, self.postagem.id), (True, 1))
+        self.assertEqual(curtidas.alternar(self.usuario.id, self.postagem.id), (False, 0))
+        self.assertEqual(self.total_curtidas(), 0)
+
+    def test_postagem_inativa_ou_inexistente(self):
+        Postagem.objects.filter(pk=self.postagem.pk).update(is_ativo=False)
+
+        self.assertIsNone(curtidas.curtir(self.usuario.id, self.postagem.id))
+        self.assertIsNone(curtidas.curtir(self.usuario.id, 0))
+        self.assertFalse(Curtida.objects.exists())
+
+    def test_caminho_orm_usa_os_sinais_uma_vez(self):
+        self.assertEqual(curtidas._aplicar_orm(self.usuario.id, self.postagem.id, True), (True, 1))
+        self.assertEqual(curtidas._aplicar_orm(self.usuario.id, self.postagem.id, True), (False, 1))
+        self.assertEqual(curtidas._aplicar_orm(self.usuario.id, self.postagem.id, False), (True, 0))
+        self.assertEqual(curtidas._aplicar_orm(self.usuario.id, self.postagem.id, False), (False, 0))
+
+
+@override_settings(TIMELINE_LIMITE_FANOUT=1)
+class TimelineTests(TestCase):
+    """Timeline pré-calculada intercalada com as postagens lidas na hora"""
+
+    def setUp(self):
+        self.usuario = criar_usuario('usuario')
+        self.pequeno = criar_usuario('pequeno')  # um seguidor: distribuído
+        self.grande = criar_usuario('grande')    # dois seguidores: lido na hora
+        self.estranho = criar_usuario('estranho')
+        Relacionamento.objects.create(remetente=self.usuario, destinatario=self.pequeno, tipo='like')
+        Relacionamento.objects.create(remetente=self.usuario, destinatario=self.grande, tipo='like')
+        Relacionamento.objects.create(remetente=self.estranho, destinatario=self.grande, tipo='like')
+
+    def postar(self, autor, conteudo):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Postagem.objects.create(autor=autor, conteudo=conteudo)
+
+    def ler_timeline(self, por_pagina):
+        ids, cursor, paginas = [], None, 0
+        while True:
+            postagens, cursor = pagina_timeline(self.usuario, cursor, por_pagina=por_pagina)
+            ids += [postagem.id for postagem in postagens]
+            paginas += 1
+            if cursor is None or paginas > 20:
+                return ids
+
+    def test_distribuicao_conforme_o_numero_de_seguidores(self):
+        distribuida = self.postar(self.pequeno, 'distribuída')
+        na_hora = self.postar(self.grande, 'na hora')
+
+        distribuida.refresh_from_db()
+        na_hora.refresh_from_db()
+        self.assertTrue(distribuida.distribuida)
+        self.assertFalse(na_hora.distribuida)
+        self.assertTrue(EntradaTimeline.objects.filter(usuario=self.usuario, postagem=distribuida).exists())
+        self.assertFalse(EntradaTimeline.objects.filter(postagem=na_hora).exists())
+
+    def test_intercala_distribuidas_e_lidas_na_hora(self):
+        postagens = [
+            self.postar(autor, f'postagem {i}')
+            for i, autor in enumerate([self.pequeno, self.grande, self.grande, self.pequeno, self.usuario, self.grande])
+        ]
+        self.postar(self.estranho, 'de quem o usuário não segue')
+        Postagem.objects.create(autor=self.grande, conteudo='inativa', is_ativo=False)
+
+        esperado = [postagem.id for postagem in reversed(postagens)]
+        for por_pagina in (1, 2, 4, 10):
+            with self.subTest(por_pagina=por_pagina):
+                self.assertEqual(self.ler_timeline(por_pagina), esperado)
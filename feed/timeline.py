@@ -0,0 +1,149 @@
+"""
+Timelines personalizadas do feed (fan-out na escrita).
+
+Ao criar uma Postagem, o ID dela é copiado para a timeline de cada
+seguidor do autor (quem curtiu o autor ou deu match com ele) e do próprio
+autor. A home só lê os IDs pré-calculados e hidrata a página com uma
+consulta. Autores com mais de TIMELINE_LIMITE_FANOUT seguidores não são
+distribuídos (`distribuida=False`): suas postagens são buscadas na hora
+da leitura e intercaladas com a timeline. O comando `atualizar_timelines`
+corta cada timeline em TIMELINE_TAMANHO entradas.
+"""
+from django.conf import settings
+from django.db.models import Count, Q
+
+from .models import EntradaTimeline, Postagem, Relacionamento
+from .paginacao import ORDEM, codificar_chave, decodificar_cursor, filtro_apos
+
+
+# Relacionamentos em que o remetente passa a acompanhar as postagens do destinatário
+TIPOS_SEGUIR = ('like', 'super_like', 'match')
+
+# Postagens do autor copiadas para a timeline de um novo seguidor
+POSTAGENS_NOVO_SEGUIDOR = 20
+
+
+def tamanho_timeline():
+    return getattr(settings, 'TIMELINE_TAMANHO', 800)
+
+
+def limite_fanout():
+    return getattr(settings, 'TIMELINE_LIMITE_FANOUT', 5000)
+
+
+def seguidores(autor_id):
+    """IDs de quem acompanha o autor (inclui os matches que ele mesmo deu)"""
+    ids = set(Relacionamento.objects.filter(
+        destinatario_id=autor_id, tipo__in=TIPOS_SEGUIR, is_ativo=True
+    ).values_list('remetente_id', flat=True))
+    ids.update(Relacionamento.objects.filter(
+        remetente_id=autor_id, tipo='match', is_ativo=True
+    ).values_list('destinatario_id', flat=True))
+    return ids
+
+
+def filtro_seguidos(usuario_id):
+    """Q de Postagem cujo autor o usuário acompanha (ou é ele mesmo)"""
+    seguidos = Relacionamento.objects.filter(
+        remetente_id=usuario_id, tipo__in=TIPOS_SEGUIR, is_ativo=True
+    ).values('destinatario_id')
+    matches = Relacionamento.objects.filter(
+        destinatario_id=usuario_id, tipo='match', is_ativo=True
+    ).values('remetente_id')
+    return Q(autor_id=usuario_id) | Q(autor_id__in=seguidos) | Q(autor_id__in=matches)
+
+
+def distribuir_postagem(postagem):
+    """
+    Copia a postagem para as timelines dos seguidores do autor.
+    Retorna quantas timelines receberam a postagem (0 se lida na hora).
+    """
+    destinatarios = seguidores(postagem.autor_id)
+    distribuida = len(destinatarios) <= limite_fanout()
+    if distribuida != postagem.distribuida:
+        postagem.distribuida = distribuida
+        Postagem.objects.filter(pk=postagem.pk).update(distribuida=distribuida)
+    if not distribuida:
+        return 0
+    
+    destinatarios.add(postagem.autor_id)
+    EntradaTimeline.objects.bulk_create([
+        EntradaTimeline(usuario_id=usuario_id, postagem_id=postagem.pk, data_criacao=postagem.data_criacao)
+        for usuario_id in destinatarios
+    ], batch_size=1000, ignore_conflicts=True)
+    return len(destinatarios)
+
+
+def copiar_postagens_do_autor(usuario_id, autor_id, limite=POSTAGENS_NOVO_SEGUIDOR):
+    """Novo seguidor: traz as postagens recentes do autor para a timeline"""
+    recentes = Postagem.objects.filter(
+        autor_id=autor_id, is_ativo=True, distribuida=True
+    ).order_by(*ORDEM).values_list('id', 'data_criacao')[:limite]
+    EntradaTimeline.objects.bulk_create([
+        EntradaTimeline(usuario_id=usuario_id, postagem_id=pk, data_criacao=data)
+        for pk, data in recentes
+    ], ignore_conflicts=True)
+
+
+def segue(usuario_id, autor_id):
+    return Relacionamento.objects.filter(
+        Q(remetente_id=usuario_id, destinatario_id=autor_id, tipo__in=TIPOS_SEGUIR)
+        | Q(remetente_id=autor_id, destinatario_id=usuario_id, tipo='match'),
+        is_ativo=True,
+    ).exists()
+
+
+def remover_postagens_do_autor(usuario_id, autor_id):
+    """Deixou de seguir: tira as postagens do autor da timeline"""
+    if segue(usuario_id, autor_id):
+        return
+    EntradaTimeline.objects.filter(usuario_id=usuario_id, postagem__autor_id=autor_id).delete()
+
+
+def pagina_timeline(usuario, cursor=None, por_pagina=10):
+    """
+    Página da timeline do usuário depois do cursor.
+    Retorna (postagens, proximo_cursor), como feed.paginacao.pagina_por_cursor.
+    """
+    entradas = EntradaTimeline.objects.filter(usuario=usuario)
+    lidas_na_hora = Postagem.objects.filter(is_ativo=True, distribuida=False).filter(
+        filtro_seguidos(usuario.id)
+    )
+    if cursor:
+        data, pk = decodificar_cursor(cursor)
+        entradas = entradas.filter(filtro_apos(data, pk, campo_id='postagem_id'))
+        lidas_na_hora = lidas_na_hora.filter(filtro_apos(data, pk))
+    
+    chaves = list(entradas.order_by('-data_criacao', '-postagem_id').values_list(
+        'data_criacao', 'postagem_id'
+    )[:por_pagina + 1])
+    chaves += lidas_na_hora.order_by(*ORDEM).values_list('data_criacao', 'id')[:por_pagina + 1]
+    chaves = sorted(set(chaves), reverse=True)[:por_pagina + 1]
+    
+    proximo_cursor = codificar_chave(*chaves[por_pagina - 1]) if len(chaves) > por_pagina else None
+    ids = [pk for _, pk in chaves[:por_pagina]]
+    
+    # Hidratação em uma consulta; postagens desativadas somem da página
+    postagens = Postagem.objects.filter(id__in=ids, is_ativo=True).select_related('autor').in_bulk()
+    return [postagens[pk] for pk in ids if pk in postagens], proximo_cursor
+
+
+def aparar_timelines(tamanho=None):
+    """
+    Corta as timelines que passaram do tamanho máximo, mantendo as mais
+    recentes. Retorna quantas timelines foram cortadas.
+    """
+    tamanho = tamanho or tamanho_timeline()
+    cheias = EntradaTimeline.objects.values('usuario_id').annotate(
+        total=Count('id')
+    ).filter(total__gt=tamanho).values_list('usuario_id', flat=True)
+    
+    cortadas = 0
+    for usuario_id in cheias.iterator():
+        entradas = EntradaTimeline.objects.filter(usuario_id=usuario_id)
+        data, pk = entradas.order_by('-data_criacao', '-postagem_id').values_list(
+            'data_criacao', 'postagem_id'
+        )[tamanho - 1]
+        entradas.filter(filtro_apos(data, pk, campo_id='postagem_id')).delete()
+        cortadas += 1
+    return cortadas
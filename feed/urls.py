@@ -5,9 +5,12 @@ app_name = 'feed'
 
 urlpatterns = [
     path('', views.home, name='home'),
+    path('postagens/', views.postagens_feed, name='postagens_feed'),
     path('explorar/', views.explorar, name='explorar'),
     path('criar/', views.criar_postagem, name='criar_postagem'),
     path('postagem/<int:post_id>/', views.detalhes_postagem, name='detalhes_postagem'),
     path('postagem/<int:post_id>/curtir/', views.curtir_postagem, name='curtir_postagem'),
+    path('postagem/<int:post_id>/curtida/', views.curtida_postagem, name='curtida_postagem'),
+    path('curtidas/lote/', views.curtir_em_lote, name='curtir_em_lote'),
     path('postagem/<int:post_id>/comentar/', views.comentar_postagem, name='comentar_postagem'),
 ]
@@ -1,41 +1,104 @@
+import json
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
-from django.core.paginator import Paginator
 from django.db.models import Q
+from django.templatetags.static import static
+from django.utils.timesince import timesince
+
+from . import curtidas
+from .models import Postagem, Comentario
+from midia.imagens import url_variante
 
-from .models import Postagem, Curtida, Comentario, Relacionamento
 from .forms import PostagemForm, ComentarioForm
+from .hidratacao import hidratar_postagens
+from .fila import pagina_fila, similares_da_fila
+from .paginacao import CursorInvalido, pagina_por_cursor
+from .timeline import pagina_timeline
+from .visualizacoes import buffer_visualizacoes
 
 
 @login_required
 def home(request):
-    """Página inicial do feed"""
-    postagens = Postagem.objects.filter(is_ativo=True).select_related('autor').prefetch_related('curtidas', 'comentarios')
-    
-    # Paginação
-    paginator = Paginator(postagens, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
+    """Página inicial do feed; as postagens vêm de postagens_feed (JS), já na primeira página"""
     context = {
-        'postagens': page_obj,
         'form': PostagemForm(),
     }
     
     return render(request, 'feed/home.html', context)
 
 
+@login_required
+def postagens_feed(request):
+    """Próxima página do feed (rolagem infinita) - retorna JSON"""
+    cursor = request.GET.get('cursor')
+    try:
+        if request.GET.get('filtro') == 'all':
+            postagens, proximo_cursor = pagina_por_cursor(_postagens_feed(), cursor)
+        else:
+            postagens, proximo_cursor = pagina_timeline(request.user, cursor)
+    except CursorInvalido:
+        return JsonResponse({'success': False, 'error': 'Cursor inválido'}, status=400)
+    hidratar_postagens(postagens, request.user)
+    buffer_visualizacoes.registrar(request.user.id, [postagem.id for postagem in postagens])
+    
+    return JsonResponse({
+        'success': True,
+        'postagens': [_serializar_postagem(postagem) for postagem in postagens],
+        'proximo_cursor': proximo_cursor,
+    })
+
+
+def _postagens_feed():
+    return Postagem.objects.filter(is_ativo=True).select_related('autor')
+
+
+def _serializar_postagem(postagem):
+    """Formato esperado pelo createPostElement do feed/home.html"""
+    autor = postagem.autor
+    if autor.mostrar_localizacao and autor.cidade:
+        local = f'{autor.cidade}/{autor.estado}' if autor.estado else autor.cidade
+    else:
+        local = ''
+    return {
+        'id': postagem.id,
+        'author': autor.nome_completo,
+        'authorId': autor.id,
+        'authorUsername': autor.username,
+        'authorAvatar': url_variante(autor.foto_perfil, 'mini') or static('images/default-avatar.png'),
+        'isVip': autor.is_vip,
+        'isVerified': autor.is_verificado,
+        'gender': autor.get_genero_display(),
+        'location': local,
+        'content': postagem.conteudo,
+        'image': url_variante(postagem.imagem, 'card', 'webp') or None,
+        'video': postagem.video.url if postagem.video and postagem.status_midia == 'pronta' else None,
+        'poster': url_variante(postagem.video_poster, 'card') or None,
+        'processing': postagem.status_midia == 'processando',
+        'likes': postagem.total_curtidas,
+        'comments': postagem.total_comentarios,
+        'liked': postagem.curtida_pelo_usuario,
+        'recentComments': [{
+            'id': comentario.id,
+            'usuario': comentario.usuario.username,
+            'conteudo': comentario.conteudo,
+        } for comentario in postagem.comentarios_recentes],
+        'timeAgo': timesince(postagem.data_criacao, depth=1),
+    }
+
+
 @login_required
 def explorar(request):
     """Página de exploração de usuários"""
-    # Buscar usuários compatíveis
-    usuarios = buscar_usuarios_compatíveis(request.user)
+    # Página da fila pré-calculada de candidatos
+    usuarios = pagina_fila(request.user, request.GET.get('page'))
     
     context = {
         'usuarios': usuarios,
+        'similares': similares_da_fila(request.user),
     }
     
     return render(request, 'feed/explorar.html', context)
@@ -51,7 +114,10 @@ def criar_postagem(request):
             postagem.autor = request.user
             postagem.save()
             
-            messages.success(request, 'Postagem criada com sucesso!')
+            if postagem.status_midia == 'processando':
+                messages.success(request, 'Postagem criada! A mídia aparece assim que terminar de ser processada.')
+            else:
+                messages.success(request, 'Postagem criada com sucesso!')
             return redirect('feed:home')
     else:
         form = PostagemForm()
@@ -63,6 +129,7 @@ def criar_postagem(request):
 def detalhes_postagem(request, post_id):
     """Detalhes de uma postagem específica"""
     postagem = get_object_or_404(Postagem, id=post_id, is_ativo=True)
+    buffer_visualizacoes.registrar(request.user.id, [postagem.id])
     comentarios = postagem.comentarios.filter(is_ativo=True).select_related('usuario')
     
     if request.method == 'POST':
@@ -90,34 +157,71 @@ def detalhes_postagem(request, post_id):
 @login_required
 @require_http_methods(["POST"])
 def curtir_postagem(request, post_id):
-    """Curtir/descurtir postagem via AJAX"""
-    postagem = get_object_or_404(Postagem, id=post_id)
+    """Curtir/descurtir postagem via AJAX (alterna)"""
+    resultado = curtidas.alternar(request.user.id, post_id)
+    if resultado is None:
+        return JsonResponse({'success': False, 'error': 'Postagem não encontrada'}, status=404)
     
-    try:
-        curtida, created = Curtida.objects.get_or_create(
-            usuario=request.user,
-            postagem=postagem
-        )
-        
-        if not created:
-            curtida.delete()
-            liked = False
-        else:
-            liked = True
-        
-        total_curtidas = postagem.total_curtidas
-        
-        return JsonResponse({
-            'success': True,
-            'liked': liked,
-            'total_likes': total_curtidas
-        })
+    liked, total_curtidas = resultado
+    return JsonResponse({
+        'success': True,
+        'liked': liked,
+        'total_likes': total_curtidas
+    })
+
+
+@login_required
+@require_http_methods(["POST", "DELETE"])
+def curtida_postagem(request, post_id):
+    """Curtir (POST) ou descurtir (DELETE) postagem - idempotente, retorna JSON"""
+    curtir = request.method == 'POST'
+    resultado = curtidas.aplicar(request.user.id, post_id, curtir)
+    if resultado is None:
+        return JsonResponse({'success': False, 'error': 'Postagem não encontrada'}, status=404)
     
-    except Exception as e:
+    mudou, total_curtidas = resultado
+    return JsonResponse({
+        'success': True,
+        'liked': curtir,
+        'changed': mudou,
+        'total_likes': total_curtidas
+    })
+
+
+@login_required
+@require_http_methods(["POST"])
+def curtir_em_lote(request):
+    """
+    Várias operações de curtida numa chamada. Corpo JSON:
+    {"operacoes": [{"postagem": 1, "curtir": true}, ...]}
+    """
+    try:
+        operacoes = json.loads(request.body)['operacoes']
+        operacoes = [(int(op['postagem']), bool(op['curtir'])) for op in operacoes]
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'success': False, 'error': 'Operações inválidas'}, status=400)
+    if len(operacoes) > curtidas.MAXIMO_LOTE:
         return JsonResponse({
             'success': False,
-            'error': str(e)
-        })
+            'error': f'Máximo de {curtidas.MAXIMO_LOTE} operações por lote'
+        }, status=400)
+    
+    resultados = []
+    for post_id, curtir in operacoes:
+        resultado = curtidas.aplicar(request.user.id, post_id, curtir)
+        if resultado is None:
+            resultados.append({'postagem': post_id, 'success': False, 'error': 'Postagem não encontrada'})
+        else:
+            mudou, total_curtidas = resultado
+            resultados.append({
+                'postagem': post_id,
+                'success': True,
+                'liked': curtir,
+                'changed': mudou,
+                'total_likes': total_curtidas
+            })
+    
+    return JsonResponse({'success': True, 'resultados': resultados})
 
 
 @login_required
@@ -155,42 +259,3 @@ def comentar_postagem(request, post_id):
             'success': False,
             'error': str(e)
         })
-
-
-def buscar_usuarios_compatíveis(usuario):
-    """Buscar usuários compatíveis para matches"""
-    from usuarios.models import Usuario
-    
-    # Filtrar usuários ativos, diferentes do usuário atual
-    usuarios = Usuario.objects.filter(is_active=True).exclude(id=usuario.id)
-    
-    # Aplicar filtros de preferência
-    if usuario.genero_interesse and usuario.genero_interesse != 'A':
-        usuarios = usuarios.filter(genero=usuario.genero_interesse)
-    
-    # Filtro por idade
-    if usuario.idade_minima and usuario.idade_maxima:
-        from datetime import date, timedelta
-        hoje = date.today()
-        data_max = hoje - timedelta(days=usuario.idade_minima * 365)
-        data_min = hoje - timedelta(days=usuario.idade_maxima * 365)
-        
-        usuarios = usuarios.filter(
-            data_nascimento__gte=data_min,
-            data_nascimento__lte=data_max
-        )
-    
-    # Filtro por localização (se configurado)
-    if usuario.cidade and usuario.distancia_maxima:
-        # Aqui você implementaria a lógica de distância geográfica
-        # Por enquanto, apenas filtrar por cidade
-        usuarios = usuarios.filter(cidade__icontains=usuario.cidade)
-    
-    # Excluir usuários que já foram curtidos ou rejeitados
-    relacionamentos_existentes = Relacionamento.objects.filter(
-        remetente=usuario
-    ).values_list('destinatario_id', flat=True)
-    
-    usuarios = usuarios.exclude(id__in=relacionamentos_existentes)
-    
-    return usuarios[:20]  # Limitar a 20 resultados
@@ -0,0 +1,114 @@
+"""
+Contagem de visualizações das postagens em lote.
+
+Cada impressão passa por uma deduplicação por (usuário, postagem, janela)
+no cache e, se for nova, só incrementa um contador em memória. O buffer é
+descarregado no banco quando junta VISUALIZACOES_LOTE impressões ou
+VISUALIZACOES_INTERVALO segundos depois da primeira pendente, com um
+UPDATE por valor de incremento (não um por impressão). O processo também
+descarrega ao sair normalmente (atexit).
+
+O buffer é só deste processo: nenhum outro processo consegue esvaziá-lo.
+Um worker morto à força (SIGKILL, OOM) perde o que estava pendente, no
+máximo VISUALIZACOES_LOTE impressões ou VISUALIZACOES_INTERVALO segundos,
+o que é aceitável para um contador aproximado como este.
+"""
+import atexit
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+
+
+class BufferVisualizacoes:
+    """Incrementos de Postagem.visualizacoes pendentes neste processo"""
+
+    def __init__(self):
+        self._pendentes = Counter()   # postagem_id -> visualizações novas
+        self._total = 0
+        self._lock = threading.Lock()
+        self._timer = None
+
+    @staticmethod
+    def _configuracao():
+        return (
+            getattr(settings, 'VISUALIZACOES_JANELA', 1800),
+            getattr(settings, 'VISUALIZACOES_LOTE', 500),
+            getattr(settings, 'VISUALIZACOES_INTERVALO', 30),
+        )
+
+    def registrar(self, usuario_id, postagem_ids):
+        """
+        Registra que o usuário viu as postagens. Repetições dentro da
+        janela não contam. Retorna quantas impressões novas entraram.
+        """
+        janela, lote, intervalo = self._configuracao()
+        novas = [
+            pk for pk in postagem_ids
+            if cache.add(f'feed:visualizacao:{usuario_id}:{pk}', True, janela)
+        ]
+        if not novas:
+            return 0
+
+        with self._lock:
+            self._pendentes.update(novas)
+            self._total += len(novas)
+            cheio = self._total >= lote
+            if not cheio and self._timer is None:
+                self._timer = threading.Timer(intervalo, self._ao_expirar)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if cheio:
+            self.descarregar()
+        return len(novas)
+
+    def _ao_expirar(self):
+        try:
+            self.descarregar()
+        finally:
+            # A thread do timer abriu sua própria conexão
+            connection.close()
+
+    def descarregar(self):
+        """Grava os incrementos pendentes no banco. Retorna o total gravado."""
+        from .models import Postagem
+
+        with self._lock:
+            pendentes, self._pendentes = self._pendentes, Counter()
+            self._total = 0
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not pendentes:
+            return 0
+
+        # Um UPDATE por valor de incremento
+        por_incremento = defaultdict(list)
+        for pk, vistas in pendentes.items():
+            por_incremento[vistas].append(pk)
+        try:
+            with transaction.atomic():
+                for vistas, ids in por_incremento.items():
+                    Postagem.objects.filter(id__in=ids).update(
+                        visualizacoes=F('visualizacoes') + vistas
+                    )
+        except Exception:
+            # Devolve ao buffer para a próxima tentativa
+            with self._lock:
+                self._pendentes.update(pendentes)
+                self._total += sum(pendentes.values())
+            raise
+        return sum(pendentes.values())
+
+    def pendentes(self):
+        with self._lock:
+            return self._total
+
+
+# Instância única por processo
+buffer_visualizacoes = BufferVisualizacoes()
+atexit.register(buffer_visualizacoes.descarregar)
@@ -3,6 +3,9 @@ ASGI config for meache project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+HTTP requests go to Django; WebSocket connections (``/ws/chat/<id>/``) go to
+the real-time chat delivery in ``chat.tempo_real``.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -13,4 +16,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'meache.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Importado após o setup do Django (usa settings e models)
+from chat.tempo_real import aplicacao_websocket  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        await aplicacao_websocket(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     'feed',
     'chat',
     'assinaturas',
+    'midia',
 ]
 
 MIDDLEWARE = [
@@ -145,3 +146,47 @@ AUTH_USER_MODEL = 'usuarios.Usuario'
 LOGIN_URL = 'usuarios:login'
 LOGIN_REDIRECT_URL = 'feed:home'
 LOGOUT_REDIRECT_URL = 'usuarios:login'
+
+# Geolocalização
+# Raio (km) coberto pelo índice pré-calculado de cidades vizinhas
+VIZINHANCA_CIDADES_RAIO_KM = config('VIZINHANCA_CIDADES_RAIO_KM', default=200, cast=int)
+
+# Explorar (ranking de candidatos)
+EXPLORAR_PONTUADOR = 'feed.pontuacao.PontuadorCompatibilidade'
+EXPLORAR_MAX_CANDIDATOS = config('EXPLORAR_MAX_CANDIDATOS', default=5000, cast=int)
+
+# Fila pré-calculada de candidatos (deck) do explorar
+FILA_CANDIDATOS_TAMANHO = config('FILA_CANDIDATOS_TAMANHO', default=500, cast=int)
+FILA_CANDIDATOS_MINIMO = config('FILA_CANDIDATOS_MINIMO', default=50, cast=int)
+
+# Índice invertido de tags em memória (recarregado após a validade, em segundos)
+INDICE_TAGS_VALIDADE = config('INDICE_TAGS_VALIDADE', default=300, cast=int)
+
+# Timelines personalizadas do feed (fan-out na escrita)
+TIMELINE_TAMANHO = config('TIMELINE_TAMANHO', default=800, cast=int)
+# Autores com mais seguidores que isso não são distribuídos; suas postagens são lidas na hora
+TIMELINE_LIMITE_FANOUT = config('TIMELINE_LIMITE_FANOUT', default=5000, cast=int)
+
+# Visualizações das postagens (buffer em memória, gravado em lote)
+VISUALIZACOES_JANELA = config('VISUALIZACOES_JANELA', default=1800, cast=int)  # deduplicação por usuário, em segundos
+VISUALIZACOES_LOTE = config('VISUALIZACOES_LOTE', default=500, cast=int)
+VISUALIZACOES_INTERVALO = config('VISUALIZACOES_INTERVALO', default=30, cast=int)
+
+# Processamento de mídia em segundo plano (comando processar_midia)
+MIDIA_TENTATIVAS = config('MIDIA_TENTATIVAS', default=3, cast=int)
+MIDIA_VIDEO_TAMANHO_MAXIMO = config('MIDIA_VIDEO_TAMANHO_MAXIMO', default=200 * 1024 * 1024, cast=int)  # bytes
+MIDIA_VIDEO_DURACAO_MAXIMA = config('MIDIA_VIDEO_DURACAO_MAXIMA', default=300, cast=int)  # segundos
+
+# Upload de vídeo em pedaços (API em /midia/uploads/)
+MIDIA_UPLOAD_PEDACO_MAXIMO = config('MIDIA_UPLOAD_PEDACO_MAXIMO', default=5 * 1024 * 1024, cast=int)  # bytes
+MIDIA_UPLOAD_VALIDADE_HORAS = config('MIDIA_UPLOAD_VALIDADE_HORAS', default=24, cast=int)
+
+# Chat em tempo real (WebSocket servido pelo meache/asgi.py)
+# Canal de publicação; o padrão só alcança clientes conectados ao mesmo processo
+CHAT_CANAL = 'chat.tempo_real.CanalLocal'
+# Eventos pendentes por conexão antes de derrubar um cliente lento
+CHAT_FILA_MAXIMA = config('CHAT_FILA_MAXIMA', default=100, cast=int)
+# Mensagens por janela do histórico da conversa (paginado por cursor)
+CHAT_MENSAGENS_POR_PAGINA = config('CHAT_MENSAGENS_POR_PAGINA', default=30, cast=int)
+# Conversas por página na caixa de entrada
+CHAT_CONVERSAS_POR_PAGINA = config('CHAT_CONVERSAS_POR_PAGINA', default=30, cast=int)
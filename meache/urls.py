@@ -36,6 +36,7 @@ urlpatterns = [
     path('feed/', include('feed.urls')),
     path('chat/', include('chat.urls')),
     path('assinaturas/', include('assinaturas.urls')),
+    path('midia/', include('midia.urls')),
 ]
 
 # Serve media files in development
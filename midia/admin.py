@@ -0,0 +1,23 @@
+from django.contrib import admin
+from .models import ArquivoConteudo, SessaoUpload, TarefaMidia
+
+
+@admin.register(TarefaMidia)
+class TarefaMidiaAdmin(admin.ModelAdmin):
+    list_display = ('tipo', 'content_type', 'objeto_id', 'campo', 'status', 'tentativas', 'data_criacao', 'data_conclusao')
+    list_filter = ('tipo', 'status', 'content_type')
+    readonly_fields = ('data_criacao', 'data_inicio', 'data_conclusao', 'erro')
+
+
+@admin.register(SessaoUpload)
+class SessaoUploadAdmin(admin.ModelAdmin):
+    list_display = ('nome_arquivo', 'usuario', 'recebido', 'tamanho_total', 'status', 'data_atualizacao')
+    list_filter = ('status',)
+    search_fields = ('usuario__username', 'nome_arquivo')
+
+
+@admin.register(ArquivoConteudo)
+class ArquivoConteudoAdmin(admin.ModelAdmin):
+    list_display = ('nome', 'tamanho', 'referencias', 'data_criacao', 'data_ultimo_envio')
+    search_fields = ('hash', 'nome')
+    readonly_fields = ('hash', 'nome', 'tamanho', 'referencias', 'data_criacao', 'data_ultimo_envio')
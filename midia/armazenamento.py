@@ -0,0 +1,159 @@
+"""
+Storage endereçado por conteúdo (SHA-256), com deduplicação.
+
+Um arquivo enviado é gravado uma única vez em
+
+    cas/<h[0:2]>/<h[2:4]>/<sha256><extensão>
+
+qualquer que seja o upload_to do campo; reenviar a mesma foto, repostar a
+mesma imagem ou mandar o mesmo arquivo no chat só aponta para o blob que
+já existe. Como os nomes das variantes (midia.imagens) derivam do nome do
+original, miniaturas de um blob repetido também não são geradas de novo.
+
+A chave é o hash dos bytes enviados; o worker pode reescrever o blob no
+mesmo nome (ex.: removendo o EXIF) sem quebrar a deduplicação. Os blobs
+são compartilhados, então `delete` não apaga nada em cas/: o comando
+`coletar_midia` reconta as referências em todos os campos que usam este
+storage e remove os blobs sem nenhuma. Arquivos antigos, gravados antes
+deste storage, continuam sendo lidos pelos nomes originais.
+"""
+import hashlib
+import os
+import tempfile
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.db.models import FileField
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+
+PREFIXO = 'cas/'
+
+
+@deconstructible
+class ArmazenamentoConteudo(FileSystemStorage):
+    """FileSystemStorage que nomeia os arquivos pelo SHA-256 do conteúdo"""
+
+    def get_available_name(self, name, max_length=None):
+        # O nome final é decidido em _save
+        return name
+
+    def _save(self, name, content):
+        if hasattr(content, 'seekable') and content.seekable():
+            content.seek(0)
+        temporario, digest, tamanho = self._gravar_temporario(content)
+
+        if name.startswith(PREFIXO):
+            # Derivados (variantes) e regravações usam o nome pedido
+            final = name
+        else:
+            extensao = os.path.splitext(name)[1].lower()
+            final = f'{PREFIXO}{digest[:2]}/{digest[2:4]}/{digest}{extensao}'
+
+        caminho = self.path(final)
+        if not name.startswith(PREFIXO) and os.path.exists(caminho):
+            os.unlink(temporario)
+        else:
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            os.replace(temporario, caminho)
+            if self.file_permissions_mode is not None:
+                os.chmod(caminho, self.file_permissions_mode)
+
+        if not name.startswith(PREFIXO):
+            self._registrar(final, digest, tamanho)
+        return final
+
+    def _gravar_temporario(self, content):
+        """Copia o conteúdo em blocos para um temporário, calculando o hash"""
+        diretorio = self.path(f'{PREFIXO}tmp')
+        os.makedirs(diretorio, exist_ok=True)
+        sha = hashlib.sha256()
+        tamanho = 0
+        with tempfile.NamedTemporaryFile(dir=diretorio, delete=False) as temporario:
+            for bloco in content.chunks():
+                sha.update(bloco)
+                temporario.write(bloco)
+                tamanho += len(bloco)
+        return temporario.name, sha.hexdigest(), tamanho
+
+    @staticmethod
+    def _registrar(nome, digest, tamanho):
+        """Cria o registro do blob ou marca o reaproveitamento (protege da coleta)"""
+        from .models import ArquivoConteudo
+
+        ArquivoConteudo.objects.update_or_create(
+            hash=digest,
+            defaults={'nome': nome, 'tamanho': tamanho, 'data_ultimo_envio': timezone.now()},
+        )
+
+    def delete(self, name):
+        # Blobs são compartilhados: quem apaga é a coleta de lixo
+        if name and name.startswith(PREFIXO):
+            return
+        super().delete(name)
+
+    def apagar_blob(self, name):
+        super().delete(name)
+
+
+armazenamento_conteudo = ArmazenamentoConteudo()
+
+
+def obter_armazenamento():
+    """Callable usado nos campos de arquivo (mantém as migrações estáveis)"""
+    return armazenamento_conteudo
+
+
+def campos_enderecados():
+    """(modelo, nome do campo) de todos os FileFields que usam este storage"""
+    return [
+        (modelo, campo.name)
+        for modelo in apps.get_models()
+        for campo in modelo._meta.get_fields()
+        if isinstance(campo, FileField) and isinstance(campo.storage, ArmazenamentoConteudo)
+    ]
+
+
+def contar_referencias():
+    """hash -> quantas linhas (de qualquer modelo) apontam para o blob"""
+    referencias = Counter()
+    for modelo, campo in campos_enderecados():
+        nomes = modelo._default_manager.filter(
+            **{f'{campo}__startswith': PREFIXO}
+        ).values_list(campo, flat=True)
+        for nome in nomes.iterator(chunk_size=5000):
+            referencias[os.path.splitext(os.path.basename(nome))[0]] += 1
+    return referencias
+
+
+def coletar_lixo(carencia_horas=24):
+    """
+    Recalcula as referências de cada blob e apaga os sem referência cujo
+    último envio foi há mais de `carencia_horas` (a carência protege
+    uploads que ainda não chegaram a ser salvos no modelo).
+    Retorna (blobs removidos, bytes liberados).
+    """
+    from .imagens import remover_variantes
+    from .models import ArquivoConteudo
+
+    referencias = contar_referencias()
+    alterados = []
+    for arquivo in ArquivoConteudo.objects.iterator(chunk_size=5000):
+        total = referencias.get(arquivo.hash, 0)
+        if total != arquivo.referencias:
+            arquivo.referencias = total
+            alterados.append(arquivo)
+    ArquivoConteudo.objects.bulk_update(alterados, ['referencias'], batch_size=500)
+
+    limite = timezone.now() - timedelta(hours=carencia_horas)
+    removidos = liberados = 0
+    for arquivo in ArquivoConteudo.objects.filter(referencias=0, data_ultimo_envio__lt=limite).iterator():
+        remover_variantes(armazenamento_conteudo, arquivo.nome)
+        armazenamento_conteudo.apagar_blob(arquivo.nome)
+        arquivo.delete()
+        removidos += 1
+        liberados += arquivo.tamanho
+    return removidos, liberados
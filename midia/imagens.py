@@ -0,0 +1,144 @@
+"""
+Derivados das imagens enviadas (fotos de perfil e imagens de postagens).
+
+Para cada imagem original gera, ao lado dela no storage, uma versão JPEG e
+uma WebP de cada tamanho em IMAGEM_VARIANTES, sem EXIF e já rotacionadas
+conforme a orientação da câmera. O EXIF também é removido do original
+(tira, por exemplo, a localização do GPS). Os nomes são determinísticos:
+
+    perfis/foto.jpg -> perfis/foto__mini.jpg, perfis/foto__mini.webp, ...
+
+então os templates montam a URL de um tamanho sem consultar o banco.
+"""
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+
+# nome -> (largura máxima, recortar em quadrado)
+VARIANTES = {
+    'mini': (96, True),      # avatares em listas, chat, busca
+    'card': (480, False),    # cards do feed e do explorar
+    'grande': (1080, False), # perfil e detalhes da postagem
+}
+
+QUALIDADE_JPEG = 82
+QUALIDADE_WEBP = 80
+
+
+def variantes():
+    return getattr(settings, 'IMAGEM_VARIANTES', VARIANTES)
+
+
+def nome_variante(nome, variante, formato='jpg'):
+    """Nome no storage da variante de um arquivo original"""
+    base, _ = os.path.splitext(nome)
+    return f'{base}__{variante}.{formato}'
+
+
+def _sem_exif(imagem):
+    """Aplica a orientação do EXIF e devolve uma cópia sem metadados"""
+    imagem = ImageOps.exif_transpose(imagem)
+    if imagem.mode not in ('RGB', 'RGBA'):
+        imagem = imagem.convert('RGBA' if 'A' in imagem.getbands() else 'RGB')
+    limpa = Image.new(imagem.mode, imagem.size)
+    limpa.paste(imagem)
+    return limpa
+
+
+def _redimensionar(imagem, largura, quadrado):
+    if quadrado:
+        return ImageOps.fit(imagem, (largura, largura), Image.LANCZOS)
+    if imagem.width <= largura:
+        return imagem.copy()
+    altura = round(imagem.height * largura / imagem.width)
+    return imagem.resize((largura, altura), Image.LANCZOS)
+
+
+def _salvar(storage, nome, imagem, formato, **opcoes):
+    buffer = BytesIO()
+    imagem.save(buffer, formato, **opcoes)
+    if storage.exists(nome):
+        storage.delete(nome)
+    return storage.save(nome, ContentFile(buffer.getvalue()))
+
+
+def _sobre_fundo_branco(imagem):
+    if imagem.mode != 'RGBA':
+        return imagem
+    fundo = Image.new('RGB', imagem.size, (255, 255, 255))
+    fundo.paste(imagem, mask=imagem.getchannel('A'))
+    return fundo
+
+
+def gerar_variantes(arquivo):
+    """
+    Gera as variantes de um FieldFile de imagem e remove o EXIF do original.
+    Retorna a lista de nomes gravados (vazia se as variantes já existiam);
+    levanta ValueError se não for imagem.
+    """
+    storage, nome = arquivo.storage, arquivo.name
+    if all(
+        storage.exists(nome_variante(nome, variante, formato))
+        for variante in variantes() for formato in ('jpg', 'webp')
+    ):
+        # Mesmo arquivo já processado (ex.: blob deduplicado pelo storage)
+        return []
+    try:
+        with storage.open(nome, 'rb') as entrada:
+            original = Image.open(entrada)
+            formato_original = original.format
+            tinha_exif = bool(original.getexif())
+            imagem = _sem_exif(original)
+    except (UnidentifiedImageError, OSError) as erro:
+        raise ValueError(f'{nome} não é uma imagem válida') from erro
+
+    gravados = []
+    if tinha_exif and formato_original in ('JPEG', 'PNG', 'WEBP'):
+        salvar_como = _sobre_fundo_branco(imagem) if formato_original == 'JPEG' else imagem
+        gravados.append(_salvar(storage, nome, salvar_como, formato_original, quality=QUALIDADE_JPEG))
+
+    for variante, (largura, quadrado) in variantes().items():
+        reduzida = _redimensionar(imagem, largura, quadrado)
+        gravados.append(_salvar(
+            storage, nome_variante(nome, variante, 'webp'), reduzida, 'WEBP',
+            quality=QUALIDADE_WEBP, method=4,
+        ))
+        gravados.append(_salvar(
+            storage, nome_variante(nome, variante, 'jpg'), _sobre_fundo_branco(reduzida), 'JPEG',
+            quality=QUALIDADE_JPEG, optimize=True, progressive=True,
+        ))
+    return gravados
+
+
+# Variantes já vistas no storage; só guarda acertos, que não mudam
+_existentes = set()
+
+
+def remover_variantes(storage, nome):
+    """Apaga as variantes de um original (ex.: quando a foto é trocada)"""
+    for variante in variantes():
+        for formato in ('jpg', 'webp'):
+            nome_derivado = nome_variante(nome, variante, formato)
+            _existentes.discard(nome_derivado)
+            if storage.exists(nome_derivado):
+                # Storage endereçado por conteúdo ignora delete() de blobs compartilhados
+                getattr(storage, 'apagar_blob', storage.delete)(nome_derivado)
+
+
+def url_variante(arquivo, variante, formato='jpg'):
+    """
+    URL da variante, ou do original enquanto ela ainda não foi gerada.
+    Retorna '' para campo vazio.
+    """
+    if not arquivo:
+        return ''
+    nome = nome_variante(arquivo.name, variante, formato)
+    if nome not in _existentes:
+        if not arquivo.storage.exists(nome):
+            return arquivo.url
+        _existentes.add(nome)
+    return arquivo.storage.url(nome)
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from midia.armazenamento import coletar_lixo
+
+
+class Command(BaseCommand):
+    help = 'Recalcula as referências dos arquivos endereçados por conteúdo e apaga os sem uso'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--carencia',
+            type=int,
+            help='Horas desde o último envio antes de um arquivo sem referência ser apagado',
+            default=24
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Contando referências...')
+        removidos, liberados = coletar_lixo(options['carencia'])
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Coleta concluída! {removidos} arquivos removidos, {liberados / (1024 * 1024):.1f} MB liberados.'
+            )
+        )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from midia.uploads import limpar_expiradas
+
+
+class Command(BaseCommand):
+    help = 'Cancela sessões de upload abandonadas e apaga os arquivos parciais'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horas',
+            type=int,
+            help='Idade mínima (horas sem receber pedaços) para cancelar a sessão',
+            default=None
+        )
+
+    def handle(self, *args, **options):
+        canceladas = limpar_expiradas(options['horas'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Limpeza concluída! {canceladas} sessões canceladas.')
+        )
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+from midia.tarefas import processar_lote, recuperar_travadas
+
+
+class Command(BaseCommand):
+    help = 'Processa as tarefas de mídia pendentes (variantes de imagem, validação e capa de vídeo)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--continuo',
+            action='store_true',
+            help='Continuar rodando e consultar a fila periodicamente (modo worker)'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            help='Segundos de espera quando a fila está vazia (modo contínuo)',
+            default=2.0
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            help='Tarefas reservadas por vez',
+            default=10
+        )
+
+    def handle(self, *args, **options):
+        recuperadas = recuperar_travadas()
+        if recuperadas:
+            self.stdout.write(f'  ↺ {recuperadas} tarefas travadas devolvidas à fila')
+        
+        total_concluidas = total_erros = 0
+        while True:
+            concluidas, com_erro = processar_lote(options['lote'])
+            total_concluidas += concluidas
+            total_erros += com_erro
+            if concluidas or com_erro:
+                self.stdout.write(f'  ✓ {concluidas} concluídas, {com_erro} com erro')
+                continue
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Processamento concluído! {total_concluidas} tarefas, {total_erros} com erro.')
+        )
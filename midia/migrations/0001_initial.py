@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-17 17:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TarefaMidia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('imagem', 'Variantes de Imagem'), ('video', 'Validação e Capa de Vídeo')], max_length=20, verbose_name='Tipo')),
+                ('objeto_id', models.PositiveBigIntegerField(verbose_name='ID do Objeto')),
+                ('campo', models.CharField(max_length=50, verbose_name='Campo')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('processando', 'Processando'), ('concluida', 'Concluída'), ('erro', 'Erro')], default='pendente', max_length=20, verbose_name='Status')),
+                ('tentativas', models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')),
+                ('erro', models.TextField(blank=True, verbose_name='Erro')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+                ('disponivel_em', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Disponível em')),
+                ('data_inicio', models.DateTimeField(blank=True, null=True, verbose_name='Início do Processamento')),
+                ('data_conclusao', models.DateTimeField(blank=True, null=True, verbose_name='Data de Conclusão')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype', verbose_name='Modelo')),
+            ],
+            options={
+                'verbose_name': 'Tarefa de Mídia',
+                'verbose_name_plural': 'Tarefas de Mídia',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'disponivel_em'], name='tarefa_midia_fila_idx'), models.Index(fields=['content_type', 'objeto_id'], name='tarefa_midia_objeto_idx')],
+            },
+        ),
+    ]
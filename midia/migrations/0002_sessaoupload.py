@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-17 17:58
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('feed', '0007_midia_postagem'),
+        ('midia', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessaoUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('nome_arquivo', models.CharField(max_length=255, verbose_name='Nome do Arquivo')),
+                ('tamanho_total', models.PositiveBigIntegerField(verbose_name='Tamanho Total (bytes)')),
+                ('recebido', models.PositiveBigIntegerField(default=0, verbose_name='Bytes Recebidos')),
+                ('status', models.CharField(choices=[('aberta', 'Aberta'), ('concluida', 'Concluída'), ('cancelada', 'Cancelada')], default='aberta', max_length=20, verbose_name='Status')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+                ('data_atualizacao', models.DateTimeField(auto_now=True, verbose_name='Data de Atualização')),
+                ('postagem', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='feed.postagem', verbose_name='Postagem')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sessoes_upload', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Sessão de Upload',
+                'verbose_name_plural': 'Sessões de Upload',
+                'indexes': [models.Index(fields=['status', 'data_atualizacao'], name='sessao_upload_status_idx')],
+            },
+        ),
+    ]
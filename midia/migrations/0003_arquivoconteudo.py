@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:15
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('midia', '0002_sessaoupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArquivoConteudo',
+            fields=[
+                ('hash', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='SHA-256')),
+                ('nome', models.CharField(max_length=255, verbose_name='Nome no Storage')),
+                ('tamanho', models.PositiveBigIntegerField(verbose_name='Tamanho (bytes)')),
+                ('referencias', models.PositiveIntegerField(default=0, verbose_name='Referências')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+                ('data_ultimo_envio', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Último Envio')),
+            ],
+            options={
+                'verbose_name': 'Arquivo (Conteúdo)',
+                'verbose_name_plural': 'Arquivos (Conteúdo)',
+                'indexes': [models.Index(fields=['referencias', 'data_ultimo_envio'], name='arquivo_conteudo_coleta_idx')],
+            },
+        ),
+    ]
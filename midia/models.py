@@ -0,0 +1,105 @@
+import uuid
+
+from django.conf import settings
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.utils import timezone
+
+
+class TarefaMidia(models.Model):
+    """Processamento de mídia pendente (fila local, consumida pelo comando processar_midia)"""
+    
+    TIPO_CHOICES = [
+        ('imagem', 'Variantes de Imagem'),
+        ('video', 'Validação e Capa de Vídeo'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('pendente', 'Pendente'),
+        ('processando', 'Processando'),
+        ('concluida', 'Concluída'),
+        ('erro', 'Erro'),
+    ]
+    
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES, verbose_name="Tipo")
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, verbose_name="Modelo")
+    objeto_id = models.PositiveBigIntegerField(verbose_name="ID do Objeto")
+    objeto = GenericForeignKey('content_type', 'objeto_id')
+    campo = models.CharField(max_length=50, verbose_name="Campo")
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pendente', verbose_name="Status")
+    tentativas = models.PositiveSmallIntegerField(default=0, verbose_name="Tentativas")
+    erro = models.TextField(blank=True, verbose_name="Erro")
+    
+    data_criacao = models.DateTimeField(auto_now_add=True, verbose_name="Data de Criação")
+    disponivel_em = models.DateTimeField(default=timezone.now, verbose_name="Disponível em")
+    data_inicio = models.DateTimeField(null=True, blank=True, verbose_name="Início do Processamento")
+    data_conclusao = models.DateTimeField(null=True, blank=True, verbose_name="Data de Conclusão")
+    
+    class Meta:
+        verbose_name = "Tarefa de Mídia"
+        verbose_name_plural = "Tarefas de Mídia"
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'disponivel_em'], name='tarefa_midia_fila_idx'),
+            models.Index(fields=['content_type', 'objeto_id'], name='tarefa_midia_objeto_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_tipo_display()} {self.content_type.model}#{self.objeto_id}.{self.campo} ({self.status})"
+
+
+class SessaoUpload(models.Model):
+    """Upload de vídeo em pedaços, retomável (ver midia.uploads)"""
+    
+    STATUS_CHOICES = [
+        ('aberta', 'Aberta'),
+        ('concluida', 'Concluída'),
+        ('cancelada', 'Cancelada'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='sessoes_upload', verbose_name="Usuário")
+    nome_arquivo = models.CharField(max_length=255, verbose_name="Nome do Arquivo")
+    tamanho_total = models.PositiveBigIntegerField(verbose_name="Tamanho Total (bytes)")
+    recebido = models.PositiveBigIntegerField(default=0, verbose_name="Bytes Recebidos")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='aberta', verbose_name="Status")
+    postagem = models.ForeignKey('feed.Postagem', on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name="Postagem")
+    data_criacao = models.DateTimeField(auto_now_add=True, verbose_name="Data de Criação")
+    data_atualizacao = models.DateTimeField(auto_now=True, verbose_name="Data de Atualização")
+    
+    class Meta:
+        verbose_name = "Sessão de Upload"
+        verbose_name_plural = "Sessões de Upload"
+        indexes = [
+            models.Index(fields=['status', 'data_atualizacao'], name='sessao_upload_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.nome_arquivo} ({self.recebido}/{self.tamanho_total})"
+    
+    @property
+    def completo(self):
+        return self.recebido == self.tamanho_total
+
+
+class ArquivoConteudo(models.Model):
+    """Blob do storage endereçado por conteúdo (ver midia.armazenamento)"""
+    
+    hash = models.CharField(max_length=64, primary_key=True, verbose_name="SHA-256")
+    nome = models.CharField(max_length=255, verbose_name="Nome no Storage")
+    tamanho = models.PositiveBigIntegerField(verbose_name="Tamanho (bytes)")
+    referencias = models.PositiveIntegerField(default=0, verbose_name="Referências")
+    data_criacao = models.DateTimeField(auto_now_add=True, verbose_name="Data de Criação")
+    data_ultimo_envio = models.DateTimeField(default=timezone.now, verbose_name="Último Envio")
+    
+    class Meta:
+        verbose_name = "Arquivo (Conteúdo)"
+        verbose_name_plural = "Arquivos (Conteúdo)"
+        indexes = [
+            models.Index(fields=['referencias', 'data_ultimo_envio'], name='arquivo_conteudo_coleta_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.nome} ({self.referencias} ref.)"
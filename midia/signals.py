@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from feed.models import Postagem
+
+from .tarefas import enfileirar
+
+Usuario = get_user_model()
+
+# Campos de arquivo processados pelo worker ao receber upload: campo -> tipo da tarefa
+CAMPOS_MIDIA = {
+    Usuario: {'foto_perfil': 'imagem', 'foto_perfil_parceiro': 'imagem'},
+    Postagem: {'imagem': 'imagem', 'video': 'video'},
+}
+
+
+@receiver(pre_save, sender=Usuario)
+@receiver(pre_save, sender=Postagem)
+def detectar_upload(sender, instance, **kwargs):
+    """
+    Antes do save o arquivo enviado ainda não foi gravado (_committed=False);
+    é assim que sabemos, sem consultar o banco, quais campos mudaram.
+    """
+    instance._midias_novas = [
+        campo for campo in CAMPOS_MIDIA[sender]
+        if getattr(instance, campo) and not getattr(instance, campo)._committed
+    ]
+    if instance._midias_novas and hasattr(instance, 'status_midia'):
+        instance.status_midia = 'processando'
+
+
+@receiver(post_save, sender=Usuario)
+@receiver(post_save, sender=Postagem)
+def enfileirar_upload(sender, instance, **kwargs):
+    """O processamento fica para o worker (comando processar_midia)"""
+    for campo in getattr(instance, '_midias_novas', ()):
+        enfileirar(instance, campo, CAMPOS_MIDIA[sender][campo])
+    instance._midias_novas = []
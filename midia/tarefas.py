@@ -0,0 +1,141 @@
+"""
+Fila local de processamento de mídia, guardada no banco.
+
+Os uploads só gravam o arquivo e enfileiram uma TarefaMidia; o comando
+`processar_midia` (worker) reserva as tarefas e faz o trabalho pesado
+fora da requisição: variantes de imagem, validação e capa de vídeo.
+Enquanto houver tarefa de uma postagem, ela fica com status_midia
+'processando'. Falhas são repetidas com espera crescente até
+MIDIA_TENTATIVAS vezes.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .imagens import gerar_variantes
+from .models import TarefaMidia
+from .video import VideoInvalido, caminho_local, extrair_poster, validar
+
+
+def maximo_tentativas():
+    return getattr(settings, 'MIDIA_TENTATIVAS', 3)
+
+
+def enfileirar(instancia, campo, tipo):
+    return TarefaMidia.objects.create(
+        tipo=tipo,
+        content_type=ContentType.objects.get_for_model(instancia),
+        objeto_id=instancia.pk,
+        campo=campo,
+    )
+
+
+def reservar(limite=10):
+    """Marca até `limite` tarefas disponíveis como 'processando' e as retorna"""
+    agora = timezone.now()
+    with transaction.atomic():
+        disponiveis = TarefaMidia.objects.filter(status='pendente', disponivel_em__lte=agora).order_by('id')
+        if connection.features.has_select_for_update_skip_locked:
+            disponiveis = disponiveis.select_for_update(skip_locked=True)
+        candidatas = list(disponiveis.values_list('id', flat=True)[:limite])
+        # Sem SKIP LOCKED (SQLite) dois workers podem ver as mesmas tarefas:
+        # fica com cada uma quem conseguir mudar o status dela
+        reservadas = [
+            pk for pk in candidatas
+            if TarefaMidia.objects.filter(id=pk, status='pendente').update(
+                status='processando', tentativas=F('tentativas') + 1, data_inicio=agora
+            )
+        ]
+    return list(TarefaMidia.objects.filter(id__in=reservadas).select_related('content_type'))
+
+
+def recuperar_travadas(minutos=30):
+    """Devolve à fila tarefas 'processando' de um worker que morreu"""
+    limite = timezone.now() - timedelta(minutes=minutos)
+    return TarefaMidia.objects.filter(status='processando', data_inicio__lt=limite).update(status='pendente')
+
+
+def _processar_imagem(objeto, campo):
+    arquivo = getattr(objeto, campo)
+    if arquivo:
+        gerar_variantes(arquivo)
+
+
+def _processar_video(objeto, campo):
+    arquivo = getattr(objeto, campo)
+    if not arquivo:
+        return
+    with caminho_local(arquivo) as caminho:
+        duracao = validar(caminho)
+        poster = extrair_poster(caminho, duracao)
+    if poster and hasattr(objeto, 'video_poster'):
+        objeto.video_poster.save(f'{objeto.pk}.jpg', ContentFile(poster), save=False)
+        gerar_variantes(objeto.video_poster)
+        # update() para não disparar os sinais de upload de novo
+        type(objeto).objects.filter(pk=objeto.pk).update(video_poster=objeto.video_poster.name)
+
+
+PROCESSADORES = {
+    'imagem': _processar_imagem,
+    'video': _processar_video,
+}
+
+
+def _atualizar_status(tarefa, falhou=False):
+    """Postagens: 'erro' se a tarefa falhou de vez, 'pronta' se não resta nenhuma pendente"""
+    modelo = tarefa.content_type.model_class()
+    if not any(campo.name == 'status_midia' for campo in modelo._meta.fields):
+        return
+    if falhou:
+        status = 'erro'
+    elif TarefaMidia.objects.filter(
+        content_type=tarefa.content_type, objeto_id=tarefa.objeto_id,
+        status__in=['pendente', 'processando'],
+    ).exists():
+        return
+    else:
+        status = 'pronta'
+    modelo.objects.filter(pk=tarefa.objeto_id).exclude(status_midia='erro').update(status_midia=status)
+
+
+def executar(tarefa):
+    """Roda uma tarefa reservada. Retorna True se concluiu."""
+    # O objeto pode ter sido apagado depois do upload
+    objeto = tarefa.content_type.model_class()._default_manager.filter(pk=tarefa.objeto_id).first()
+    try:
+        if objeto is not None:
+            PROCESSADORES[tarefa.tipo](objeto, tarefa.campo)
+    except (VideoInvalido, ValueError) as erro:
+        # Arquivo inválido: repetir não adianta
+        tarefa.status, tarefa.erro = 'erro', str(erro)
+    except Exception as erro:
+        tarefa.erro = f'{type(erro).__name__}: {erro}'
+        if tarefa.tentativas >= maximo_tentativas():
+            tarefa.status = 'erro'
+        else:
+            tarefa.status = 'pendente'
+            tarefa.disponivel_em = timezone.now() + timedelta(minutes=2 ** tarefa.tentativas)
+    else:
+        tarefa.status, tarefa.erro = 'concluida', ''
+    
+    tarefa.data_conclusao = timezone.now() if tarefa.status in ('concluida', 'erro') else None
+    tarefa.save(update_fields=['status', 'erro', 'disponivel_em', 'data_conclusao'])
+    if tarefa.status != 'pendente':
+        _atualizar_status(tarefa, falhou=tarefa.status == 'erro')
+    return tarefa.status == 'concluida'
+
+
+def processar_lote(limite=10):
+    """Reserva e executa um lote. Retorna (concluidas, com_erro)."""
+    concluidas = com_erro = 0
+    for tarefa in reservar(limite):
+        if executar(tarefa):
+            concluidas += 1
+        elif tarefa.status == 'erro':
+            com_erro += 1
+    return concluidas, com_erro
@@ -0,0 +1,46 @@
+from django import template
+from django.utils.html import format_html
+
+from midia.imagens import url_variante, variantes
+
+register = template.Library()
+
+
+@register.filter
+def variante(arquivo, nome):
+    """{{ usuario.foto_perfil|variante:'mini' }} -> URL do JPEG reduzido"""
+    return url_variante(arquivo, nome)
+
+
+@register.simple_tag
+def imagem_responsiva(arquivo, tamanho='card', alt='', classe='', estilo=''):
+    """
+    <picture> com WebP e JPEG do tamanho pedido e dos maiores (srcset por
+    largura), para o navegador escolher conforme a tela.
+    """
+    if not arquivo:
+        return ''
+    largura_pedida, quadrado = variantes()[tamanho]
+    if quadrado:
+        tamanhos = [(tamanho, largura_pedida)]
+    else:
+        tamanhos = sorted(
+            [(nome, largura) for nome, (largura, recorte) in variantes().items()
+             if not recorte and largura >= largura_pedida],
+            key=lambda item: item[1],
+        )
+
+    def srcset(formato):
+        return ', '.join(
+            f'{url_variante(arquivo, nome, formato)} {largura}w' for nome, largura in tamanhos
+        )
+
+    largura = tamanhos[0][1]
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="(max-width: {}px) 100vw, {}px">'
+        '<img src="{}" srcset="{}" sizes="(max-width: {}px) 100vw, {}px" alt="{}" class="{}" style="{}" loading="lazy" decoding="async">'
+        '</picture>',
+        srcset('webp'), largura, largura,
+        url_variante(arquivo, tamanho), srcset('jpg'), largura, largura, alt, classe, estilo,
+    )
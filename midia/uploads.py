@@ -0,0 +1,164 @@
+"""
+Upload de vídeos em pedaços, retomável.
+
+O cliente abre uma sessão informando nome e tamanho do arquivo e envia os
+bytes em PATCHs sequenciais com o cabeçalho `Upload-Offset` (como no
+protocolo tus). Cada pedaço é lido do corpo da requisição em blocos, com
+o limite MIDIA_UPLOAD_PEDACO_MAXIMO aplicado durante a leitura, e anexado
+a um arquivo parcial em disco; o vídeo inteiro nunca fica em memória.
+Se a conexão cair, o cliente consulta a sessão e continua do `recebido`.
+Ao concluir, o arquivo é copiado em blocos para o storage e vira uma
+Postagem de vídeo, processada pelo worker de mídia.
+"""
+import os
+from datetime import timedelta
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.core.validators import FileExtensionValidator
+from django.db import transaction
+from django.utils import timezone
+
+from feed.models import Postagem
+
+from .models import SessaoUpload
+from .video import tamanho_maximo
+
+
+BLOCO_LEITURA = 64 * 1024
+
+
+class ErroUpload(Exception):
+    status = 400
+
+
+class PedacoGrande(ErroUpload):
+    status = 413
+
+
+class OffsetDivergente(ErroUpload):
+    """O pedaço não começa onde o servidor parou (cliente deve retomar de `recebido`)"""
+    status = 409
+
+
+def pedaco_maximo():
+    return getattr(settings, 'MIDIA_UPLOAD_PEDACO_MAXIMO', 5 * 1024 * 1024)
+
+
+def diretorio_parciais():
+    return Path(getattr(settings, 'MIDIA_UPLOAD_DIRETORIO', Path(settings.MEDIA_ROOT) / 'uploads_parciais'))
+
+
+def caminho_parcial(sessao):
+    return diretorio_parciais() / f'{sessao.id}.part'
+
+
+def extensoes_video():
+    for validador in Postagem._meta.get_field('video').validators:
+        if isinstance(validador, FileExtensionValidator):
+            return validador.allowed_extensions
+    return None
+
+
+def abrir_sessao(usuario, nome_arquivo, tamanho_total):
+    nome_arquivo = os.path.basename(nome_arquivo or '')
+    extensao = os.path.splitext(nome_arquivo)[1].lstrip('.').lower()
+    permitidas = extensoes_video()
+    if not nome_arquivo or (permitidas and extensao not in permitidas):
+        raise ErroUpload('Formato de vídeo não suportado')
+    if tamanho_total <= 0:
+        raise ErroUpload('Tamanho inválido')
+    if tamanho_total > tamanho_maximo():
+        raise PedacoGrande('Vídeo maior que o tamanho máximo permitido')
+    
+    sessao = SessaoUpload.objects.create(
+        usuario=usuario, nome_arquivo=nome_arquivo[:255], tamanho_total=tamanho_total
+    )
+    diretorio_parciais().mkdir(parents=True, exist_ok=True)
+    caminho_parcial(sessao).touch()
+    return sessao
+
+
+def _ler_pedaco(fluxo):
+    """Lê o corpo em blocos, parando assim que passar do limite por pedaço"""
+    limite = pedaco_maximo()
+    pedaco = BytesIO()
+    while True:
+        bloco = fluxo.read(BLOCO_LEITURA)
+        if not bloco:
+            return pedaco.getvalue()
+        pedaco.write(bloco)
+        if pedaco.tell() > limite:
+            raise PedacoGrande(f'Pedaço maior que {limite} bytes')
+
+
+def receber_pedaco(sessao_id, usuario, offset, fluxo):
+    """Anexa um pedaço à sessão. Retorna a sessão atualizada."""
+    dados = _ler_pedaco(fluxo)
+    with transaction.atomic():
+        sessao = SessaoUpload.objects.select_for_update().get(
+            id=sessao_id, usuario=usuario, status='aberta'
+        )
+        if offset != sessao.recebido:
+            raise OffsetDivergente(f'Esperado offset {sessao.recebido}')
+        if sessao.recebido + len(dados) > sessao.tamanho_total:
+            raise PedacoGrande('Pedaço ultrapassa o tamanho declarado')
+        
+        with open(caminho_parcial(sessao), 'r+b') as parcial:
+            # Descarta restos de uma escrita anterior que não chegou ao banco
+            parcial.truncate(sessao.recebido)
+            parcial.seek(sessao.recebido)
+            parcial.write(dados)
+            parcial.flush()
+            os.fsync(parcial.fileno())
+        
+        sessao.recebido += len(dados)
+        sessao.save(update_fields=['recebido', 'data_atualizacao'])
+    return sessao
+
+
+def concluir(sessao_id, usuario, conteudo, localizacao=''):
+    """Transforma o upload completo em uma Postagem de vídeo"""
+    if not (conteudo or '').strip():
+        raise ErroUpload('Escreva algo sobre o vídeo')
+    
+    with transaction.atomic():
+        sessao = SessaoUpload.objects.select_for_update().get(
+            id=sessao_id, usuario=usuario, status='aberta'
+        )
+        if not sessao.completo:
+            raise OffsetDivergente(f'Upload incompleto: {sessao.recebido} de {sessao.tamanho_total} bytes')
+        
+        with open(caminho_parcial(sessao), 'rb') as parcial:
+            postagem = Postagem(
+                autor=usuario, tipo='video', conteudo=conteudo.strip(), localizacao=localizacao,
+                # Ainda não gravado: o storage copia em blocos e os sinais enfileiram o processamento
+                video=File(parcial, name=sessao.nome_arquivo),
+            )
+            postagem.save()
+        
+        sessao.status, sessao.postagem = 'concluida', postagem
+        sessao.save(update_fields=['status', 'postagem', 'data_atualizacao'])
+    
+    caminho_parcial(sessao).unlink(missing_ok=True)
+    return postagem
+
+
+def cancelar(sessao):
+    sessao.status = 'cancelada'
+    sessao.save(update_fields=['status', 'data_atualizacao'])
+    caminho_parcial(sessao).unlink(missing_ok=True)
+
+
+def limpar_expiradas(horas=None):
+    """Cancela sessões abertas paradas há mais de `horas`. Retorna quantas."""
+    horas = horas or getattr(settings, 'MIDIA_UPLOAD_VALIDADE_HORAS', 24)
+    limite = timezone.now() - timedelta(hours=horas)
+    expiradas = SessaoUpload.objects.filter(status='aberta', data_atualizacao__lt=limite)
+    total = 0
+    for sessao in expiradas.iterator():
+        cancelar(sessao)
+        total += 1
+    return total
@@ -0,0 +1,10 @@
+from django.urls import path
+from . import views
+
+app_name = 'midia'
+
+urlpatterns = [
+    path('uploads/', views.abrir_upload, name='abrir_upload'),
+    path('uploads/<uuid:sessao_id>/', views.sessao_upload, name='sessao_upload'),
+    path('uploads/<uuid:sessao_id>/concluir/', views.concluir_upload, name='concluir_upload'),
+]
@@ -0,0 +1,87 @@
+"""
+Validação e capa (poster) de vídeos com ffprobe/ffmpeg.
+
+Os binários são opcionais: sem eles o vídeo passa só pela checagem de
+tamanho e fica sem capa.
+"""
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+class VideoInvalido(ValueError):
+    """Arquivo que não é um vídeo aceito (formato, tamanho ou duração)"""
+
+
+def tamanho_maximo():
+    return getattr(settings, 'MIDIA_VIDEO_TAMANHO_MAXIMO', 200 * 1024 * 1024)
+
+
+def duracao_maxima():
+    return getattr(settings, 'MIDIA_VIDEO_DURACAO_MAXIMA', 300)
+
+
+@contextmanager
+def caminho_local(arquivo):
+    """Caminho em disco do FieldFile (copia para um temporário se o storage for remoto)"""
+    try:
+        yield arquivo.storage.path(arquivo.name)
+        return
+    except NotImplementedError:
+        pass
+    _, extensao = os.path.splitext(arquivo.name)
+    with tempfile.NamedTemporaryFile(suffix=extensao) as temporario:
+        with arquivo.storage.open(arquivo.name, 'rb') as origem:
+            shutil.copyfileobj(origem, temporario)
+        temporario.flush()
+        yield temporario.name
+
+
+def validar(caminho):
+    """
+    Confere tamanho, se há uma trilha de vídeo e a duração.
+    Retorna a duração em segundos (None sem ffprobe).
+    """
+    if os.path.getsize(caminho) > tamanho_maximo():
+        raise VideoInvalido('Vídeo maior que o tamanho máximo permitido')
+    
+    ffprobe = shutil.which('ffprobe')
+    if not ffprobe:
+        return None
+    
+    resultado = subprocess.run(
+        [ffprobe, '-v', 'error', '-print_format', 'json', '-show_format', '-show_streams', caminho],
+        capture_output=True, timeout=60,
+    )
+    if resultado.returncode != 0:
+        raise VideoInvalido('Arquivo de vídeo ilegível')
+    info = json.loads(resultado.stdout or b'{}')
+    if not any(stream.get('codec_type') == 'video' for stream in info.get('streams', [])):
+        raise VideoInvalido('O arquivo não contém vídeo')
+    
+    duracao = float(info.get('format', {}).get('duration') or 0)
+    if duracao > duracao_maxima():
+        raise VideoInvalido('Vídeo mais longo que a duração máxima permitida')
+    return duracao
+
+
+def extrair_poster(caminho, duracao=None):
+    """Quadro do vídeo em JPEG (bytes), ou None sem ffmpeg"""
+    ffmpeg = shutil.which('ffmpeg')
+    if not ffmpeg:
+        return None
+    
+    instante = min(1.0, duracao / 2) if duracao else 0
+    resultado = subprocess.run(
+        [ffmpeg, '-v', 'error', '-ss', str(instante), '-i', caminho,
+         '-frames:v', '1', '-vf', 'scale=min(1080\\,iw):-2', '-f', 'image2', '-c:v', 'mjpeg', 'pipe:1'],
+        capture_output=True, timeout=120,
+    )
+    if resultado.returncode != 0 or not resultado.stdout:
+        return None
+    return resultado.stdout
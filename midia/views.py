@@ -0,0 +1,90 @@
+import json
+
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.urls import reverse
+from django.views.decorators.http import require_http_methods
+
+from . import uploads
+from .models import SessaoUpload
+
+
+def _sessao_json(sessao):
+    return {
+        'id': str(sessao.id),
+        'nome': sessao.nome_arquivo,
+        'tamanho': sessao.tamanho_total,
+        'recebido': sessao.recebido,
+        'status': sessao.status,
+        'pedaco_maximo': uploads.pedaco_maximo(),
+        'url': reverse('midia:sessao_upload', args=[sessao.id]),
+    }
+
+
+def _erro(mensagem, status, **extra):
+    return JsonResponse({'success': False, 'error': mensagem, **extra}, status=status)
+
+
+@login_required
+@require_http_methods(["POST"])
+def abrir_upload(request):
+    """Abre uma sessão de upload de vídeo. Corpo JSON: {"nome": ..., "tamanho": ...}"""
+    try:
+        dados = json.loads(request.body)
+        sessao = uploads.abrir_sessao(request.user, dados.get('nome'), int(dados.get('tamanho', 0)))
+    except (ValueError, TypeError):
+        return _erro('Dados inválidos', 400)
+    except uploads.ErroUpload as erro:
+        return _erro(str(erro), erro.status)
+    
+    return JsonResponse({'success': True, 'sessao': _sessao_json(sessao)}, status=201)
+
+
+@login_required
+@require_http_methods(["GET", "PATCH", "DELETE"])
+def sessao_upload(request, sessao_id):
+    """
+    GET: estado da sessão (para retomar); PATCH: envia um pedaço a partir
+    do cabeçalho Upload-Offset; DELETE: cancela.
+    """
+    try:
+        if request.method == 'PATCH':
+            try:
+                offset = int(request.headers.get('Upload-Offset', ''))
+            except ValueError:
+                return _erro('Cabeçalho Upload-Offset ausente ou inválido', 400)
+            # O corpo é lido em blocos direto da requisição
+            sessao = uploads.receber_pedaco(sessao_id, request.user, offset, request)
+        else:
+            sessao = SessaoUpload.objects.get(id=sessao_id, usuario=request.user)
+            if request.method == 'DELETE' and sessao.status == 'aberta':
+                uploads.cancelar(sessao)
+    except SessaoUpload.DoesNotExist:
+        return _erro('Sessão de upload não encontrada', 404)
+    except uploads.OffsetDivergente as erro:
+        recebido = SessaoUpload.objects.filter(id=sessao_id).values_list('recebido', flat=True).first()
+        return _erro(str(erro), erro.status, recebido=recebido)
+    except uploads.ErroUpload as erro:
+        return _erro(str(erro), erro.status)
+    
+    return JsonResponse({'success': True, 'sessao': _sessao_json(sessao)})
+
+
+@login_required
+@require_http_methods(["POST"])
+def concluir_upload(request, sessao_id):
+    """Fecha o upload e cria a postagem de vídeo (campos conteudo e localizacao)"""
+    try:
+        postagem = uploads.concluir(
+            sessao_id, request.user,
+            request.POST.get('conteudo', ''), request.POST.get('localizacao', ''),
+        )
+    except SessaoUpload.DoesNotExist:
+        return _erro('Sessão de upload não encontrada', 404)
+    except uploads.ErroUpload as erro:
+        return _erro(str(erro), erro.status)
+    
+    return JsonResponse({
+        'success': True,
+        'postagem': {'id': postagem.id, 'status_midia': postagem.status_midia},
+    }, status=201)
@@ -0,0 +1,298 @@
+"""
+Busca de pessoas por nome, usuário e cidade.
+
+Cada usuário guarda em `termos_busca` e `cidade_busca` o texto já
+normalizado (minúsculo, sem acentos, só letras e números). Sobre essas
+colunas cada banco usa o índice que tem:
+
+- SQLite: tabela virtual FTS5 (external content) mantida por triggers;
+- PostgreSQL: índices GIN com pg_trgm (LIKE de prefixo + similaridade);
+- outros: LIKE de prefixo sem índice (fallback).
+
+Todos os backends casam os termos por prefixo (typeahead), aplicam os
+demais filtros da consulta no próprio SQL e devolvem um lote de candidatos
+já ordenado; a ordenação final por qualidade do casamento
+(palavra exata > começo do nome > meio do nome) é a mesma para todos.
+"""
+import re
+import unicodedata
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+TABELA_FTS = 'usuarios_usuario_busca'
+
+# Tamanho mínimo do lote de candidatos (já filtrados) pedido ao backend
+LOTE_MINIMO = 500
+
+
+def normalizar(texto):
+    """Minúsculo, sem acentos e só com letras/números separados por espaço"""
+    texto = unicodedata.normalize('NFKD', texto or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+    return ' '.join(re.findall(r'[a-z0-9]+', texto))
+
+
+def termos_de(username='', first_name='', last_name='', first_name_parceiro='',
+              last_name_parceiro='', cidade=''):
+    """Retorna (termos_busca, cidade_busca) a partir dos campos do usuário"""
+    palavras = normalizar(' '.join([
+        username or '', first_name or '', last_name or '',
+        first_name_parceiro or '', last_name_parceiro or '',
+    ])).split()
+
+    # "joao_silva" também vira o token "joaosilva", para achar o usuário exato
+    usuario_junto = ''.join(normalizar(username).split())
+    if usuario_junto and usuario_junto not in palavras:
+        palavras.append(usuario_junto)
+
+    # Remove repetidos mantendo a ordem (o primeiro token é o começo do nome)
+    termos = ' '.join(dict.fromkeys(palavras))
+    return termos[:255], normalizar(cidade)[:120]
+
+
+def termos_do_usuario(usuario):
+    """Calcula (termos_busca, cidade_busca) de uma instância de Usuario"""
+    cidade = usuario.cidade
+    if not cidade and usuario.cidade_ref_id:
+        cidade = usuario.cidade_ref.nome
+    return termos_de(
+        usuario.username, usuario.first_name, usuario.last_name,
+        usuario.first_name_parceiro, usuario.last_name_parceiro, cidade,
+    )
+
+
+def tokens(texto):
+    return normalizar(texto).split()
+
+
+# ----------------------------------------------
+# Manutenção do índice
+# ----------------------------------------------
+
+def _fts5_disponivel(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        opcoes = {linha[0] for linha in cursor.fetchall()}
+    return 'ENABLE_FTS5' in opcoes
+
+
+def criar_indice_busca(connection, reconstruir=False):
+    """
+    Cria (se faltar) o índice de busca do banco da conexão. Idempotente:
+    é chamado pela migração e após cada migrate, porque no SQLite uma
+    alteração de tabela recria usuarios_usuario e derruba os triggers.
+    """
+    if connection.vendor == 'sqlite':
+        if not _fts5_disponivel(connection):
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+                [f'{TABELA_FTS}_%'],
+            )
+            reconstruir = reconstruir or cursor.fetchone()[0] < 3
+
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_FTS} USING fts5("
+                "termos_busca, cidade_busca, content='usuarios_usuario', content_rowid='id', "
+                "tokenize='unicode61 remove_diacritics 2')"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_ai AFTER INSERT ON usuarios_usuario BEGIN "
+                f"INSERT INTO {TABELA_FTS}(rowid, termos_busca, cidade_busca) "
+                "VALUES (new.id, new.termos_busca, new.cidade_busca); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_ad AFTER DELETE ON usuarios_usuario BEGIN "
+                f"INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, termos_busca, cidade_busca) "
+                "VALUES ('delete', old.id, old.termos_busca, old.cidade_busca); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_au "
+                "AFTER UPDATE OF termos_busca, cidade_busca ON usuarios_usuario BEGIN "
+                f"INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, termos_busca, cidade_busca) "
+                "VALUES ('delete', old.id, old.termos_busca, old.cidade_busca); "
+                f"INSERT INTO {TABELA_FTS}(rowid, termos_busca, cidade_busca) "
+                "VALUES (new.id, new.termos_busca, new.cidade_busca); END"
+            )
+            if reconstruir:
+                cursor.execute(f"INSERT INTO {TABELA_FTS}({TABELA_FTS}) VALUES ('rebuild')")
+
+    elif connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            for coluna in ('termos_busca', 'cidade_busca'):
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS usuario_{coluna}_trgm '
+                    f'ON usuarios_usuario USING gin ({coluna} gin_trgm_ops)'
+                )
+
+
+def remover_indice_busca(connection):
+    """Desfaz criar_indice_busca (usado na reversão da migração)"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for sufixo in ('ai', 'ad', 'au'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {TABELA_FTS}_{sufixo}')
+            cursor.execute(f'DROP TABLE IF EXISTS {TABELA_FTS}')
+        elif connection.vendor == 'postgresql':
+            for coluna in ('termos_busca', 'cidade_busca'):
+                cursor.execute(f'DROP INDEX IF EXISTS usuario_{coluna}_trgm')
+
+
+# ----------------------------------------------
+# Backends
+# ----------------------------------------------
+
+def filtro_prefixo(campo, palavras):
+    """Q com cada palavra casando o começo de algum token do campo"""
+    filtro = Q()
+    for palavra in palavras:
+        filtro &= Q(**{f'{campo}__startswith': palavra}) | Q(**{f'{campo}__contains': f' {palavra}'})
+    return filtro
+
+
+class BuscaPadrao:
+    """Fallback sem índice textual: LIKE de prefixo por token"""
+
+    def buscar_ids(self, queryset, palavras, palavras_cidade, limite):
+        queryset = queryset.filter(
+            filtro_prefixo('termos_busca', palavras) & filtro_prefixo('cidade_busca', palavras_cidade)
+        )
+        return list(queryset.order_by('-ultima_atividade').values_list('id', flat=True)[:limite])
+
+
+class BuscaTrigrama(BuscaPadrao):
+    """PostgreSQL: prefixo via LIKE (indexado pelo GIN de trigramas) e ranking por similaridade"""
+
+    def buscar_ids(self, queryset, palavras, palavras_cidade, limite):
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        queryset = queryset.filter(
+            filtro_prefixo('termos_busca', palavras) & filtro_prefixo('cidade_busca', palavras_cidade)
+        )
+        if palavras:
+            queryset = queryset.annotate(
+                similaridade=TrigramSimilarity('termos_busca', ' '.join(palavras))
+            ).order_by('-similaridade')
+        return list(queryset.values_list('id', flat=True)[:limite])
+
+
+class BuscaFTS5:
+    """SQLite: consulta de prefixo na tabela FTS5, ordenada por bm25"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    @staticmethod
+    def expressao(coluna, palavras):
+        termos = ' AND '.join(f'"{palavra}"*' for palavra in palavras)
+        return f'{coluna} : ({termos})'
+
+    def buscar_ids(self, queryset, palavras, palavras_cidade, limite):
+        partes = []
+        if palavras:
+            partes.append(self.expressao('termos_busca', palavras))
+        if palavras_cidade:
+            partes.append(self.expressao('cidade_busca', palavras_cidade))
+        consulta = ' AND '.join(partes)
+
+        # O MATCH entra como subconsulta: os demais filtros do queryset são
+        # aplicados no mesmo SQL, antes do LIMIT, como nos outros backends
+        tabela = queryset.model._meta.db_table
+        casados = RawSQL(f'SELECT rowid FROM {TABELA_FTS} WHERE {TABELA_FTS} MATCH %s', [consulta])
+        relevancia = RawSQL(
+            f'SELECT rank FROM {TABELA_FTS} WHERE {TABELA_FTS} MATCH %s AND rowid = {tabela}.id',
+            [consulta],
+        )
+        queryset = queryset.filter(id__in=casados).annotate(relevancia_fts=relevancia)
+        return list(queryset.order_by('relevancia_fts').values_list('id', flat=True)[:limite])
+
+
+_backends = {}
+
+
+def obter_backend(alias='default'):
+    """Escolhe o backend de busca conforme o banco da conexão"""
+    if alias not in _backends:
+        connection = connections[alias]
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [TABELA_FTS]
+                )
+                tem_fts = cursor.fetchone() is not None
+            _backends[alias] = BuscaFTS5(connection) if tem_fts else BuscaPadrao()
+        elif connection.vendor == 'postgresql':
+            _backends[alias] = BuscaTrigrama()
+        else:
+            _backends[alias] = BuscaPadrao()
+    return _backends[alias]
+
+
+# ----------------------------------------------
+# API
+# ----------------------------------------------
+
+def _qualidade(termos, palavras):
+    """0 = palavras exatas, 1 = começa pelo início do nome, 2 = prefixo no meio"""
+    existentes = termos.split()
+    if all(palavra in existentes for palavra in palavras):
+        return 0
+    if existentes and existentes[0].startswith(palavras[0]):
+        return 1
+    return 2
+
+
+def buscar(texto='', cidade='', queryset=None, limite=20):
+    """
+    Busca usuários cujo nome/usuário (`texto`) e cidade casam por prefixo.
+    `queryset` traz os demais filtros (ativos, idade, gênero...).
+    Retorna lista de Usuario ordenada por qualidade do casamento.
+    """
+    from .models import Usuario
+
+    if queryset is None:
+        queryset = Usuario.objects.filter(is_active=True)
+
+    palavras, palavras_cidade = tokens(texto), tokens(cidade)
+    if not palavras and not palavras_cidade:
+        return list(queryset[:limite])
+
+    lote = max(limite * 25, LOTE_MINIMO)
+    ids = obter_backend(queryset.db).buscar_ids(queryset, palavras, palavras_cidade, lote)
+    if not ids:
+        return []
+
+    if palavras:
+        termos = dict(Usuario.objects.filter(id__in=ids).values_list('id', 'termos_busca'))
+        posicao = {pk: indice for indice, pk in enumerate(ids)}
+        ids = sorted(ids, key=lambda pk: (_qualidade(termos.get(pk, ''), palavras), posicao[pk]))
+
+    ids = ids[:limite]
+    encontrados = Usuario.objects.in_bulk(ids)
+    return [encontrados[pk] for pk in ids if pk in encontrados]
+
+
+def atualizar_termos(queryset=None, tamanho_lote=1000):
+    """Recalcula termos_busca/cidade_busca (ex.: após update() ou bulk_create)"""
+    from .models import Usuario
+
+    queryset = (queryset if queryset is not None else Usuario.objects.all()).select_related('cidade_ref')
+    alterados = []
+    total = 0
+    for usuario in queryset.iterator(chunk_size=tamanho_lote):
+        termos = termos_do_usuario(usuario)
+        if termos != (usuario.termos_busca, usuario.cidade_busca):
+            usuario.termos_busca, usuario.cidade_busca = termos
+            alterados.append(usuario)
+        if len(alterados) >= tamanho_lote:
+            Usuario.objects.bulk_update(alterados, ['termos_busca', 'cidade_busca'])
+            total += len(alterados)
+            alterados = []
+    if alterados:
+        Usuario.objects.bulk_update(alterados, ['termos_busca', 'cidade_busca'])
+        total += len(alterados)
+    return total
@@ -0,0 +1,391 @@
+"""
+Consultas geográficas para busca de usuários próximos.
+
+A busca é feita em duas etapas: primeiro uma caixa delimitadora (lat/lon)
+sobre colunas indexadas reduz os candidatos no próprio banco; depois a
+distância exata (Haversine) é calculada apenas para os sobreviventes.
+Funciona com qualquer banco suportado (SQLite/PostgreSQL), pois usa
+somente filtros de intervalo comuns.
+
+Distâncias em lote usam NumPy (uma única passada vetorizada); sem NumPy
+instalado, cai no cálculo escalar de `Cidade.calcular_distancia_haversine`.
+"""
+from math import radians, degrees, cos, sin, asin
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy é opcional
+    np = None
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+
+RAIO_TERRA_KM = 6371
+
+# Folga para compensar o arredondamento das coordenadas em DecimalField
+MARGEM_GRAUS = 1e-6
+
+
+def caixa_delimitadora(latitude, longitude, raio_km):
+    """
+    Calcula a caixa lat/lon que contém o círculo de raio `raio_km`.
+    Retorna (lat_min, lat_max, lon_min, lon_max); os limites de longitude
+    são None quando a caixa alcança um polo ou cruza o antimeridiano.
+    """
+    raio_angular = raio_km / RAIO_TERRA_KM
+    delta_lat = degrees(raio_angular) + MARGEM_GRAUS
+
+    lat_min = latitude - delta_lat
+    lat_max = latitude + delta_lat
+
+    if lat_min <= -90 or lat_max >= 90:
+        return max(lat_min, -90), min(lat_max, 90), None, None
+
+    razao = sin(raio_angular) / cos(radians(latitude))
+    if razao >= 1:
+        return lat_min, lat_max, None, None
+
+    delta_lon = degrees(asin(razao)) + MARGEM_GRAUS
+    lon_min = longitude - delta_lon
+    lon_max = longitude + delta_lon
+
+    if lon_min < -180 or lon_max > 180:
+        return lat_min, lat_max, None, None
+
+    return lat_min, lat_max, lon_min, lon_max
+
+
+def filtro_caixa(latitude, longitude, raio_km, campo_latitude, campo_longitude):
+    """Monta o filtro Q de intervalo lat/lon para os campos informados"""
+    lat_min, lat_max, lon_min, lon_max = caixa_delimitadora(latitude, longitude, raio_km)
+
+    filtro = Q(**{f'{campo_latitude}__range': (lat_min, lat_max)})
+    if lon_min is not None:
+        filtro &= Q(**{f'{campo_longitude}__range': (lon_min, lon_max)})
+    return filtro
+
+
+def haversine_lote(latitude, longitude, latitudes, longitudes):
+    """
+    Calcula a distância (km, 2 casas) de uma origem para vetores de
+    latitudes/longitudes. Retorna um array NumPy (ou lista, sem NumPy)
+    com os mesmos valores de `Cidade.calcular_distancia_haversine`.
+    """
+    if np is None:
+        from .models import Cidade
+
+        return [
+            Cidade.calcular_distancia_haversine(
+                float(latitude), float(longitude), float(lat), float(lon)
+            )
+            for lat, lon in zip(latitudes, longitudes)
+        ]
+
+    lat1 = np.radians(float(latitude))
+    lon1 = np.radians(float(longitude))
+    lat2 = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon2 = np.radians(np.asarray(longitudes, dtype=np.float64))
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    c = 2 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    return np.round(c * RAIO_TERRA_KM, 2)
+
+
+def distancias_no_raio(queryset, latitude, longitude, raio_km,
+                       campo_latitude='cidade_ref__latitude',
+                       campo_longitude='cidade_ref__longitude'):
+    """
+    Retorna lista de tuplas (pk, distancia_km) dos objetos do queryset
+    dentro do raio. Só as coordenadas dos candidatos da caixa são lidas
+    e as distâncias são calculadas em lote.
+    """
+    latitude = float(latitude)
+    longitude = float(longitude)
+
+    candidatos = list(queryset.filter(
+        filtro_caixa(latitude, longitude, raio_km, campo_latitude, campo_longitude)
+    ).values_list('pk', campo_latitude, campo_longitude))
+
+    if not candidatos:
+        return []
+
+    pks, latitudes, longitudes = zip(*candidatos)
+    distancias = haversine_lote(latitude, longitude, latitudes, longitudes)
+
+    return [
+        (pk, float(distancia))
+        for pk, distancia in zip(pks, distancias)
+        if distancia <= raio_km
+    ]
+
+
+def _paginar_e_carregar(queryset, encontrados, ordenar, limite, deslocamento):
+    """Ordena/pagina as tuplas (pk, distancia) e carrega só os objetos da página"""
+    if ordenar:
+        encontrados.sort(key=lambda item: (item[1], item[0]))
+
+    if limite is not None:
+        encontrados = encontrados[deslocamento:deslocamento + limite]
+    elif deslocamento:
+        encontrados = encontrados[deslocamento:]
+
+    objetos = queryset.in_bulk([pk for pk, _ in encontrados])
+    return [(objetos[pk], distancia) for pk, distancia in encontrados if pk in objetos]
+
+
+def buscar_proximos(queryset, latitude, longitude, raio_km,
+                    campo_latitude='cidade_ref__latitude',
+                    campo_longitude='cidade_ref__longitude',
+                    ordenar=True, limite=None, deslocamento=0):
+    """
+    Busca objetos do queryset dentro de `raio_km` da origem.
+
+    Retorna uma lista de tuplas (objeto, distancia_km). Somente as
+    coordenadas dos candidatos da caixa são lidas do banco; as instâncias
+    completas são carregadas apenas para a página pedida.
+    """
+    encontrados = distancias_no_raio(
+        queryset, latitude, longitude, raio_km, campo_latitude, campo_longitude
+    )
+    return _paginar_e_carregar(queryset, encontrados, ordenar, limite, deslocamento)
+
+
+# ==============================================
+# ÍNDICE DE VIZINHANÇA ENTRE CIDADES
+# ==============================================
+
+def raio_indice_vizinhanca():
+    """Raio (km) coberto pelo índice pré-calculado de cidades vizinhas"""
+    return getattr(settings, 'VIZINHANCA_CIDADES_RAIO_KM', 200)
+
+
+def cidades_no_raio(cidade, raio_km):
+    """
+    Retorna dict {cidade_id: distancia_km} das cidades dentro do raio,
+    incluindo a própria cidade. Usa o índice pré-calculado quando ele cobre
+    o raio pedido e já foi construído para a cidade; senão calcula na hora.
+    """
+    from .models import Cidade, VizinhancaCidade
+
+    if raio_km <= raio_indice_vizinhanca():
+        vizinhas = dict(
+            VizinhancaCidade.objects.filter(
+                origem=cidade, distancia__lte=raio_km
+            ).values_list('destino_id', 'distancia')
+        )
+        if vizinhas:
+            return vizinhas
+
+    return dict(distancias_no_raio(
+        Cidade.objects.filter(ativa=True),
+        cidade.latitude, cidade.longitude, raio_km,
+        campo_latitude='latitude', campo_longitude='longitude',
+    ))
+
+
+def indice_disponivel(cidade, raio_km):
+    """Indica se o índice de vizinhança pode responder para a cidade/raio"""
+    from .models import VizinhancaCidade
+
+    return (
+        raio_km <= raio_indice_vizinhanca()
+        and VizinhancaCidade.objects.filter(origem=cidade, destino=cidade).exists()
+    )
+
+
+def filtro_cidades_no_raio(cidade, raio_km, campo='cidade_ref'):
+    """
+    Filtro Q "cidade está no raio" como subconsulta indexada no índice de
+    vizinhança (um único IN, sem trigonometria por usuário).
+    """
+    from .models import VizinhancaCidade
+
+    return Q(**{f'{campo}__in': VizinhancaCidade.objects.filter(
+        origem=cidade, distancia__lte=raio_km
+    ).values('destino')})
+
+
+def buscar_proximos_por_cidade(queryset, cidade, raio_km, campo='cidade_ref',
+                               ordenar=True, limite=None, deslocamento=0):
+    """
+    Igual a `buscar_proximos`, mas a partir de uma Cidade: com o índice de
+    vizinhança disponível vira um IN indexado e as distâncias vêm prontas
+    do índice; caso contrário usa a caixa delimitadora.
+
+    Os dois caminhos aplicam o mesmo predicado: cidade do candidato ativa
+    (o índice só contém cidades ativas) e distância <= raio_km, incluindo
+    quem está na mesma cidade (distância 0).
+    """
+    if not indice_disponivel(cidade, raio_km):
+        return buscar_proximos(
+            queryset.filter(**{f'{campo}__ativa': True}), cidade.latitude, cidade.longitude, raio_km,
+            campo_latitude=f'{campo}__latitude',
+            campo_longitude=f'{campo}__longitude',
+            ordenar=ordenar, limite=limite, deslocamento=deslocamento,
+        )
+
+    vizinhas = cidades_no_raio(cidade, raio_km)
+    linhas = queryset.filter(
+        filtro_cidades_no_raio(cidade, raio_km, campo)
+    ).values_list('pk', f'{campo}_id')
+
+    encontrados = [(pk, vizinhas[cidade_id]) for pk, cidade_id in linhas if cidade_id in vizinhas]
+    return _paginar_e_carregar(queryset, encontrados, ordenar, limite, deslocamento)
+
+
+def origem_usuario(usuario):
+    """
+    Retorna (latitude, longitude, cidade) de referência do usuário,
+    priorizando cidade_ref; ou None se ele não tem localização.
+    """
+    if usuario.cidade_ref_id:
+        cidade = usuario.cidade_ref
+        return float(cidade.latitude), float(cidade.longitude), cidade
+    if usuario.latitude is not None and usuario.longitude is not None:
+        return float(usuario.latitude), float(usuario.longitude), None
+    return None
+
+
+def filtro_usuarios_no_raio(latitude, longitude, raio_km, cidade=None):
+    """
+    Monta o pré-filtro indexado de usuários no raio da origem.
+
+    Retorna (filtro Q, {cidade_id: distancia}). Usuários com cidade_ref
+    entram por um IN sobre as cidades do raio (subconsulta no índice de
+    vizinhança quando disponível); usuários só com coordenadas entram pela
+    caixa delimitadora sobre latitude/longitude.
+    """
+    from .models import Cidade
+
+    if cidade is not None:
+        cidades = cidades_no_raio(cidade, raio_km)
+        if indice_disponivel(cidade, raio_km):
+            filtro_cidade = filtro_cidades_no_raio(cidade, raio_km)
+        else:
+            filtro_cidade = Q(cidade_ref_id__in=list(cidades))
+    else:
+        cidades = dict(distancias_no_raio(
+            Cidade.objects.filter(ativa=True), latitude, longitude, raio_km,
+            campo_latitude='latitude', campo_longitude='longitude',
+        ))
+        filtro_cidade = Q(cidade_ref_id__in=list(cidades))
+
+    filtro_coordenadas = Q(cidade_ref__isnull=True) & filtro_caixa(
+        latitude, longitude, raio_km, 'latitude', 'longitude'
+    )
+    return filtro_cidade | filtro_coordenadas, cidades
+
+
+def usuarios_no_raio(queryset, usuario, raio_km, mutuo=True, limite=None, tamanho_lote=500):
+    """
+    Filtra o queryset de usuários pela distância até `usuario`.
+
+    Retorna lista de tuplas (pk, distancia_km) na ordem do queryset, ou
+    None se o usuário não tem localização. Com `mutuo=True` o candidato
+    também precisa ter `usuario` dentro da sua própria distancia_maxima.
+    Com `limite`, a leitura para assim que houver resultados suficientes.
+    """
+    origem = origem_usuario(usuario)
+    if origem is None:
+        return None
+
+    latitude, longitude, cidade = origem
+    filtro, cidades = filtro_usuarios_no_raio(latitude, longitude, raio_km, cidade)
+
+    linhas = queryset.filter(filtro).values_list(
+        'pk', 'cidade_ref_id', 'latitude', 'longitude', 'distancia_maxima'
+    ).iterator(chunk_size=tamanho_lote)
+
+    encontrados = []
+    lote = []
+
+    def processar(lote):
+        # Distâncias por coordenadas calculadas de uma vez para o lote
+        sem_cidade = [linha for linha in lote if linha[1] is None]
+        calculadas = {}
+        if sem_cidade:
+            distancias = haversine_lote(
+                latitude, longitude,
+                [linha[2] for linha in sem_cidade],
+                [linha[3] for linha in sem_cidade],
+            )
+            calculadas = {linha[0]: float(d) for linha, d in zip(sem_cidade, distancias)}
+
+        for pk, cidade_id, _, _, distancia_maxima in lote:
+            distancia = cidades.get(cidade_id) if cidade_id is not None else calculadas[pk]
+            if distancia is None or distancia > raio_km:
+                continue
+            if mutuo and distancia_maxima is not None and distancia > distancia_maxima:
+                continue
+            encontrados.append((pk, distancia))
+
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) >= tamanho_lote:
+            processar(lote)
+            lote = []
+            if limite is not None and len(encontrados) >= limite:
+                return encontrados[:limite]
+
+    processar(lote)
+    return encontrados[:limite] if limite is not None else encontrados
+
+
+def atualizar_vizinhanca(cidades=None, raio_km=None, tamanho_lote=5000):
+    """
+    (Re)constrói o índice de vizinhança para as cidades informadas (ou
+    todas as ativas). Remove as linhas antigas em que elas aparecem como
+    origem ou destino e grava os pares nos dois sentidos.
+    Retorna o número de pares gravados.
+    """
+    from .models import Cidade, VizinhancaCidade
+
+    raio_km = raio_km or raio_indice_vizinhanca()
+    ativas = Cidade.objects.filter(ativa=True)
+
+    if cidades is None:
+        alteradas = list(ativas.values_list('id', 'latitude', 'longitude'))
+        ids_alterados = {cidade_id for cidade_id, _, _ in alteradas}
+    else:
+        ids_alterados = {getattr(cidade, 'pk', cidade) for cidade in cidades}
+        alteradas = list(
+            ativas.filter(id__in=ids_alterados).values_list('id', 'latitude', 'longitude')
+        )
+
+    total = 0
+    with transaction.atomic():
+        if cidades is None:
+            VizinhancaCidade.objects.all().delete()
+        else:
+            VizinhancaCidade.objects.filter(
+                Q(origem_id__in=ids_alterados) | Q(destino_id__in=ids_alterados)
+            ).delete()
+
+        pares = []
+        for origem_id, latitude, longitude in alteradas:
+            vizinhas = distancias_no_raio(
+                ativas, latitude, longitude, raio_km,
+                campo_latitude='latitude', campo_longitude='longitude',
+            )
+            for destino_id, distancia in vizinhas:
+                pares.append(VizinhancaCidade(
+                    origem_id=origem_id, destino_id=destino_id, distancia=distancia
+                ))
+                # Cidades não alteradas ganham o par no sentido inverso
+                if destino_id not in ids_alterados:
+                    pares.append(VizinhancaCidade(
+                        origem_id=destino_id, destino_id=origem_id, distancia=distancia
+                    ))
+
+            if len(pares) >= tamanho_lote:
+                VizinhancaCidade.objects.bulk_create(pares, batch_size=tamanho_lote)
+                total += len(pares)
+                pares = []
+
+        VizinhancaCidade.objects.bulk_create(pares, batch_size=tamanho_lote)
+        total += len(pares)
+
+    return total
@@ -0,0 +1,262 @@
+"""
+Índice invertido em memória sobre as tags dos usuários.
+
+Para cada tag (interesse, objetivo ou fetiche) guarda o vetor ordenado de
+IDs de usuários que a possuem, permitindo interseção, união e "top-k
+usuários com mais tags em comum" sem self-joins nas tabelas de ligação.
+
+O índice é carregado no primeiro uso (e aquecido em segundo plano na
+primeira requisição) e atualizado pelos sinais de save/delete das tabelas
+de ligação. Passados INDICE_TAGS_VALIDADE segundos ele é recarregado em
+segundo plano, para incorporar mudanças feitas por outros processos ou por
+bulk_create: enquanto isso as consultas continuam servidas pelo índice
+antigo, e só há uma recarga por vez. Mudanças que chegam pelos sinais
+durante a recarga são reaplicadas sobre o índice novo.
+"""
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy é opcional
+    np = None
+
+from django.conf import settings
+from django.db import connection
+
+
+class IndiceTags:
+    """Índice tag -> vetor ordenado de IDs de usuários"""
+
+    def __init__(self):
+        self._lista_tag = {}       # (tipo, tag_id) -> array('q') ordenado
+        self._tags_usuario = {}    # usuario_id -> set((tipo, tag_id))
+        self._lock = threading.RLock()
+        self._carregado_em = None
+        self._recarga = threading.Lock()  # uma carga por vez
+        self._pendentes = None     # mudanças recebidas durante a carga
+
+    @staticmethod
+    def tabelas():
+        """Tabelas de ligação indexadas: tipo -> (modelo, campo da tag)"""
+        from .models import UsuarioInteresse, UsuarioObjetivo, UsuarioFetiche
+
+        return {
+            'interesse': (UsuarioInteresse, 'interesse_id'),
+            'objetivo': (UsuarioObjetivo, 'objetivo_id'),
+            'fetiche': (UsuarioFetiche, 'fetiche_id'),
+        }
+
+    # ----------------------------------------------
+    # Carga e manutenção
+    # ----------------------------------------------
+
+    def aquecer(self):
+        """(Re)carrega o índice inteiro a partir do banco"""
+        with self._lock:
+            self._pendentes = []
+
+        lista_tag = {}
+        tags_usuario = {}
+        try:
+            for tipo, (modelo, campo) in self.tabelas().items():
+                linhas = modelo.objects.order_by(campo, 'usuario_id').values_list(campo, 'usuario_id')
+                for tag_id, usuario_id in linhas.iterator(chunk_size=5000):
+                    chave = (tipo, tag_id)
+                    vetor = lista_tag.get(chave)
+                    if vetor is None:
+                        vetor = lista_tag[chave] = array('q')
+                    vetor.append(usuario_id)
+                    tags_usuario.setdefault(usuario_id, set()).add(chave)
+        except Exception:
+            with self._lock:
+                self._pendentes = None
+            raise
+
+        with self._lock:
+            self._lista_tag = lista_tag
+            self._tags_usuario = tags_usuario
+            for aplicar, chave, usuario_id in self._pendentes:
+                aplicar(chave, usuario_id)
+            self._pendentes = None
+            self._carregado_em = time.monotonic()
+
+    def aquecer_em_segundo_plano(self):
+        """Dispara a carga (ou recarga) sem bloquear quem chamou"""
+        if not self._recarga.acquire(blocking=False):
+            return  # já há uma carga em andamento
+
+        def carregar():
+            try:
+                self.aquecer()
+            finally:
+                self._recarga.release()
+                # A thread abriu sua própria conexão
+                connection.close()
+
+        threading.Thread(target=carregar, daemon=True).start()
+
+    def _garantir_carregado(self):
+        if self._carregado_em is None:
+            # Primeira carga: quem chega espera a carga em andamento, sem repeti-la
+            with self._recarga:
+                if self._carregado_em is None:
+                    self.aquecer()
+            return
+        validade = getattr(settings, 'INDICE_TAGS_VALIDADE', 300)
+        if time.monotonic() - self._carregado_em > validade:
+            self.aquecer_em_segundo_plano()
+
+    def _inserir(self, chave, usuario_id):
+        vetor = self._lista_tag.setdefault(chave, array('q'))
+        posicao = bisect_left(vetor, usuario_id)
+        if posicao == len(vetor) or vetor[posicao] != usuario_id:
+            insort(vetor, usuario_id)
+        self._tags_usuario.setdefault(usuario_id, set()).add(chave)
+
+    def _retirar(self, chave, usuario_id):
+        vetor = self._lista_tag.get(chave)
+        if vetor is not None:
+            posicao = bisect_left(vetor, usuario_id)
+            if posicao < len(vetor) and vetor[posicao] == usuario_id:
+                del vetor[posicao]
+        self._tags_usuario.get(usuario_id, set()).discard(chave)
+
+    def _registrar(self, aplicar, chave, usuario_id):
+        with self._lock:
+            if self._pendentes is not None:
+                self._pendentes.append((aplicar, chave, usuario_id))
+            if self._carregado_em is not None:
+                aplicar(chave, usuario_id)
+
+    def adicionar(self, tipo, tag_id, usuario_id):
+        """Registra que o usuário passou a ter a tag"""
+        self._registrar(self._inserir, (tipo, tag_id), usuario_id)
+
+    def remover(self, tipo, tag_id, usuario_id):
+        """Registra que o usuário deixou de ter a tag"""
+        self._registrar(self._retirar, (tipo, tag_id), usuario_id)
+
+    # ----------------------------------------------
+    # Consultas
+    # ----------------------------------------------
+
+    def tags_do_usuario(self, usuario_id):
+        """Conjunto de chaves (tipo, tag_id) do usuário"""
+        self._garantir_carregado()
+        return set(self._tags_usuario.get(usuario_id, ()))
+
+    def usuarios_com_tag(self, tipo, tag_id):
+        """Lista ordenada de IDs de usuários com a tag"""
+        self._garantir_carregado()
+        return list(self._lista_tag.get((tipo, tag_id), ()))
+
+    def intersecao(self, chaves):
+        """IDs (ordenados) de usuários que têm TODAS as tags (tipo, tag_id)"""
+        self._garantir_carregado()
+        with self._lock:
+            vetores = sorted((self._lista_tag.get(chave, array('q')) for chave in chaves), key=len)
+            if not vetores:
+                return []
+            if np is not None:
+                resultado = np.frombuffer(vetores[0], dtype=np.int64)
+                for vetor in vetores[1:]:
+                    resultado = np.intersect1d(resultado, np.frombuffer(vetor, dtype=np.int64), assume_unique=True)
+                return resultado.tolist()
+            resultado = set(vetores[0])
+            for vetor in vetores[1:]:
+                resultado.intersection_update(vetor)
+            return sorted(resultado)
+
+    def uniao(self, chaves):
+        """IDs (ordenados) de usuários que têm PELO MENOS UMA das tags"""
+        self._garantir_carregado()
+        with self._lock:
+            vetores = [self._lista_tag[chave] for chave in chaves if chave in self._lista_tag]
+            if not vetores:
+                return []
+            if np is not None:
+                return np.unique(np.concatenate([np.frombuffer(v, dtype=np.int64) for v in vetores])).tolist()
+            return sorted(set().union(*vetores))
+
+    def _vetores_do_usuario(self, usuario_id):
+        return [
+            self._lista_tag[chave]
+            for chave in self._tags_usuario.get(usuario_id, ())
+            if self._lista_tag.get(chave)
+        ]
+
+    def _contagens(self, usuario_id):
+        """Vetor NumPy indexado por usuario_id com o total de tags em comum"""
+        vetores = self._vetores_do_usuario(usuario_id)
+        if not vetores:
+            return None
+        contagens = np.bincount(np.concatenate([np.frombuffer(v, dtype=np.int64) for v in vetores]))
+        if usuario_id < len(contagens):
+            contagens[usuario_id] = 0
+        return contagens
+
+    def contar_em_comum(self, usuario_id, candidatos=None):
+        """
+        Retorna {candidato_id: tags em comum com o usuário}, só para quem
+        tem pelo menos uma; opcionalmente restrito aos `candidatos`.
+        """
+        self._garantir_carregado()
+        with self._lock:
+            if np is None:
+                contagens = Counter()
+                for vetor in self._vetores_do_usuario(usuario_id):
+                    contagens.update(vetor)
+                contagens.pop(usuario_id, None)
+                if candidatos is not None:
+                    candidatos = set(candidatos)
+                    return {pk: total for pk, total in contagens.items() if pk in candidatos}
+                return dict(contagens)
+
+            contagens = self._contagens(usuario_id)
+        if contagens is None:
+            return {}
+
+        if candidatos is None:
+            ids = np.flatnonzero(contagens)
+        else:
+            ids = np.fromiter(candidatos, dtype=np.int64)
+            ids = ids[(ids >= 0) & (ids < len(contagens))]
+            ids = ids[contagens[ids] > 0]
+        return dict(zip(ids.tolist(), contagens[ids].tolist()))
+
+    def top_k_sobreposicao(self, usuario_id, k=20, excluir=()):
+        """Lista de (usuario_id, tags_em_comum) dos k usuários mais parecidos"""
+        if np is None:
+            contagens = self.contar_em_comum(usuario_id)
+            for pk in excluir:
+                contagens.pop(pk, None)
+            return sorted(contagens.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+        self._garantir_carregado()
+        with self._lock:
+            contagens = self._contagens(usuario_id)
+        if contagens is None:
+            return []
+
+        for pk in excluir:
+            if 0 <= pk < len(contagens):
+                contagens[pk] = 0
+
+        k = min(k, int(np.count_nonzero(contagens)))
+        if k <= 0:
+            return []
+        # Corte do k-ésimo maior em O(n); empates no corte ficam com os menores IDs
+        corte = np.partition(contagens, len(contagens) - k)[len(contagens) - k]
+        acima = np.flatnonzero(contagens > corte)
+        no_corte = np.flatnonzero(contagens == corte)[:k - len(acima)]
+        melhores = np.concatenate([acima, no_corte])
+        melhores = melhores[np.lexsort((melhores, -contagens[melhores]))]
+        return list(zip(melhores.tolist(), contagens[melhores].tolist()))
+
+
+# Instância única por processo
+indice_tags = IndiceTags()
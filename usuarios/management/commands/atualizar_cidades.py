@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
+from usuarios.geo import atualizar_vizinhanca
 from usuarios.models import Cidade
 import requests
 from datetime import timedelta
@@ -38,6 +39,7 @@ class Command(BaseCommand):
         
         atualizadas = 0
         erros = 0
+        cidades_movidas = []
         
         for cidade in cidades_para_atualizar:
             try:
@@ -46,14 +48,17 @@ class Command(BaseCommand):
                 if dados_atualizados:
                     # Verificar se houve mudanças
                     mudancas = False
+                    coordenadas_mudaram = False
                     
                     if cidade.latitude != dados_atualizados['latitude']:
                         cidade.latitude = dados_atualizados['latitude']
                         mudancas = True
+                        coordenadas_mudaram = True
                     
                     if cidade.longitude != dados_atualizados['longitude']:
                         cidade.longitude = dados_atualizados['longitude']
                         mudancas = True
+                        coordenadas_mudaram = True
                     
                     if cidade.populacao != dados_atualizados.get('populacao'):
                         cidade.populacao = dados_atualizados.get('populacao')
@@ -62,6 +67,8 @@ class Command(BaseCommand):
                     if mudancas:
                         cidade.save()
                         atualizadas += 1
+                        if coordenadas_mudaram:
+                            cidades_movidas.append(cidade.pk)
                         self.stdout.write(f'  ✓ Atualizada: {cidade.nome_completo}')
                     else:
                         # Apenas atualizar timestamp
@@ -74,6 +81,11 @@ class Command(BaseCommand):
                     self.style.ERROR(f'  ✗ Erro ao atualizar {cidade.nome_completo}: {str(e)}')
                 )
         
+        # Recalcular o índice de vizinhança das cidades com novas coordenadas
+        if cidades_movidas:
+            self.stdout.write('Atualizando índice de vizinhança...')
+            atualizar_vizinhanca(cidades_movidas)
+        
         self.stdout.write(
             self.style.SUCCESS(
                 f'Atualização concluída! {atualizadas} cidades atualizadas, {erros} erros.'
@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand
+from usuarios.geo import haversine_lote, np
+from usuarios.models import Cidade
+import random
+import time
+
+
+class Command(BaseCommand):
+    help = 'Compara o Haversine escalar com o cálculo vetorizado em lote'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pontos',
+            type=int,
+            help='Quantidade de coordenadas por rodada',
+            default=50000
+        )
+        parser.add_argument(
+            '--repeticoes',
+            type=int,
+            help='Número de rodadas (vale o melhor tempo)',
+            default=5
+        )
+
+    def handle(self, *args, **options):
+        pontos = options['pontos']
+        repeticoes = options['repeticoes']
+        
+        if np is None:
+            self.stdout.write(self.style.WARNING('NumPy não instalado: o lote usará o cálculo escalar.'))
+        
+        # Coordenadas aleatórias dentro do território brasileiro
+        aleatorio = random.Random(42)
+        origem = (-23.5505, -46.6333)
+        latitudes = [aleatorio.uniform(-33.7, 5.3) for _ in range(pontos)]
+        longitudes = [aleatorio.uniform(-73.9, -34.8) for _ in range(pontos)]
+        
+        def escalar():
+            return [
+                Cidade.calcular_distancia_haversine(origem[0], origem[1], lat, lon)
+                for lat, lon in zip(latitudes, longitudes)
+            ]
+        
+        def lote():
+            return haversine_lote(origem[0], origem[1], latitudes, longitudes)
+        
+        tempo_escalar = self.medir(escalar, repeticoes)
+        tempo_lote = self.medir(lote, repeticoes)
+        
+        # Conferir se os resultados batem
+        divergentes = sum(
+            1 for a, b in zip(escalar(), lote()) if abs(a - float(b)) > 0.01
+        )
+        
+        self.stdout.write(f'Pontos por rodada: {pontos}')
+        self.stdout.write(f'Escalar: {tempo_escalar * 1000:.2f} ms')
+        self.stdout.write(f'Lote:    {tempo_lote * 1000:.2f} ms')
+        self.stdout.write(f'Divergências (> 0,01 km): {divergentes}')
+        self.stdout.write(
+            self.style.SUCCESS(f'Ganho: {tempo_escalar / tempo_lote:.1f}x')
+        )
+
+    def medir(self, funcao, repeticoes):
+        """Retorna o melhor tempo (s) entre as repetições"""
+        melhor = None
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            funcao()
+            duracao = time.perf_counter() - inicio
+            melhor = duracao if melhor is None else min(melhor, duracao)
+        return melhor
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from usuarios.geo import atualizar_vizinhanca, raio_indice_vizinhanca
+from usuarios.models import Cidade
+
+
+class Command(BaseCommand):
+    help = 'Constrói o índice pré-calculado de cidades vizinhas (distâncias entre cidades)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--raio',
+            type=int,
+            help='Raio máximo em km (padrão: VIZINHANCA_CIDADES_RAIO_KM)',
+            default=None
+        )
+        parser.add_argument(
+            '--cidades',
+            type=str,
+            help='IDs de cidades para atualizar (ex: 1,2,3); padrão: todas as ativas',
+            default=''
+        )
+
+    def handle(self, *args, **options):
+        raio = options['raio'] or raio_indice_vizinhanca()
+        cidades = None
+        
+        if options['cidades']:
+            cidades = [int(cidade_id) for cidade_id in options['cidades'].split(',') if cidade_id.strip()]
+            self.stdout.write(f'Atualizando vizinhança de {len(cidades)} cidades (raio {raio} km)...')
+        else:
+            total_cidades = Cidade.objects.filter(ativa=True).count()
+            self.stdout.write(f'Construindo vizinhança de {total_cidades} cidades (raio {raio} km)...')
+        
+        total_pares = atualizar_vizinhanca(cidades, raio_km=raio)
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Índice de vizinhança atualizado! {total_pares} pares gravados.')
+        )
@@ -2,6 +2,7 @@ from django.core.management.base import BaseCommand
 from django.db import transaction
 import requests
 import time
+from usuarios.geo import atualizar_vizinhanca
 from usuarios.models import Cidade
 
 
@@ -36,6 +37,7 @@ class Command(BaseCommand):
             estados_lista = [estado.strip().upper() for estado in estados.split(',')]
         
         total_cidades = 0
+        cidades_alteradas = []
         
         for estado in estados_lista:
             self.stdout.write(f'Processando estado: {estado}')
@@ -57,6 +59,7 @@ class Command(BaseCommand):
                     
                     if created:
                         total_cidades += 1
+                        cidades_alteradas.append(cidade.pk)
                         self.stdout.write(f'  ✓ Criada: {cidade.nome_completo}')
                     else:
                         # Atualizar dados se necessário
@@ -73,11 +76,17 @@ class Command(BaseCommand):
                         
                         if updated:
                             cidade.save()
+                            cidades_alteradas.append(cidade.pk)
                             self.stdout.write(f'  ↻ Atualizada: {cidade.nome_completo}')
             
             # Pausa para não sobrecarregar a API
             time.sleep(0.5)
         
+        # Recalcular o índice de vizinhança das cidades novas/movidas
+        if cidades_alteradas:
+            self.stdout.write('Atualizando índice de vizinhança...')
+            atualizar_vizinhanca(cidades_alteradas)
+        
         self.stdout.write(
             self.style.SUCCESS(f'Processamento concluído! {total_cidades} cidades processadas.')
         )
@@ -241,8 +241,7 @@ class Command(BaseCommand):
         # Criar algumas conversas
         for _ in range(min(10, len(usuarios) // 2)):
             participantes = random.sample(usuarios, 2)
-            conversa = Conversa.objects.create()
-            conversa.participantes.set(participantes)
+            conversa, _ = Conversa.obter_direta(*participantes)
             
             # Criar algumas mensagens
             num_mensagens = random.randint(3, 10)
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import connections
+from usuarios.busca import atualizar_termos, criar_indice_busca
+
+
+class Command(BaseCommand):
+    help = 'Recalcula os termos de busca dos usuários e reconstrói o índice de busca'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            type=str,
+            help='Alias do banco de dados',
+            default='default'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Recalculando termos de busca...')
+        total = atualizar_termos()
+        self.stdout.write(f'  ✓ {total} usuários atualizados')
+        
+        self.stdout.write('Reconstruindo índice de busca...')
+        criar_indice_busca(connections[options['database']], reconstruir=True)
+        
+        self.stdout.write(
+            self.style.SUCCESS('Índice de busca atualizado!')
+        )
@@ -52,7 +52,7 @@ class Command(BaseCommand):
                 
                 campos_true = []
                 for field in interesses._meta.fields:
-                    if field.name not in ['id', 'usuario', 'nivel_abertura', 'criado_em', 'atualizado_em']:
+                    if field.name not in ['id', 'usuario', 'nivel_abertura', 'mascara_flags', 'criado_em', 'atualizado_em']:
                         if getattr(interesses, field.name):
                             campos_true.append(field.verbose_name)
                 
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 16:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0008_estadocivil_etnia_nivelabertura_tipocorpo_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cidade',
+            index=models.Index(fields=['latitude', 'longitude'], name='cidade_lat_lon_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['latitude', 'longitude'], name='usuario_lat_lon_idx'),
+        ),
+    ]
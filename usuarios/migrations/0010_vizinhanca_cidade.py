@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 16:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0009_indices_coordenadas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VizinhancaCidade',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('distancia', models.FloatField(verbose_name='Distância (km)')),
+                ('destino', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='usuarios.cidade', verbose_name='Cidade Vizinha')),
+                ('origem', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vizinhancas', to='usuarios.cidade', verbose_name='Cidade de Origem')),
+            ],
+            options={
+                'verbose_name': 'Vizinhança de Cidade',
+                'verbose_name_plural': 'Vizinhanças de Cidades',
+                'indexes': [models.Index(fields=['origem', 'distancia'], name='vizinhanca_origem_dist_idx')],
+                'unique_together': {('origem', 'destino')},
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-17 16:18
+
+from django.db import migrations, models
+
+
+# Cópia de PerfilInteresses.CAMPOS_FLAGS no momento desta migração
+CAMPOS_FLAGS = (
+    'procurando_casais', 'procurando_mulheres', 'procurando_homens',
+    'procurando_grupos', 'procurando_amizades', 'procurando_experiencias',
+    'objetivo_amizades', 'objetivo_relacionamento', 'objetivo_troca',
+    'objetivo_aventura', 'objetivo_relacao_aberta', 'objetivo_curiosidade',
+    'preferencia_romantico', 'preferencia_aventureiro', 'preferencia_intimista',
+    'preferencia_social', 'preferencia_privacidade', 'preferencia_publico',
+)
+
+
+def preencher_mascaras(apps, schema_editor):
+    PerfilInteresses = apps.get_model('usuarios', 'PerfilInteresses')
+    perfis = []
+    for perfil in PerfilInteresses.objects.all().iterator():
+        perfil.mascara_flags = sum(
+            1 << bit for bit, campo in enumerate(CAMPOS_FLAGS) if getattr(perfil, campo)
+        )
+        perfis.append(perfil)
+    PerfilInteresses.objects.bulk_update(perfis, ['mascara_flags'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0010_vizinhanca_cidade'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='perfilinteresses',
+            name='mascara_flags',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, verbose_name='Máscara de Interesses'),
+        ),
+        migrations.RunPython(preencher_mascaras, migrations.RunPython.noop),
+    ]
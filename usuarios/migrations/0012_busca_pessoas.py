@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-17 16:23
+
+from django.db import migrations, models
+
+from usuarios.busca import criar_indice_busca, remover_indice_busca, termos_de
+
+
+def preencher_termos(apps, schema_editor):
+    Usuario = apps.get_model('usuarios', 'Usuario')
+    usuarios = []
+    for usuario in Usuario.objects.select_related('cidade_ref').iterator():
+        cidade = usuario.cidade or (usuario.cidade_ref.nome if usuario.cidade_ref_id else '')
+        usuario.termos_busca, usuario.cidade_busca = termos_de(
+            usuario.username, usuario.first_name, usuario.last_name,
+            usuario.first_name_parceiro, usuario.last_name_parceiro, cidade,
+        )
+        usuarios.append(usuario)
+    Usuario.objects.bulk_update(usuarios, ['termos_busca', 'cidade_busca'], batch_size=500)
+
+
+def criar_indice(apps, schema_editor):
+    criar_indice_busca(schema_editor.connection, reconstruir=True)
+
+
+def remover_indice(apps, schema_editor):
+    remover_indice_busca(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0011_mascara_flags_interesses'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usuario',
+            name='cidade_busca',
+            field=models.CharField(blank=True, default='', editable=False, max_length=120),
+        ),
+        migrations.AddField(
+            model_name='usuario',
+            name='termos_busca',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(preencher_termos, migrations.RunPython.noop),
+        migrations.RunPython(criar_indice, remover_indice),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 16:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0012_busca_pessoas'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='perfildetalhado',
+            name='data_nascimento',
+            field=models.DateField(blank=True, db_index=True, null=True, verbose_name='Data de Nascimento'),
+        ),
+        migrations.AlterField(
+            model_name='usuario',
+            name='data_nascimento',
+            field=models.DateField(blank=True, db_index=True, null=True, verbose_name='Data de Nascimento'),
+        ),
+        migrations.AlterField(
+            model_name='usuario',
+            name='data_nascimento_parceiro',
+            field=models.DateField(blank=True, db_index=True, null=True, verbose_name='Data de Nascimento do Parceiro'),
+        ),
+    ]
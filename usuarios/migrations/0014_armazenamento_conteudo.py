@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:15
+
+from django.db import migrations, models
+import midia.armazenamento
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0013_indices_data_nascimento'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='usuario',
+            name='foto_perfil',
+            field=models.ImageField(blank=True, null=True, storage=midia.armazenamento.obter_armazenamento, upload_to='perfis/', verbose_name='Foto de Perfil'),
+        ),
+        migrations.AlterField(
+            model_name='usuario',
+            name='foto_perfil_parceiro',
+            field=models.ImageField(blank=True, null=True, storage=midia.armazenamento.obter_armazenamento, upload_to='perfis/parceiros/', verbose_name='Foto do Parceiro'),
+        ),
+    ]
@@ -1,8 +1,11 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
+from datetime import date, timedelta
 from math import radians, cos, sin, asin, sqrt
 
+from midia.armazenamento import obter_armazenamento
+
 
 class TipoRelacionamento(models.Model):
     """Modelo para tipos de relacionamento"""
@@ -403,9 +406,9 @@ class Usuario(AbstractUser):
     """Modelo personalizado de usuário para o Me Ache"""
     
     # Campos básicos do perfil
-    data_nascimento = models.DateField(null=True, blank=True, verbose_name="Data de Nascimento")
+    data_nascimento = models.DateField(null=True, blank=True, db_index=True, verbose_name="Data de Nascimento")
     bio = models.TextField(max_length=1000, blank=True, verbose_name="Biografia")
-    foto_perfil = models.ImageField(upload_to='perfis/', null=True, blank=True, verbose_name="Foto de Perfil")
+    foto_perfil = models.ImageField(upload_to='perfis/', storage=obter_armazenamento, null=True, blank=True, verbose_name="Foto de Perfil")
     
     # Localização
     cidade = models.CharField(max_length=100, blank=True, verbose_name="Cidade")
@@ -465,9 +468,9 @@ class Usuario(AbstractUser):
     # Campos para parceiro (modo casal)
     first_name_parceiro = models.CharField(max_length=30, blank=True, verbose_name="Nome do Parceiro")
     last_name_parceiro = models.CharField(max_length=30, blank=True, verbose_name="Sobrenome do Parceiro")
-    data_nascimento_parceiro = models.DateField(null=True, blank=True, verbose_name="Data de Nascimento do Parceiro")
+    data_nascimento_parceiro = models.DateField(null=True, blank=True, db_index=True, verbose_name="Data de Nascimento do Parceiro")
     genero_parceiro = models.CharField(max_length=4, choices=GENERO_CHOICES, blank=True, verbose_name="Gênero do Parceiro")
-    foto_perfil_parceiro = models.ImageField(upload_to='perfis/parceiros/', null=True, blank=True, verbose_name="Foto do Parceiro")
+    foto_perfil_parceiro = models.ImageField(upload_to='perfis/parceiros/', storage=obter_armazenamento, null=True, blank=True, verbose_name="Foto do Parceiro")
     
     # Informações pessoais adicionais
     profissao = models.CharField(max_length=100, blank=True, verbose_name="Profissão")
@@ -505,6 +508,13 @@ class Usuario(AbstractUser):
         ('TODOS', 'Todos'),
     ]
     
+    # Perfis de casal equivalentes em GENERO_INTERESSE_CHOICES
+    TIPO_PERFIL_INTERESSE = {
+        'casal_ele_ela': 'C_EL',
+        'casal_ele_ele': 'C_EE',
+        'casal_ela_ela': 'C_MM',
+    }
+    
     genero_interesse = models.CharField(max_length=6, choices=GENERO_INTERESSE_CHOICES, blank=True, verbose_name="Interesse em")
     idade_minima = models.IntegerField(default=18, validators=[MinValueValidator(18), MaxValueValidator(100)], verbose_name="Idade Mínima")
     idade_maxima = models.IntegerField(default=50, validators=[MinValueValidator(18), MaxValueValidator(100)], verbose_name="Idade Máxima")
@@ -520,14 +530,36 @@ class Usuario(AbstractUser):
     mostrar_idade = models.BooleanField(default=True, verbose_name="Mostrar Idade")
     mostrar_localizacao = models.BooleanField(default=True, verbose_name="Mostrar Localização")
     
+    # Texto normalizado para a busca de pessoas (ver usuarios.busca)
+    termos_busca = models.CharField(max_length=255, blank=True, default='', editable=False)
+    cidade_busca = models.CharField(max_length=120, blank=True, default='', editable=False)
+    
+    # Campos que alimentam termos_busca/cidade_busca
+    CAMPOS_BUSCA = (
+        'username', 'first_name', 'last_name', 'first_name_parceiro',
+        'last_name_parceiro', 'cidade', 'cidade_ref',
+    )
+    
     class Meta:
         verbose_name = "Usuário"
         verbose_name_plural = "Usuários"
         ordering = ['-data_criacao']
+        indexes = [
+            models.Index(fields=['latitude', 'longitude'], name='usuario_lat_lon_idx'),
+        ]
     
     def __str__(self):
         return f"{self.username} - {self.get_full_name() or self.email}"
     
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or set(update_fields) & set(self.CAMPOS_BUSCA):
+            from .busca import termos_do_usuario
+            self.termos_busca, self.cidade_busca = termos_do_usuario(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'termos_busca', 'cidade_busca'}
+        super().save(*args, **kwargs)
+    
     @property
     def idade(self):
         """Calcula a idade do usuário"""
@@ -556,6 +588,69 @@ class Usuario(AbstractUser):
             return today.year - self.data_nascimento_parceiro.year - ((today.month, today.day) < (self.data_nascimento_parceiro.month, self.data_nascimento_parceiro.day))
         return None
     
+    @property
+    def identidade_interesse(self):
+        """Código de GENERO_INTERESSE_CHOICES que descreve este perfil"""
+        return self.TIPO_PERFIL_INTERESSE.get(self.tipo_perfil, self.genero)
+    
+    @classmethod
+    def filtro_genero_interesse(cls, genero_interesse):
+        """Filtro Q de usuários que atendem a um código de genero_interesse"""
+        if not genero_interesse or genero_interesse == 'TODOS':
+            return models.Q()
+        tipos_casal = [tipo for tipo, codigo in cls.TIPO_PERFIL_INTERESSE.items() if codigo == genero_interesse]
+        if tipos_casal:
+            return models.Q(tipo_perfil__in=tipos_casal)
+        return models.Q(genero=genero_interesse)
+    
+    @staticmethod
+    def limites_nascimento(idade_minima=None, idade_maxima=None, hoje=None):
+        """
+        Datas de nascimento (mais_antiga, mais_recente) de quem tem hoje entre
+        idade_minima e idade_maxima anos, pelo calendário (29/02 vira 28/02
+        em ano não bissexto, como na propriedade `idade`).
+        """
+        hoje = hoje or date.today()
+        
+        def anos_atras(anos):
+            try:
+                return hoje.replace(year=hoje.year - anos)
+            except ValueError:
+                return hoje.replace(year=hoje.year - anos, day=28)
+        
+        mais_recente = anos_atras(idade_minima) if idade_minima is not None else None
+        mais_antiga = anos_atras(idade_maxima + 1) + timedelta(days=1) if idade_maxima is not None else None
+        return mais_antiga, mais_recente
+    
+    @classmethod
+    def filtro_idade(cls, idade_minima=None, idade_maxima=None, hoje=None):
+        """
+        Filtro Q de perfis com alguém na faixa de idade: o titular, o parceiro
+        ou uma das pessoas do PerfilDetalhado (casais). Cada ramo é uma faixa
+        simples sobre uma coluna de data indexada.
+        """
+        mais_antiga, mais_recente = cls.limites_nascimento(idade_minima, idade_maxima, hoje)
+        if mais_antiga is None and mais_recente is None:
+            return models.Q()
+        
+        def faixa(campo):
+            if mais_antiga is None:
+                return {f'{campo}__lte': mais_recente}
+            if mais_recente is None:
+                return {f'{campo}__gte': mais_antiga}
+            return {f'{campo}__range': (mais_antiga, mais_recente)}
+        
+        # IN (subconsulta não correlacionada) deixa o banco combinar os três
+        # índices de data; um EXISTS correlacionado faria varrer a tabela
+        pessoas_na_faixa = PerfilDetalhado.objects.filter(
+            **faixa('data_nascimento')
+        ).values('usuario_id')
+        return (
+            models.Q(**faixa('data_nascimento'))
+            | models.Q(**faixa('data_nascimento_parceiro'))
+            | models.Q(id__in=pessoas_na_faixa)
+        )
+    
     @property
     def is_casal(self):
         """Verifica se é um perfil de casal"""
@@ -587,18 +682,26 @@ class Usuario(AbstractUser):
         if self.cidade_ref and outro_usuario.cidade_ref:
             return self.cidade_ref.distancia_para(outro_usuario.cidade_ref)
         
-        # Fallback para coordenadas diretas
-        if (self.latitude and self.longitude and 
-            outro_usuario.latitude and outro_usuario.longitude):
+        # Fallback para coordenadas diretas (ou cidade_ref de um dos lados)
+        from .geo import origem_usuario
+        
+        origem = origem_usuario(self)
+        destino = origem_usuario(outro_usuario)
+        if origem and destino:
             return Cidade.calcular_distancia_haversine(
-                float(self.latitude), float(self.longitude),
-                float(outro_usuario.latitude), float(outro_usuario.longitude)
+                origem[0], origem[1], destino[0], destino[1]
             )
         
         return None
     
-    def usuarios_proximos(self, raio_km=50, genero_interesse=None):
-        """Busca usuários próximos dentro de um raio específico"""
+    def usuarios_proximos(self, raio_km=50, genero_interesse=None, ordenar=True,
+                          limite=None, deslocamento=0):
+        """
+        Busca usuários próximos dentro de um raio específico.
+        Retorna lista de tuplas (usuario, distancia) ordenada por distância.
+        """
+        from .geo import buscar_proximos_por_cidade
+        
         if not self.cidade_ref:
             return Usuario.objects.none()
         
@@ -613,17 +716,16 @@ class Usuario(AbstractUser):
                 genero_interesse=genero_interesse
             )
         
-        # Calcular distância para cada usuário
-        usuarios_com_distancia = []
-        for usuario in usuarios_proximos:
-            distancia = self.distancia_para_usuario(usuario)
-            if distancia and distancia <= raio_km:
-                usuarios_com_distancia.append((usuario, distancia))
-        
-        # Ordenar por distância
-        usuarios_com_distancia.sort(key=lambda x: x[1])
-        
-        return usuarios_com_distancia
+        # Índice de vizinhança (ou caixa delimitadora) no banco +
+        # distância exata só para os candidatos
+        return buscar_proximos_por_cidade(
+            usuarios_proximos,
+            self.cidade_ref,
+            raio_km,
+            ordenar=ordenar,
+            limite=limite,
+            deslocamento=deslocamento,
+        )
 
 
 class Interesse(models.Model):
@@ -804,6 +906,7 @@ class PerfilDetalhado(models.Model):
     data_nascimento = models.DateField(
         null=True, 
         blank=True, 
+        db_index=True,
         verbose_name="Data de Nascimento"
     )
     profissao = models.CharField(
@@ -941,6 +1044,24 @@ class PerfilDetalhado(models.Model):
         return None
 
 
+class PerfilInteressesQuerySet(models.QuerySet):
+    """Filtros sobre a máscara de bits dos interesses"""
+    
+    def com_flags(self, *campos):
+        """Perfis que têm TODOS os campos informados marcados"""
+        mascara = PerfilInteresses.mascara_de(*campos)
+        return self.annotate(
+            _flags_exigidas=models.F('mascara_flags').bitand(mascara)
+        ).filter(_flags_exigidas=mascara)
+    
+    def com_alguma_flag(self, *campos):
+        """Perfis que têm PELO MENOS UM dos campos informados marcado"""
+        mascara = PerfilInteresses.mascara_de(*campos)
+        return self.annotate(
+            _flags_comuns=models.F('mascara_flags').bitand(mascara)
+        ).exclude(_flags_comuns=0)
+
+
 class PerfilInteresses(models.Model):
     """Modelo para interesses e preferências do perfil"""
     
@@ -988,16 +1109,66 @@ class PerfilInteresses(models.Model):
     # Confirmação de idade
     maior_18 = models.BooleanField(default=True, verbose_name="Maior de 18 anos")
     
+    # Campos de interesse usados na comparação entre perfis.
+    # A posição na tupla é o bit do campo em `mascara_flags`: não reordenar,
+    # apenas acrescentar no final (e recalcular com uma migração).
+    CAMPOS_FLAGS = (
+        'procurando_casais', 'procurando_mulheres', 'procurando_homens',
+        'procurando_grupos', 'procurando_amizades', 'procurando_experiencias',
+        'objetivo_amizades', 'objetivo_relacionamento', 'objetivo_troca',
+        'objetivo_aventura', 'objetivo_relacao_aberta', 'objetivo_curiosidade',
+        'preferencia_romantico', 'preferencia_aventureiro', 'preferencia_intimista',
+        'preferencia_social', 'preferencia_privacidade', 'preferencia_publico',
+    )
+    
+    # Máscara de bits com os campos de CAMPOS_FLAGS (mantida no save)
+    mascara_flags = models.PositiveIntegerField(
+        default=0, 
+        db_index=True, 
+        editable=False, 
+        verbose_name="Máscara de Interesses"
+    )
+    
     # Timestamps
     criado_em = models.DateTimeField(auto_now_add=True, verbose_name="Criado em")
     atualizado_em = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
     
+    objects = PerfilInteressesQuerySet.as_manager()
+    
     class Meta:
         verbose_name = "Perfil de Interesses"
         verbose_name_plural = "Perfis de Interesses"
     
     def __str__(self):
         return f"Interesses - {self.usuario.username}"
+    
+    def save(self, *args, **kwargs):
+        self.mascara_flags = self.calcular_mascara()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & set(self.CAMPOS_FLAGS):
+            kwargs['update_fields'] = set(update_fields) | {'mascara_flags'}
+        super().save(*args, **kwargs)
+    
+    def calcular_mascara(self):
+        """Empacota os campos de CAMPOS_FLAGS em um inteiro"""
+        return sum(
+            1 << bit for bit, campo in enumerate(self.CAMPOS_FLAGS) if getattr(self, campo)
+        )
+    
+    @classmethod
+    def mascara_de(cls, *campos):
+        """Máscara com os bits dos campos informados"""
+        return sum(1 << cls.CAMPOS_FLAGS.index(campo) for campo in set(campos))
+    
+    @classmethod
+    def campos_da_mascara(cls, mascara):
+        """Lista os campos marcados em uma máscara"""
+        return [campo for bit, campo in enumerate(cls.CAMPOS_FLAGS) if mascara & (1 << bit)]
+    
+    @staticmethod
+    def sobreposicao(mascara_a, mascara_b):
+        """Quantidade de interesses em comum entre duas máscaras (popcount do AND)"""
+        return bin(mascara_a & mascara_b).count('1')
 
 
 class PerfilSobre(models.Model):
@@ -1086,6 +1257,9 @@ class Cidade(models.Model):
         verbose_name = "Cidade"
         verbose_name_plural = "Cidades"
         ordering = ['estado', 'nome']
+        indexes = [
+            models.Index(fields=['latitude', 'longitude'], name='cidade_lat_lon_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nome}/{self.estado}"
@@ -1131,3 +1305,30 @@ class Cidade(models.Model):
         return queryset.order_by('nome')
 
 
+class VizinhancaCidade(models.Model):
+    """Índice pré-calculado de cidades vizinhas e suas distâncias"""
+    
+    origem = models.ForeignKey(
+        Cidade, 
+        on_delete=models.CASCADE, 
+        related_name='vizinhancas',
+        verbose_name="Cidade de Origem"
+    )
+    destino = models.ForeignKey(
+        Cidade, 
+        on_delete=models.CASCADE, 
+        related_name='+',
+        verbose_name="Cidade Vizinha"
+    )
+    distancia = models.FloatField(verbose_name="Distância (km)")
+    
+    class Meta:
+        verbose_name = "Vizinhança de Cidade"
+        verbose_name_plural = "Vizinhanças de Cidades"
+        unique_together = ['origem', 'destino']
+        indexes = [
+            models.Index(fields=['origem', 'distancia'], name='vizinhanca_origem_dist_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.origem_id} -> {self.destino_id} ({self.distancia} km)"
@@ -0,0 +1,50 @@
+from django.core.signals import request_started
+from django.db import connections
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .busca import criar_indice_busca
+from .indice_tags import indice_tags
+from .models import UsuarioInteresse, UsuarioObjetivo, UsuarioFetiche
+
+# Modelo de ligação -> (tipo no índice, campo da tag)
+TABELAS_INDICE = {
+    UsuarioInteresse: ('interesse', 'interesse_id'),
+    UsuarioObjetivo: ('objetivo', 'objetivo_id'),
+    UsuarioFetiche: ('fetiche', 'fetiche_id'),
+}
+
+
+@receiver(request_started)
+def aquecer_indice_tags(sender, **kwargs):
+    """Aquece o índice de tags em segundo plano na primeira requisição do processo"""
+    request_started.disconnect(aquecer_indice_tags)
+    indice_tags.aquecer_em_segundo_plano()
+
+
+def tag_adicionada(sender, instance, created, **kwargs):
+    if created:
+        tipo, campo = TABELAS_INDICE[sender]
+        indice_tags.adicionar(tipo, getattr(instance, campo), instance.usuario_id)
+
+
+def tag_removida(sender, instance, **kwargs):
+    tipo, campo = TABELAS_INDICE[sender]
+    indice_tags.remover(tipo, getattr(instance, campo), instance.usuario_id)
+
+
+for modelo in TABELAS_INDICE:
+    post_save.connect(tag_adicionada, sender=modelo, dispatch_uid=f'indice_tags_save_{modelo.__name__}')
+    post_delete.connect(tag_removida, sender=modelo, dispatch_uid=f'indice_tags_delete_{modelo.__name__}')
+
+
+def garantir_indice_busca(sender, using, **kwargs):
+    """Recria triggers/índices de busca que uma migração possa ter derrubado"""
+    connection = connections[using]
+    if 'usuarios_usuario' not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        colunas = {coluna.name for coluna in connection.introspection.get_table_description(cursor, 'usuarios_usuario')}
+    # Após reverter a migração de busca as colunas não existem mais
+    if 'termos_busca' in colunas:
+        criar_indice_busca(connection)
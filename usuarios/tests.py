@@ -1,3 +1,93 @@
+from datetime import date
+
 from django.test import TestCase
 
-# Create your tests here.
+from .models import PerfilDetalhado, Usuario
+
+
+def idade_em(nascimento, hoje):
+    """Mesma conta da propriedade Usuario.idade, para uma data qualquer"""
+    return hoje.year - nascimento.year - ((hoje.month, hoje.day) < (nascimento.month, nascimento.day))
+
+
+class LimitesNascimentoTests(TestCase):
+    """Faixa de datas de nascimento calculada pelo calendário (Usuario.limites_nascimento)"""
+
+    def test_limites_em_dia_comum(self):
+        mais_antiga, mais_recente = Usuario.limites_nascimento(18, 30, hoje=date(2024, 6, 15))
+        self.assertEqual(mais_recente, date(2006, 6, 15))
+        self.assertEqual(mais_antiga, date(1993, 6, 16))
+
+    def test_limites_em_29_de_fevereiro(self):
+        # 29/02 vira 28/02 nos anos não bissextos
+        mais_antiga, mais_recente = Usuario.limites_nascimento(18, 30, hoje=date(2024, 2, 29))
+        self.assertEqual(mais_recente, date(2006, 2, 28))
+        self.assertEqual(mais_antiga, date(1993, 3, 1))
+
+    def test_limites_em_29_de_fevereiro_para_ano_bissexto(self):
+        mais_antiga, mais_recente = Usuario.limites_nascimento(20, 27, hoje=date(2024, 2, 29))
+        self.assertEqual(mais_recente, date(2004, 2, 29))
+        self.assertEqual(mais_antiga, date(1996, 3, 1))
+
+    def test_limites_abertos(self):
+        self.assertEqual(Usuario.limites_nascimento(hoje=date(2024, 6, 15)), (None, None))
+        self.assertEqual(Usuario.limites_nascimento(idade_minima=18, hoje=date(2024, 6, 15)), (None, date(2006, 6, 15)))
+        self.assertEqual(Usuario.limites_nascimento(idade_maxima=30, hoje=date(2024, 6, 15)), (date(1993, 6, 16), None))
+
+    def test_limites_batem_com_a_idade_calculada(self):
+        # Para cada dia de referência, quem está na faixa de datas é quem tem a idade na faixa
+        referencias = [date(2024, 2, 28), date(2024, 2, 29), date(2024, 3, 1), date(2023, 2, 28), date(2023, 3, 1)]
+        nascimentos = [
+            date(ano, mes, dia)
+            for ano in (1993, 1994, 1995, 1996, 2004, 2005, 2006)
+            for mes, dia in ((2, 27), (2, 28), (2, 29), (3, 1))
+            if not (mes == 2 and dia == 29 and ano % 4)
+        ]
+        for hoje in referencias:
+            mais_antiga, mais_recente = Usuario.limites_nascimento(18, 28, hoje=hoje)
+            for nascimento in nascimentos:
+                with self.subTest(hoje=hoje, nascimento=nascimento):
+                    self.assertEqual(
+                        mais_antiga <= nascimento <= mais_recente,
+                        18 <= idade_em(nascimento, hoje) <= 28,
+                    )
+
+
+class FiltroIdadeTests(TestCase):
+    """Filtro de idade sobre titular, parceiro e pessoas do PerfilDetalhado"""
+
+    hoje = date(2024, 2, 29)
+
+    def filtrar(self, idade_minima, idade_maxima):
+        return set(
+            Usuario.objects.filter(
+                Usuario.filtro_idade(idade_minima, idade_maxima, hoje=self.hoje)
+            ).values_list('username', flat=True)
+        )
+
+    def test_filtra_titular_parceiro_e_perfil_detalhado(self):
+        Usuario.objects.create_user('titular', data_nascimento=date(2000, 5, 10))
+        Usuario.objects.create_user(
+            'parceiro', data_nascimento=date(1970, 1, 1), data_nascimento_parceiro=date(2000, 5, 10)
+        )
+        casal = Usuario.objects.create_user('detalhado', data_nascimento=date(1970, 1, 1))
+        PerfilDetalhado.objects.create(usuario=casal, pessoa='ela', data_nascimento=date(2000, 5, 10))
+        Usuario.objects.create_user('fora', data_nascimento=date(1970, 1, 1))
+        Usuario.objects.create_user('sem_data')
+
+        self.assertEqual(self.filtrar(20, 30), {'titular', 'parceiro', 'detalhado'})
+
+    def test_aniversario_em_29_de_fevereiro(self):
+        # Nascido em 29/02/2004: completa 20 anos em 29/02/2024
+        Usuario.objects.create_user('bissexto', data_nascimento=date(2004, 2, 29))
+        # Nascido em 01/03/2004: ainda tem 19
+        Usuario.objects.create_user('marco', data_nascimento=date(2004, 3, 1))
+        # Nascido em 01/03/1993: ainda tem 30; em 28/02/1993 já tem 31
+        Usuario.objects.create_user('limite', data_nascimento=date(1993, 3, 1))
+        Usuario.objects.create_user('passou', data_nascimento=date(1993, 2, 28))
+
+        self.assertEqual(self.filtrar(20, 30), {'bissexto', 'limite'})
+
+    def test_sem_limites_nao_filtra(self):
+        Usuario.objects.create_user('sem_data')
+        self.assertEqual(self.filtrar(None, None), {'sem_data'})
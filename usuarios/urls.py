@@ -22,6 +22,7 @@ urlpatterns = [
     
     # Busca e visualização de usuários
     path('buscar/', views.buscar_usuarios, name='buscar'),
+    path('buscar/sugestoes/', views.sugestoes_busca, name='sugestoes_busca'),
     path('perfil/<int:user_id>/', views.ver_perfil_usuario, name='ver_perfil'),
     
     # Fluxo de cadastro guiado
@@ -14,6 +14,10 @@ from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 import json
 
+from midia.imagens import url_variante
+
+from .busca import buscar
+from .indice_tags import indice_tags
 from .models import (
     Usuario, Cidade, TipoRelacionamento, EstadoCivil, Etnia, TipoCorpo, 
     NivelAbertura, Signo, CorOlhos, CorCabelos, PerfilDetalhado, 
@@ -308,42 +312,38 @@ def buscar_usuarios(request):
         cidade = request.GET.get('cidade', '')
         idade_min = request.GET.get('idade_min', 18)
         idade_max = request.GET.get('idade_max', 100)
+        similares = bool(request.GET.get('similares'))
         
         usuarios = Usuario.objects.filter(is_active=True).exclude(id=request.user.id)
         
-        if query:
-            usuarios = usuarios.filter(
-                username__icontains=query
-            ) | usuarios.filter(
-                first_name__icontains=query
-            ) | usuarios.filter(
-                last_name__icontains=query
-            )
+        # Só quem compartilha tags (interesses/objetivos/fetiches), via índice invertido
+        tags_em_comum = {}
+        if similares:
+            tags_em_comum = dict(indice_tags.top_k_sobreposicao(request.user.id, k=500))
+            usuarios = usuarios.filter(id__in=list(tags_em_comum))
         
-        if cidade:
-            usuarios = usuarios.filter(cidade__icontains=cidade)
+        # Filtro por idade (titular ou parceiro do casal)
+        usuarios = usuarios.filter(Usuario.filtro_idade(int(idade_min), int(idade_max)))
         
-        # Filtro por idade
-        from datetime import date, timedelta
-        hoje = date.today()
-        data_max = hoje - timedelta(days=int(idade_min) * 365)
-        data_min = hoje - timedelta(days=int(idade_max) * 365)
+        # Aplicar filtros de preferência do usuário
+        usuarios = usuarios.filter(Usuario.filtro_genero_interesse(request.user.genero_interesse))
         
-        usuarios = usuarios.filter(
-            data_nascimento__gte=data_min,
-            data_nascimento__lte=data_max
-        )
+        # Nome/usuário e cidade pelo índice de busca, por qualidade do casamento
+        if query or cidade:
+            usuarios = buscar(query, cidade, usuarios, limite=200 if similares else 20)
         
-        # Aplicar filtros de preferência do usuário
-        if request.user.genero_interesse:
-            if request.user.genero_interesse != 'A':
-                usuarios = usuarios.filter(genero=request.user.genero_interesse)
+        if similares:
+            # Mais tags em comum primeiro
+            usuarios = sorted(usuarios, key=lambda u: -tags_em_comum.get(u.id, 0))
+            for usuario in usuarios:
+                usuario.tags_em_comum = tags_em_comum.get(usuario.id, 0)
         
         usuarios = usuarios[:20]  # Limitar resultados
         
         return render(request, 'usuarios/buscar.html', {
             'usuarios': usuarios,
             'query': query,
+            'similares': similares,
             'cidade': cidade,
             'idade_min': idade_min,
             'idade_max': idade_max
@@ -352,6 +352,21 @@ def buscar_usuarios(request):
     return render(request, 'usuarios/buscar.html')
 
 
+@login_required
+def sugestoes_busca(request):
+    """Sugestões de pessoas por prefixo (typeahead) - retorna JSON"""
+    usuarios = Usuario.objects.filter(is_active=True).exclude(id=request.user.id)
+    resultados = buscar(request.GET.get('q', ''), queryset=usuarios, limite=8) if request.GET.get('q') else []
+    
+    return JsonResponse([{
+        'id': usuario.id,
+        'username': usuario.username,
+        'nome': usuario.nome_completo,
+        'cidade': usuario.cidade if usuario.mostrar_localizacao else '',
+        'foto': url_variante(usuario.foto_perfil, 'mini'),
+    } for usuario in resultados], safe=False)
+
+
 @login_required
 def ver_perfil_usuario(request, user_id):
     """View para ver perfil de outro usuário"""